@@ -3,12 +3,16 @@ import time
 import warnings
 from collections import deque
 from contextlib import contextmanager
+from itertools import chain, islice
 from time import timezone
 
-import utils
-from utils import cached_property
+import six
+from ibu.backends import utils
+from ibu.backends.utils import cached_property
 from ibu.config import DEFAULT_DB_ALIAS, Config
-from ibu.connection import Error, DatabaseError
+from ibu.connection import (
+    DatabaseError, DatabaseErrorWrapper, Error, NotSupportedError,
+)
 
 
 try:
@@ -19,6 +23,23 @@ except ImportError:
 NO_DB_ALIAS = '__no_db__'
 settings = Config()
 
+# Most INSERT statements bulk_insert_rows() keeps per connection.
+INSERT_STATEMENT_CACHE_SIZE = 100
+
+
+def estimate_row_bytes(row):
+    """
+    Returns a rough upper bound of the size of the values of `row` once
+    quoted into a statement. Escaping can double strings and bytes.
+    """
+    size = 0
+    for value in row:
+        if isinstance(value, (six.string_types, bytes, bytearray, memoryview)):
+            size += 2 * len(value) + 4
+        else:
+            size += 32
+    return size
+
 
 class ImproperlyConfigured(Exception):
     """Django is somehow improperly configured"""
@@ -48,6 +69,9 @@ class BaseDatabaseWrapper(object):
 
     queries_limit = 9000
 
+    # Rows read at a time by bulk_insert_batches(), before sizing batches.
+    bulk_insert_batch_size = 1000
+
     def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS,
                  allow_thread_sharing=False):
         # Connection related attributes.
@@ -96,6 +120,10 @@ class BaseDatabaseWrapper(object):
         # is called?
         self.run_commit_hooks_on_set_autocommit_on = False
 
+        # Multi-row INSERT statements of bulk_insert_rows(), by
+        # (table, columns, rows).
+        self._insert_statements = {}
+
     @cached_property
     def timezone(self):
         """
@@ -129,7 +157,7 @@ class BaseDatabaseWrapper(object):
 
     @property
     def queries_logged(self):
-        return self.force_debug_cursor or settings.DEBUG
+        return self.force_debug_cursor or getattr(settings, 'DEBUG', False)
 
     @property
     def queries(self):
@@ -161,6 +189,14 @@ class BaseDatabaseWrapper(object):
         raise NotImplementedError(
             'subclasses of BaseDatabaseWrapper may require a create_cursor() method')
 
+    def create_streaming_cursor(self):
+        """
+        Creates a cursor that fetches its results from the server as they're
+        read instead of all at once. Backends without such cursors return a
+        regular one.
+        """
+        return self.create_cursor()
+
     # ##### Backend-specific methods for creating connections #####
 
     def connect(self):
@@ -209,9 +245,11 @@ class BaseDatabaseWrapper(object):
 
     # ##### Backend-specific wrappers for PEP-249 connection methods #####
 
-    def _cursor(self):
+    def _cursor(self, streaming=False):
         self.ensure_connection()
         with self.wrap_database_errors:
+            if streaming:
+                return self.create_streaming_cursor()
             return self.create_cursor()
 
     def _commit(self):
@@ -231,15 +269,20 @@ class BaseDatabaseWrapper(object):
 
     # ##### Generic wrappers for PEP-249 connection methods #####
 
-    def cursor(self):
+    def cursor(self, streaming=False):
         """
         Creates a cursor, opening a connection if necessary.
+
+        A `streaming` cursor keeps large result sets on the server and reads
+        them in batches, so iterating over them needs constant memory. It
+        only supports a single execute(), and must be used and closed
+        within a transaction (see read_transaction()).
         """
         self.validate_thread_sharing()
         if self.queries_logged:
-            cursor = self.make_debug_cursor(self._cursor())
+            cursor = self.make_debug_cursor(self._cursor(streaming))
         else:
-            cursor = self.make_cursor(self._cursor())
+            cursor = self.make_cursor(self._cursor(streaming))
         return cursor
 
     def commit(self):
@@ -419,6 +462,75 @@ class BaseDatabaseWrapper(object):
                 "An error occurred in the current transaction. You can't "
                 "execute queries until the end of the 'atomic' block.")
 
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager running its block in a single transaction, committed
+        on success and rolled back on any exception. Autocommit is restored
+        afterwards.
+        """
+        self.set_autocommit(False)
+        try:
+            yield
+        except Exception:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+        finally:
+            self.set_autocommit(True)
+
+    @contextmanager
+    def read_transaction(self):
+        """
+        Context manager running its block in a transaction that's rolled
+        back afterwards, as needed by streaming cursors, or in the current
+        transaction if one is already open.
+        """
+        if not self.get_autocommit():
+            yield
+            return
+        self.set_autocommit(False)
+        try:
+            yield
+        finally:
+            self.rollback()
+            self.set_autocommit(True)
+
+    @contextmanager
+    def synchronized_snapshot(self, connections):
+        """
+        Context manager opening a read-only transaction on this connection
+        and on each of `connections` (other connections to the same
+        database), all reading the database as of the same point in time.
+        The transactions are rolled back on exit.
+        """
+        if not self.features.can_synchronize_snapshots:
+            raise NotSupportedError(
+                "The %s backend can't share a snapshot between connections."
+                % self.vendor)
+        connections = [connection for connection in connections
+                       if connection is not self]
+        participants = [self] + connections
+        for connection in participants:
+            connection.set_autocommit(False)
+        try:
+            self._start_synchronized_snapshot(connections)
+            yield
+        finally:
+            for connection in participants:
+                connection.rollback()
+                connection.set_autocommit(True)
+
+    def _start_synchronized_snapshot(self, connections):
+        """
+        Backend-specific implementation starting the snapshot transactions
+        of synchronized_snapshot(). Autocommit is already off everywhere.
+        """
+        raise NotImplementedError(
+            'subclasses of BaseDatabaseWrapper may require a '
+            '_start_synchronized_snapshot() method')
+
     # ##### Foreign key constraints checks handling #####
 
     @contextmanager
@@ -456,6 +568,123 @@ class BaseDatabaseWrapper(object):
         """
         pass
 
+    # ##### Sequences #####
+
+    def reset_sequences(self, style, model_list):
+        """
+        Resets the sequences of the given models past their largest primary
+        key, after rows were written with explicit keys.
+
+        The default runs the statements of ops.sequence_reset_sql() one at a
+        time. Backends should override this to save the round trips.
+        """
+        with self.cursor() as cursor:
+            for sql in self.ops.sequence_reset_sql(style, model_list):
+                cursor.execute(sql)
+
+    # ##### Bulk loading #####
+
+    @cached_property
+    def max_statement_bytes(self):
+        """
+        The largest statement the server accepts, in bytes, or None if there
+        is no practical limit.
+        """
+        return None
+
+    def insert_statement(self, table, columns, row_count):
+        """
+        Returns the INSERT statement writing `row_count` rows into `columns`
+        of `table`. Statements are cached per connection.
+        """
+        key = (table, tuple(columns), row_count)
+        try:
+            return self._insert_statements[key]
+        except KeyError:
+            pass
+        qn = self.ops.quote_name
+        sql = 'INSERT INTO %s (%s) %s' % (
+            qn(table),
+            ', '.join(qn(column) for column in columns),
+            self.ops.bulk_insert_sql(
+                columns, [['%s'] * len(columns)] * row_count),
+        )
+        if len(self._insert_statements) < INSERT_STATEMENT_CACHE_SIZE:
+            self._insert_statements[key] = sql
+        return sql
+
+    def bulk_insert_batches(self, columns, rows):
+        """
+        Splits the iterable of row tuples `rows` into lists that each fit in
+        a single INSERT statement: at most ops.bulk_batch_size() rows (which
+        honors features.max_query_params), and, if max_statement_bytes is
+        known, about half of it in estimated parameter text.
+        """
+        rows = iter(rows)
+        max_bytes = self.max_statement_bytes
+        if max_bytes is not None:
+            max_bytes //= 2
+        batch, batch_bytes = [], 0
+        while True:
+            chunk = list(islice(rows, self.bulk_insert_batch_size))
+            if not chunk:
+                if batch:
+                    yield batch
+                return
+            batch_size = self.ops.bulk_batch_size(columns, chunk)
+            for row in chunk:
+                if max_bytes is not None:
+                    row_bytes = estimate_row_bytes(row)
+                    if batch and batch_bytes + row_bytes > max_bytes:
+                        yield batch
+                        batch, batch_bytes = [], 0
+                    batch_bytes += row_bytes
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch, batch_bytes = [], 0
+
+    def bulk_insert_rows(self, table, columns, rows):
+        """
+        Inserts `rows`, an iterable of tuples ordered like `columns`, into
+        `table` and returns the number of rows written.
+
+        Backends with a native bulk-load path (COPY, LOAD DATA, ...) should
+        override this. The default sends multi-row INSERT statements, sized
+        by bulk_insert_batches().
+        """
+        count = 0
+        with self.cursor() as cursor:
+            for batch in self.bulk_insert_batches(columns, rows):
+                cursor.execute(
+                    self.insert_statement(table, columns, len(batch)),
+                    list(chain.from_iterable(batch)))
+                count += len(batch)
+        return count
+
+    def bulk_upsert_rows(self, table, columns, rows, key_columns):
+        """
+        Writes `rows` into `table` like bulk_insert_rows(), replacing the
+        existing rows with the same `key_columns` values, and returns the
+        number of rows written.
+
+        The default deletes the matching rows before inserting the new ones.
+        Backends with a native upsert should override this.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        qn = self.ops.quote_name
+        positions = [columns.index(column) for column in key_columns]
+        sql = 'DELETE FROM %s WHERE %s' % (
+            qn(table),
+            ' AND '.join('%s = %%s' % qn(column) for column in key_columns),
+        )
+        with self.cursor() as cursor:
+            cursor.executemany(sql, [[row[i] for i in positions]
+                                     for row in rows])
+        return self.bulk_insert_rows(table, columns, rows)
+
     # ##### Connection termination handling #####
 
     def is_usable(self):
@@ -1,5 +1,5 @@
 from ibu.connection import ProgrammingError
-from utils import cached_property
+from ibu.backends.utils import cached_property
 
 
 class BaseDatabaseFeatures(object):
@@ -90,6 +90,9 @@ class BaseDatabaseFeatures(object):
     # Is there a 1000 item limit on query parameters?
     supports_1000_query_parameters = True
 
+    # Maximum number of parameters in a single query, or None if unlimited.
+    max_query_params = None
+
     # Can an object have an autoincrement primary key of 0? MySQL says No.
     allows_auto_pk_0 = True
 
@@ -204,6 +207,14 @@ class BaseDatabaseFeatures(object):
     # Defaults to False to allow third-party backends to opt-in.
     can_clone_databases = False
 
+    # Can several connections read from one exported snapshot, through
+    # synchronized_snapshot()?
+    can_synchronize_snapshots = False
+
+    # Can foreign keys be added without checking the existing rows, and
+    # validated later with weaker locks (see integrity.validate_constraints)?
+    can_defer_foreign_key_validation = False
+
     def __init__(self, connection):
         self.connection = connection
 
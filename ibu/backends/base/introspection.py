@@ -1,6 +1,7 @@
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
+
+from six import iteritems
 
-from iteritems import iteritems
 # Structure returned by DatabaseIntrospection.get_table_list()
 TableInfo = namedtuple('TableInfo', ['name', 'type'])
 
@@ -118,6 +119,70 @@ class BaseDatabaseIntrospection(object):
         raise NotImplementedError(
             'subclasses of BaseDatabaseIntrospection may require a get_key_columns() method')
 
+    def get_table_dependencies(self, cursor, table_names):
+        """
+        Returns a dict mapping each of `table_names` to the set of the other
+        tables among `table_names` it references through foreign keys.
+        """
+        table_names = set(table_names)
+        dependencies = {}
+        for table_name in table_names:
+            referenced = set(
+                referenced_table for _, referenced_table, _ in
+                self.get_key_columns(cursor, table_name)
+            )
+            referenced.discard(table_name)
+            dependencies[table_name] = referenced & table_names
+        return dependencies
+
+    def get_table_row_estimate(self, cursor, table_name):
+        """
+        Returns the approximate number of rows in the given table, read from
+        the database's statistics rather than counted, or None if the
+        database has no estimate.
+        """
+        return None
+
+    def get_index_definitions(self, cursor, table_name):
+        """
+        Returns an OrderedDict mapping the name of each secondary index of
+        the given table to the statement creating it again. Primary key and
+        unique indexes, and indexes backing a constraint, aren't included:
+        they can't be dropped for the duration of a load.
+
+        The default builds plain CREATE INDEX statements from
+        get_constraints().
+        """
+        qn = self.connection.ops.quote_name
+        template = self.connection.SchemaEditorClass.sql_create_index
+        definitions = OrderedDict()
+        for name, constraint in sorted(self.get_constraints(cursor, table_name).items()):
+            if (not constraint['index'] or constraint['primary_key'] or constraint['unique'] or
+                    constraint['foreign_key'] or constraint['check']):
+                continue
+            definitions[name] = template % {
+                'table': qn(table_name),
+                'name': qn(name),
+                'columns': ', '.join(qn(column) for column in constraint['columns']),
+                'extra': '',
+            }
+        return definitions
+
+    def get_foreign_key_definitions(self, cursor, table_name):
+        """
+        Returns an OrderedDict mapping the name of each foreign key of the
+        given table to its definition, as in
+        "ALTER TABLE ... ADD CONSTRAINT <name> <definition>".
+        """
+        raise NotImplementedError('subclasses of BaseDatabaseIntrospection may require a get_foreign_key_definitions() method')
+
+    def get_unvalidated_foreign_keys(self, cursor, table_name):
+        """
+        Returns the names of the foreign keys of the given table that were
+        added without validating the existing rows.
+        """
+        raise NotImplementedError('subclasses of BaseDatabaseIntrospection may require a get_unvalidated_foreign_keys() method')
+
     def get_primary_key_column(self, cursor, table_name):
         """
         Returns the name of the primary key column for the given table.
@@ -3,6 +3,8 @@ import decimal
 import warnings
 from importlib import import_module
 
+import six
+
 from .base import ImproperlyConfigured
 
 
@@ -43,7 +45,38 @@ class BaseDatabaseOperations(object):
         are the fields going to be inserted in the batch, the objs contains
         all the objects to be inserted.
         """
-        return len(objs)
+        max_query_params = self.connection.features.max_query_params
+        if max_query_params is None or not fields:
+            return len(objs)
+        return max(1, min(len(objs), max_query_params // len(fields)))
+
+    def bulk_insert_sql(self, fields, placeholder_rows):
+        """
+        Returns the VALUES clause of a multi-row INSERT, for the lists of
+        placeholders `placeholder_rows`.
+        """
+        placeholder_rows_sql = (", ".join(row) for row in placeholder_rows)
+        values_sql = ", ".join("(%s)" % sql for sql in placeholder_rows_sql)
+        return "VALUES " + values_sql
+
+    def key_bounds_sql(self, table, column):
+        """
+        Returns the SQL selecting the smallest and largest values of `column`
+        in `table`.
+        """
+        column = self.quote_name(column)
+        return 'SELECT MIN(%s), MAX(%s) FROM %s' % (
+            column, column, self.quote_name(table))
+
+    def key_sample_sql(self, table, column, fraction):
+        """
+        Returns (sql, params) selecting a random sample of roughly `fraction`
+        (between 0 and 1) of the values of `column` in `table`.
+        """
+        return 'SELECT %s FROM %s WHERE %s < %%s' % (
+            self.quote_name(column), self.quote_name(table),
+            self.random_function_sql(),
+        ), [fraction]
 
     def cache_key_culling_sql(self):
         """
@@ -404,6 +437,24 @@ class BaseDatabaseOperations(object):
         """
         return []  # No sequence reset required by default.
 
+    def sequence_reset_columns(self, model_list):
+        """
+        Returns the (table, column) pairs of the auto-incremented primary
+        keys of the given models and of their auto-created many-to-many
+        tables.
+        """
+        columns = []
+        for model in model_list:
+            # Set by AutoField.contribute_to_class(): only one is allowed
+            # per model.
+            auto_field = model._meta.auto_field
+            if auto_field is not None:
+                columns.append((model._meta.db_table, auto_field.column))
+            for f in model._meta.many_to_many:
+                if f.remote_field.through._meta.auto_created:
+                    columns.append((f.m2m_db_table(), 'id'))
+        return columns
+
     def start_transaction_sql(self):
         """
         Returns the SQL statement required to start a transaction.
@@ -429,9 +480,9 @@ class BaseDatabaseOperations(object):
         """
         return ''
 
-    # def prep_for_like_query(self, x):
-    #     """Prepares a value for use in a LIKE query."""
-    #     return force_text(x).replace("\\", "\\\\").replace("%", "\%").replace("_", "\_")
+    def prep_for_like_query(self, x):
+        """Prepares a value for use in a LIKE query."""
+        return six.text_type(x).replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
 
     # Same as prep_for_like_query(), but called for "iexact" matches, which
     # need not necessarily be implemented using "LIKE" in the backend.
@@ -18,6 +18,7 @@ from ibu import connection as utils
 from ibu.backends import utils as backend_utils
 from ibu.backends.base.base import BaseDatabaseWrapper
 from ibu.backends.utils import cached_property
+from ibu.files.temp import NamedTemporaryFile
 
 try:
     import MySQLdb as Database
@@ -27,9 +28,11 @@ except ImportError as e:
 
 from MySQLdb.constants import CLIENT, FIELD_TYPE                # isort:skip
 from MySQLdb.converters import Thing2Literal, conversions       # isort:skip
+from MySQLdb.cursors import SSCursor                            # isort:skip
 
 # Some of these import MySQLdb, so import them after checking if it's
 # installed.
+from .bulk import check_load_data, write_rows               # isort:skip
 from .client import DatabaseClient                          # isort:skip
 from .creation import DatabaseCreation                      # isort:skip
 from .features import DatabaseFeatures                      # isort:skip
@@ -66,13 +69,23 @@ def adapt_datetime_warn_on_aware_datetime(value, conv):
 # and Django expects time, so we still need to override that. We also need to
 # add special handling for SafeText and SafeBytes as MySQLdb's type
 # checking is too tight to catch those (see Django ticket #6052).
-django_conversions = conversions.copy()
-django_conversions.update({
+#
+# The columns of batch_conversions are left unconverted by MySQLdb; the
+# cursor wrappers convert them a whole fetched batch at a time instead.
+batch_conversions = {
+    FIELD_TYPE.DATE: backend_utils.typecast_date,
+    FIELD_TYPE.DATETIME: backend_utils.typecast_timestamp,
+    FIELD_TYPE.TIMESTAMP: backend_utils.typecast_timestamp,
     FIELD_TYPE.TIME: backend_utils.typecast_time,
     FIELD_TYPE.DECIMAL: backend_utils.typecast_decimal,
     FIELD_TYPE.NEWDECIMAL: backend_utils.typecast_decimal,
+}
+django_conversions = conversions.copy()
+django_conversions.update({
     datetime.datetime: adapt_datetime_warn_on_aware_datetime,
 })
+for field_type in batch_conversions:
+    django_conversions.pop(field_type, None)
 
 # This should match the numerical portion of the version numbers (we can treat
 # versions like 5.0.24 and 5.0.24a as the same). Based on the list of version
@@ -80,6 +93,10 @@ django_conversions.update({
 # http://dev.mysql.com/doc/refman/5.0/en/news.html .
 server_version_re = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{1,2})')
 
+# Rows spooled to a temporary file per LOAD DATA statement by
+# DatabaseWrapper.bulk_insert_rows().
+LOAD_DATA_CHUNK_ROWS = 100000
+
 
 # MySQLdb-1.2.1 and newer automatically makes use of SHOW WARNINGS on
 # MySQL-4.1 and newer, so the MysqlDebugWrapper is unnecessary. Since the
@@ -98,8 +115,26 @@ class CursorWrapper(object):
     """
     codes_for_integrityerror = (1048,)
 
+    # Rows converted at a time when the cursor is iterated over.
+    iter_batch_size = 1000
+
     def __init__(self, cursor):
         self.cursor = cursor
+        self._description = None
+        self._converter = None
+
+    @property
+    def converter(self):
+        """
+        The RowConverter of the current result, compiled again only when the
+        result's description changes.
+        """
+        description = self.cursor.description
+        if self._converter is None or description is not self._description:
+            self._description = description
+            self._converter = backend_utils.RowConverter(
+                description, batch_conversions)
+        return self._converter
 
     def execute(self, query, args=None):
         try:
@@ -124,6 +159,18 @@ class CursorWrapper(object):
                     *tuple(e.args)), sys.exc_info()[2])
             raise
 
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        return self.converter([row])[0]
+
+    def fetchmany(self, size=None):
+        return self.converter(self.cursor.fetchmany(size or self.cursor.arraysize))
+
+    def fetchall(self):
+        return self.converter(self.cursor.fetchall())
+
     def __getattr__(self, attr):
         if attr in self.__dict__:
             return self.__dict__[attr]
@@ -131,7 +178,12 @@ class CursorWrapper(object):
             return getattr(self.cursor, attr)
 
     def __iter__(self):
-        return iter(self.cursor)
+        while True:
+            rows = self.fetchmany(self.iter_batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row
 
     def __enter__(self):
         return self
@@ -142,6 +194,71 @@ class CursorWrapper(object):
         self.close()
 
 
+class StreamingCursorWrapper(CursorWrapper):
+    """
+    A CursorWrapper around an unbuffered SSCursor, which reads rows from the
+    server as they're fetched instead of storing the whole result.
+
+    The MySQL protocol allows a single pending result per connection: until
+    it's read to the end or the cursor is closed, no other statement can be
+    sent. The wrapper marks its connection as busy in the meantime, so that
+    the DatabaseWrapper can refuse new cursors with a clear error instead of
+    "Commands out of sync".
+    """
+
+    def __init__(self, cursor, connection):
+        super(StreamingCursorWrapper, self).__init__(cursor)
+        self.connection = connection
+
+    def _start(self):
+        self.connection.check_no_pending_result()
+        self.connection.pending_result = self
+
+    def _done(self):
+        if self.connection.pending_result is self:
+            self.connection.pending_result = None
+
+    def execute(self, query, args=None):
+        self._start()
+        try:
+            return super(StreamingCursorWrapper, self).execute(query, args)
+        except Exception:
+            self._done()
+            raise
+
+    def executemany(self, query, args):
+        self._start()
+        try:
+            return super(StreamingCursorWrapper, self).executemany(query, args)
+        except Exception:
+            self._done()
+            raise
+
+    def fetchone(self):
+        row = super(StreamingCursorWrapper, self).fetchone()
+        if row is None:
+            self._done()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super(StreamingCursorWrapper, self).fetchmany(size)
+        if not rows:
+            self._done()
+        return rows
+
+    def fetchall(self):
+        rows = super(StreamingCursorWrapper, self).fetchall()
+        self._done()
+        return rows
+
+    def close(self):
+        try:
+            # Closing reads and discards the rest of the result.
+            self.cursor.close()
+        finally:
+            self._done()
+
+
 class DatabaseWrapper(BaseDatabaseWrapper):
     vendor = 'mysql'
     # This dictionary maps Field objects to their associated MySQL column
@@ -236,6 +353,8 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.creation = DatabaseCreation(self)
         self.introspection = DatabaseIntrospection(self)
         self.validation = DatabaseValidation(self)
+        # The StreamingCursorWrapper whose result is still being read.
+        self.pending_result = None
 
     def get_connection_params(self):
         kwargs = {
@@ -260,6 +379,9 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         # We need the number of potentially affected rows after an
         # "UPDATE", not the number of changed rows.
         kwargs['client_flag'] = CLIENT.FOUND_ROWS
+        # bulk_insert_rows() relies on LOAD DATA LOCAL INFILE; it can be
+        # turned off with the 'local_infile' option.
+        kwargs['local_infile'] = True
         kwargs.update(settings_dict['OPTIONS'])
         return kwargs
 
@@ -278,10 +400,27 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                 # with SQL standards.
                 cursor.execute('SET SQL_AUTO_IS_NULL = 0')
 
+    def check_no_pending_result(self):
+        if self.pending_result is not None:
+            raise utils.ProgrammingError(
+                "The result of a streaming cursor on the '%s' connection "
+                "hasn't been read to the end. Fetch its remaining rows or "
+                "close it before running another query." % self.alias)
+
     def create_cursor(self):
+        self.check_no_pending_result()
         cursor = self.connection.cursor()
         return CursorWrapper(cursor)
 
+    def create_streaming_cursor(self):
+        self.check_no_pending_result()
+        cursor = self.connection.cursor(SSCursor)
+        return StreamingCursorWrapper(cursor, self)
+
+    def _close(self):
+        self.pending_result = None
+        return BaseDatabaseWrapper._close(self)
+
     def _rollback(self):
         try:
             BaseDatabaseWrapper._rollback(self)
@@ -292,6 +431,25 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         with self.wrap_database_errors:
             self.connection.autocommit(autocommit)
 
+    def _start_synchronized_snapshot(self, connections):
+        """
+        Starts every transaction WITH CONSISTENT SNAPSHOT under a global read
+        lock, like mysqldump --single-transaction does, so that no write
+        commits between them. The lock is released as soon as they've all
+        started. Only InnoDB tables are read consistently.
+        """
+        with self.cursor() as cursor:
+            cursor.execute('FLUSH TABLES WITH READ LOCK')
+            try:
+                for connection in connections + [self]:
+                    with connection.cursor() as snapshot_cursor:
+                        snapshot_cursor.execute(
+                            'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                        snapshot_cursor.execute(
+                            'START TRANSACTION WITH CONSISTENT SNAPSHOT')
+            finally:
+                cursor.execute('UNLOCK TABLES')
+
     def disable_constraint_checking(self):
         """
         Disables foreign key checks, primarily for use in adding rows with forward references. Always returns True,
@@ -354,6 +512,106 @@ class DatabaseWrapper(BaseDatabaseWrapper):
                                                       1],
                                                   referenced_table_name, referenced_column_name))
 
+    def reset_sequences(self, style, model_list):
+        """
+        Moves the AUTO_INCREMENT counter of the given models' tables past
+        their largest primary key.
+
+        One query reads every table's counter from information_schema along
+        with its largest key; only the tables whose counter is behind are
+        altered, which is rarely any since InnoDB moves it on explicit keys.
+        """
+        columns = self.ops.sequence_reset_columns(model_list)
+        if not columns:
+            return
+        qn = self.ops.quote_name
+        sql = ' UNION ALL '.join(
+            'SELECT %%s, (SELECT MAX(%s) FROM %s), ('
+            'SELECT auto_increment FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %%s)'
+            % (qn(column), qn(table)) for table, column in columns)
+        params = []
+        for table, column in columns:
+            params.extend([table, table])
+        with self.cursor() as cursor:
+            cursor.execute(sql, params)
+            # A stale (lower) counter in information_schema only costs an
+            # ALTER that wasn't needed; it doesn't rebuild the table.
+            behind = [(table, max_key) for table, max_key, counter
+                      in cursor.fetchall()
+                      if max_key is not None and
+                      (counter is None or counter <= max_key)]
+
+        def alter():
+            with self.cursor() as cursor:
+                for table, max_key in behind:
+                    cursor.execute('%s %s %s = %d' % (
+                        style.SQL_KEYWORD('ALTER TABLE'),
+                        style.SQL_TABLE(qn(table)),
+                        style.SQL_KEYWORD('AUTO_INCREMENT'),
+                        max_key + 1))
+
+        # ALTER TABLE implicitly commits: wait for the load's own commit.
+        if behind:
+            self.on_commit(alter)
+
+    @cached_property
+    def max_statement_bytes(self):
+        """
+        The server's max_allowed_packet, which bounds every statement.
+        """
+        with self.cursor() as cursor:
+            cursor.execute('SELECT @@max_allowed_packet')
+            return cursor.fetchone()[0]
+
+    def bulk_insert_rows(self, table, columns, rows):
+        """
+        Loads `rows` into `table` through LOAD DATA LOCAL INFILE and returns
+        the number of rows written.
+
+        Rows are spooled to a temporary file at most LOAD_DATA_CHUNK_ROWS at
+        a time, so arbitrarily long iterators never need more than one chunk
+        of disk space.
+
+        LOAD DATA LOCAL behaves like LOAD DATA IGNORE: duplicate keys and
+        invalid values only raise warnings, and the offending rows are
+        skipped or altered. Rather than lose them silently, an
+        IntegrityError (for duplicate keys) or a DataError is raised if
+        fewer rows than were sent are loaded or if there are any warnings.
+        """
+        if not self.settings_dict['OPTIONS'].get('local_infile', True):
+            return super(DatabaseWrapper, self).bulk_insert_rows(
+                table, columns, rows)
+        sql = self.ops.load_data_sql(table, columns)
+        rows = iter(rows)
+        count = 0
+        while True:
+            with NamedTemporaryFile(suffix='.tsv') as spool:
+                written = write_rows(spool, rows, LOAD_DATA_CHUNK_ROWS)
+                if written:
+                    spool.flush()
+                    with self.cursor() as cursor:
+                        cursor.execute(sql, [spool.name])
+                        check_load_data(cursor,
+                                        self.connection.warning_count(),
+                                        table, written)
+            count += written
+            if written < LOAD_DATA_CHUNK_ROWS:
+                return count
+
+    def bulk_upsert_rows(self, table, columns, rows, key_columns):
+        """
+        Writes `rows` with INSERT ... ON DUPLICATE KEY UPDATE. MySQLdb turns
+        executemany() into multi-row INSERT statements.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.cursor() as cursor:
+            cursor.executemany(
+                self.ops.upsert_sql(table, columns, key_columns), rows)
+        return len(rows)
+
     def is_usable(self):
         try:
             self.connection.ping()
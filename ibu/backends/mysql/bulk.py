@@ -0,0 +1,118 @@
+"""
+Encoders for MySQL's LOAD DATA LOCAL INFILE.
+
+Rows are written with the statement's default field and line handling: tab
+separated fields, newline terminated lines, backslash escapes and \\N for
+NULL. Every value is sent as raw bytes (CHARACTER SET binary), so text is
+encoded as UTF-8 here and LONGBLOB data passes through untouched.
+
+http://dev.mysql.com/doc/refman/5.7/en/load-data.html
+"""
+from __future__ import unicode_literals
+
+import datetime
+import json
+import re
+from itertools import islice
+
+import six
+from ibu import connection as utils
+
+NULL = b'\\N'
+
+# Warnings quoted in the error raised when LOAD DATA skips or alters rows.
+LOAD_DATA_WARNINGS = 10
+
+# MySQL's error code for duplicate keys.
+ER_DUP_ENTRY = 1062
+
+_escapes = {
+    b'\\': b'\\\\',
+    b'\t': b'\\t',
+    b'\n': b'\\n',
+    b'\r': b'\\r',
+    b'\x00': b'\\0',
+    b'\x1a': b'\\Z',
+}
+_escape_re = re.compile(b'[\\\\\t\n\r\x00\x1a]')
+
+
+def _escape(data):
+    return _escape_re.sub(lambda m: _escapes[m.group()], data)
+
+
+def _format_timedelta(value):
+    # TIME columns accept [-]HHH:MM:SS[.ffffff].
+    sign = '-' if value < datetime.timedelta(0) else ''
+    value = abs(value)
+    hours, remainder = divmod(value.days * 86400 + value.seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return '%s%02d:%02d:%02d.%06d' % (sign, hours, minutes, seconds,
+                                      value.microseconds)
+
+
+def encode_value(value):
+    """
+    Returns `value` as the bytes of one LOAD DATA field.
+    """
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return b'1' if value else b'0'
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, (bytes, bytearray)):
+        return _escape(bytes(value))
+    if isinstance(value, datetime.datetime):
+        # MySQL doesn't store time zones; aware values are stored as UTC.
+        if value.tzinfo is not None:
+            value = (value - value.utcoffset()).replace(tzinfo=None)
+        return value.isoformat(str(' ')).encode('ascii')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat().encode('ascii')
+    if isinstance(value, datetime.timedelta):
+        return _format_timedelta(value).encode('ascii')
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return _escape(six.text_type(value).encode('utf-8'))
+
+
+def encode_row(row):
+    """
+    Returns `row` as one line of LOAD DATA input.
+    """
+    return b'\t'.join(encode_value(value) for value in row) + b'\n'
+
+
+def write_rows(fileobj, rows, limit):
+    """
+    Writes at most `limit` rows taken from the iterator `rows` to `fileobj`
+    and returns the number of rows written.
+    """
+    count = 0
+    for row in islice(rows, limit):
+        fileobj.write(encode_row(row))
+        count += 1
+    return count
+
+
+def check_load_data(cursor, warning_count, table, sent):
+    """
+    Raises if the LOAD DATA statement just run on `cursor`, which raised
+    `warning_count` warnings, loaded fewer than `sent` rows into `table`,
+    or raised warnings: an IntegrityError for duplicate keys, a DataError
+    otherwise.
+    """
+    loaded = cursor.rowcount
+    if loaded == sent and not warning_count:
+        return
+    cursor.execute('SHOW WARNINGS LIMIT %d' % LOAD_DATA_WARNINGS)
+    load_warnings = cursor.fetchall()
+    error_class = utils.DataError
+    if any(code == ER_DUP_ENTRY for _, code, _ in load_warnings):
+        error_class = utils.IntegrityError
+    raise error_class(
+        "LOAD DATA loaded %d of %d row(s) into '%s': %s" % (
+            loaded, sent, table,
+            '; '.join(message for _, _, message in load_warnings) or
+            'no warnings'))
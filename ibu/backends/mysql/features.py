@@ -32,6 +32,9 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     atomic_transactions = False
     supports_column_check_constraints = False
     can_clone_databases = True
+    can_synchronize_snapshots = True
+    # The most placeholders a prepared statement can have.
+    max_query_params = 65535
 
     @cached_property
     def _mysql_storage_engine(self):
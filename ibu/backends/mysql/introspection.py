@@ -1,4 +1,4 @@
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 
 from MySQLdb.constants import FIELD_TYPE
 
@@ -119,6 +119,60 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         key_columns.extend(cursor.fetchall())
         return key_columns
 
+    def get_table_row_estimate(self, cursor, table_name):
+        """
+        Returns the row count estimate of information_schema, which is exact
+        for MyISAM and sampled for InnoDB.
+        """
+        cursor.execute("""
+            SELECT table_rows
+            FROM information_schema.tables
+            WHERE table_name = %s
+                AND table_schema = DATABASE()""", [table_name])
+        row = cursor.fetchone()
+        if row is None or row[0] is None:
+            return None
+        return int(row[0])
+
+    def get_index_definitions(self, cursor, table_name):
+        """
+        Returns the definitions of the given table's secondary indexes, with
+        their column order, prefix lengths and FULLTEXT or SPATIAL type.
+
+        InnoDB needs an index on the columns of every foreign key, so indexes
+        starting with a foreign key column are left alone, as are functional
+        indexes.
+        """
+        cursor.execute("""
+            SELECT column_name
+            FROM information_schema.key_column_usage
+            WHERE table_schema = DATABASE() AND table_name = %s
+                AND referenced_table_name IS NOT NULL""", [table_name])
+        foreign_key_columns = set(row[0] for row in cursor.fetchall())
+        cursor.execute("""
+            SELECT index_name, column_name, sub_part, index_type
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s
+                AND non_unique = 1
+            ORDER BY index_name, seq_in_index""", [table_name])
+        indexes = OrderedDict()
+        for name, column, sub_part, index_type in cursor.fetchall():
+            indexes.setdefault(name, {'columns': [], 'type': index_type})
+            indexes[name]['columns'].append((column, sub_part))
+        qn = self.connection.ops.quote_name
+        definitions = OrderedDict()
+        for name, index in indexes.items():
+            columns = index['columns']
+            if any(column is None for column, _ in columns) or \
+                    columns[0][0] in foreign_key_columns:
+                continue
+            kind = index['type'] if index['type'] in ('FULLTEXT', 'SPATIAL') else ''
+            definitions[name] = 'CREATE %sINDEX %s ON %s (%s)' % (
+                kind + ' ' if kind else '', qn(name), qn(table_name),
+                ', '.join(qn(column) + ('(%d)' % sub_part if sub_part else '')
+                          for column, sub_part in columns))
+        return definitions
+
     def get_indexes(self, cursor, table_name):
         cursor.execute("SHOW INDEX FROM %s" %
                        self.connection.ops.quote_name(table_name))
@@ -165,6 +165,40 @@ class DatabaseOperations(BaseDatabaseOperations):
         values_sql = ", ".join("(%s)" % sql for sql in placeholder_rows_sql)
         return "VALUES " + values_sql
 
+    def load_data_sql(self, table, columns):
+        """
+        Returns the LOAD DATA LOCAL INFILE statement reading rows for
+        `columns` of `table` from the file named by its single parameter, in
+        the format written by ibu.backends.mysql.bulk.
+        """
+        return (
+            "LOAD DATA LOCAL INFILE %%s INTO TABLE %s CHARACTER SET binary "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' (%s)" % (
+                self.quote_name(table),
+                ', '.join(self.quote_name(column) for column in columns),
+            )
+        )
+
+    def upsert_sql(self, table, columns, key_columns):
+        """
+        Returns the INSERT ... ON DUPLICATE KEY UPDATE statement writing one
+        row of `columns` into `table`.
+        """
+        qn = self.quote_name
+        updates = ', '.join('%s = VALUES(%s)' % (qn(column), qn(column))
+                            for column in columns
+                            if column not in key_columns)
+        if not updates:
+            # Nothing to update: a no-op assignment ignores duplicates.
+            updates = '%s = %s' % (qn(key_columns[0]), qn(key_columns[0]))
+        return 'INSERT INTO %s (%s) VALUES (%s) ON DUPLICATE KEY UPDATE %s' % (
+            qn(table),
+            ', '.join(qn(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+            updates,
+        )
+
     def combine_expression(self, connector, sub_expressions):
         """
         MySQL requires special cases for ^ operators in query expressions
@@ -4,6 +4,8 @@ PostgreSQL database backend.
 Requires psycopg 2: http://initd.org/projects/psycopg2
 """
 
+import itertools
+import threading
 import warnings
 
 from ibu.config import DEFAULT_DB_ALIAS, Config
@@ -37,6 +39,10 @@ if PSYCOPG2_VERSION < (2, 4, 5):
 
 # Some of these import psycopg2, so import them after checking if it's
 # installed.
+from .bulk import (                                         # isort:skip
+    BINARY_HEADER, BINARY_TRAILER, RowStream, binary_row_encoder,
+    encode_text_row,
+)
 from .client import DatabaseClient                          # isort:skip
 from .creation import DatabaseCreation                      # isort:skip
 from .features import DatabaseFeatures                      # isort:skip
@@ -51,6 +57,14 @@ IntegrityError = Database.IntegrityError
 
 settings = Config()
 
+# Bytes requested from the row stream per COPY data message.
+COPY_BUFFER_SIZE = 64 * 1024
+
+# A snapshot can only be imported into a REPEATABLE READ (or SERIALIZABLE)
+# transaction, and must keep reading from it.
+SNAPSHOT_TRANSACTION_SQL = \
+    'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY'
+
 psycopg2.extensions.register_type(psycopg2.extensions.UNICODE)
 psycopg2.extensions.register_type(psycopg2.extensions.UNICODEARRAY)
 psycopg2.extensions.register_adapter(
@@ -155,6 +169,10 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.creation = DatabaseCreation(self)
         self.introspection = DatabaseIntrospection(self)
         self.validation = BaseDatabaseValidation(self)
+        # Row encoders for bulk_insert_rows(), keyed by table, columns and
+        # COPY format.
+        self._copy_encoders = {}
+        self._named_cursor_idx = itertools.count(1)
 
     def get_connection_params(self):
         settings_dict = self.settings_dict
@@ -168,6 +186,8 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         }
         conn_params.update(settings_dict['OPTIONS'])
         conn_params.pop('isolation_level', None)
+        conn_params.pop('copy_format', None)
+        conn_params.pop('itersize', None)
         if settings_dict['USER']:
             conn_params['user'] = settings_dict['USER']
         if settings_dict['PASSWORD']:
@@ -219,10 +239,41 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         cursor.tzinfo_factory = utc_tzinfo_factory if settings.USE_TZ else None
         return cursor
 
+    def create_streaming_cursor(self):
+        """
+        Returns a named (server-side) cursor fetching `itersize` rows per
+        round trip. It isn't declared WITH HOLD, which would make the server
+        materialize the whole result before returning the first row, so it
+        has to be used within a transaction.
+        """
+        name = '_ibu_curs_%d_%d' % (threading.current_thread().ident,
+                                    next(self._named_cursor_idx))
+        cursor = self.connection.cursor(name, scrollable=False,
+                                        withhold=False)
+        cursor.itersize = self.itersize
+        cursor.tzinfo_factory = utc_tzinfo_factory if settings.USE_TZ else None
+        return cursor
+
     def _set_autocommit(self, autocommit):
         with self.wrap_database_errors:
             self.connection.autocommit = autocommit
 
+    def _start_synchronized_snapshot(self, connections):
+        """
+        Exports the snapshot of this connection's transaction with
+        pg_export_snapshot() and imports it into the others' with SET
+        TRANSACTION SNAPSHOT. The snapshot stays importable as long as this
+        transaction is open.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(SNAPSHOT_TRANSACTION_SQL)
+            cursor.execute('SELECT pg_export_snapshot()')
+            snapshot_id = cursor.fetchone()[0]
+        for connection in connections:
+            with connection.cursor() as cursor:
+                cursor.execute(SNAPSHOT_TRANSACTION_SQL)
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot_id])
+
     def check_constraints(self, table_names=None):
         """
         To check constraints, we set constraints to immediate. Then, when, we're done we must ensure they
@@ -231,6 +282,97 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         self.cursor().execute('SET CONSTRAINTS ALL IMMEDIATE')
         self.cursor().execute('SET CONSTRAINTS ALL DEFERRED')
 
+    def reset_sequences(self, style, model_list):
+        """
+        Sends every setval() of ops.sequence_reset_sql() in one
+        multi-statement query: a single round trip however many tables were
+        loaded.
+        """
+        sql = self.ops.sequence_reset_sql(style, model_list)
+        if sql:
+            with self.cursor() as cursor:
+                cursor.execute('\n'.join(sql))
+
+    @cached_property
+    def itersize(self):
+        """
+        Rows fetched per round trip by streaming cursors, set through the
+        'itersize' database option.
+        """
+        return self.settings_dict['OPTIONS'].get('itersize', 2000)
+
+    @cached_property
+    def copy_format(self):
+        """
+        Default COPY format used by bulk_insert_rows(), set through the
+        'copy_format' database option.
+        """
+        return self.settings_dict['OPTIONS'].get('copy_format', 'text')
+
+    def copy_row_encoder(self, table, columns, copy_format):
+        """
+        Returns (encode_row, header, trailer) for COPY into `columns` of
+        `table`. Binary COPY falls back to text when a column type has no
+        binary encoder.
+        """
+        if copy_format == 'binary':
+            with self.cursor() as cursor:
+                type_codes = dict(
+                    (info.name, info.type_code) for info in
+                    self.introspection.get_table_description(cursor, table))
+            encode_row = binary_row_encoder(
+                [type_codes[column] for column in columns])
+            if encode_row is not None:
+                return encode_row, BINARY_HEADER, BINARY_TRAILER
+        return encode_text_row, b'', b''
+
+    def bulk_insert_rows(self, table, columns, rows, copy_format=None):
+        """
+        Streams `rows` into `table` through COPY ... FROM STDIN, encoding
+        them as they are read, and returns the number of rows written.
+        """
+        copy_format = copy_format or self.copy_format
+        key = (table, tuple(columns), copy_format)
+        try:
+            encoder = self._copy_encoders[key]
+        except KeyError:
+            encoder = self._copy_encoders[key] = self.copy_row_encoder(
+                table, columns, copy_format)
+        encode_row, header, trailer = encoder
+        # Only binary data carries a header.
+        copy_format = 'binary' if header else 'text'
+        stream = RowStream(rows, encode_row, header, trailer)
+        with self.cursor() as cursor:
+            with self.wrap_database_errors:
+                cursor.copy_expert(
+                    self.ops.copy_from_sql(table, columns, copy_format),
+                    stream, size=COPY_BUFFER_SIZE)
+        return stream.row_count
+
+    def bulk_upsert_rows(self, table, columns, rows, key_columns):
+        """
+        COPYs `rows` into a temporary table and merges it into `table` with
+        INSERT ... ON CONFLICT DO UPDATE.
+        """
+        if self.pg_version < 90500:
+            return super(DatabaseWrapper, self).bulk_upsert_rows(
+                table, columns, rows, key_columns)
+        qn = self.ops.quote_name
+        staging = 'ibu_upsert_%s' % table
+        with self.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS %s' % qn(staging))
+            cursor.execute(
+                'CREATE TEMPORARY TABLE %s AS SELECT %s FROM %s WITH NO DATA'
+                % (qn(staging), ', '.join(qn(column) for column in columns),
+                   qn(table)))
+        count = self.bulk_insert_rows(staging, columns, rows)
+        with self.cursor() as cursor:
+            if count:
+                cursor.execute(self.ops.upsert_from_sql(
+                    table, staging, columns, key_columns))
+            cursor.execute('DROP TABLE %s' % qn(staging))
+        return count
+
     def is_usable(self):
         try:
             # Use a psycopg cursor directly, bypassing Ibu's utilities.
@@ -0,0 +1,247 @@
+"""
+Encoders for PostgreSQL's COPY ... FROM STDIN, in text and binary formats.
+
+http://www.postgresql.org/docs/current/static/sql-copy.html#AEN77663
+"""
+from __future__ import unicode_literals
+
+import binascii
+import datetime
+import decimal
+import json
+import re
+import struct
+import uuid
+
+import six
+
+# Binary COPY header: signature, flags field, header extension length.
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+BINARY_TRAILER = struct.pack('!h', -1)
+
+TEXT_NULL = b'\\N'
+
+_text_escapes = {'\\': '\\\\', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_text_escape_re = re.compile(r'[\\\n\r\t]')
+
+# PostgreSQL stores dates and times relative to 2000-01-01.
+PG_EPOCH_DATE = datetime.date(2000, 1, 1)
+PG_EPOCH = datetime.datetime(2000, 1, 1)
+
+_int2 = struct.Struct('!h')
+_int4 = struct.Struct('!i')
+_int8 = struct.Struct('!q')
+_float4 = struct.Struct('!f')
+_float8 = struct.Struct('!d')
+_numeric_header = struct.Struct('!hhHh')
+_interval = struct.Struct('!qii')
+
+NUMERIC_POS = 0x0000
+NUMERIC_NEG = 0x4000
+NUMERIC_NAN = 0xC000
+
+
+def _escape_text(value):
+    return _text_escape_re.sub(lambda m: _text_escapes[m.group()], value)
+
+
+def encode_text_value(value):
+    """
+    Returns `value` as the bytes of one field of a text-format COPY row.
+    """
+    if value is None:
+        return TEXT_NULL
+    if isinstance(value, bool):
+        return b't' if value else b'f'
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, (bytes, bytearray)):
+        # bytea hex input; the backslash itself must be escaped for COPY.
+        return b'\\\\x' + binascii.hexlify(bytes(value))
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat().encode('ascii')
+    if isinstance(value, datetime.timedelta):
+        return ('%d days %d seconds %d microseconds' % (
+            value.days, value.seconds, value.microseconds)).encode('ascii')
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return _escape_text(six.text_type(value)).encode('utf-8')
+
+
+def encode_text_row(row):
+    """
+    Returns `row` as one line of text-format COPY data.
+    """
+    return b'\t'.join(encode_text_value(value) for value in row) + b'\n'
+
+
+def _encode_numeric(value):
+    value = decimal.Decimal(value)
+    if value.is_nan():
+        return _numeric_header.pack(0, 0, NUMERIC_NAN, 0)
+    if value.is_infinite():
+        raise ValueError("Binary COPY can't encode an infinite numeric.")
+    sign, digits, exponent = value.as_tuple()
+    dscale = max(0, -exponent)
+    digits = ''.join(six.text_type(digit) for digit in digits)
+    # Align the decimal point on a base-10000 digit boundary.
+    shift = exponent % 4
+    digits += '0' * shift
+    exponent -= shift
+    digits = '0' * (-len(digits) % 4) + digits
+    groups = [int(digits[i:i + 4]) for i in range(0, len(digits), 4)]
+    weight = len(groups) + exponent // 4 - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+    return (
+        _numeric_header.pack(len(groups), weight,
+                             NUMERIC_NEG if sign else NUMERIC_POS, dscale) +
+        struct.pack('!%dH' % len(groups), *groups)
+    )
+
+
+def _encode_text(value):
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return six.text_type(value).encode('utf-8')
+
+
+def _encode_bytea(value):
+    if isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    return bytes(value)
+
+
+def _micros(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _encode_timestamp(value):
+    if value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return _int8.pack(_micros(value - PG_EPOCH))
+
+
+def _encode_date(value):
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return _int4.pack((value - PG_EPOCH_DATE).days)
+
+
+def _encode_time(value):
+    return _int8.pack(((value.hour * 60 + value.minute) * 60 +
+                       value.second) * 1000000 + value.microsecond)
+
+
+def _encode_interval(value):
+    return _interval.pack(value.seconds * 1000000 + value.microseconds,
+                          value.days, 0)
+
+
+def _encode_uuid(value):
+    if not isinstance(value, uuid.UUID):
+        value = uuid.UUID(value) if isinstance(value, six.string_types) \
+            else uuid.UUID(bytes=bytes(value))
+    return value.bytes
+
+
+def _encode_bool(value):
+    return b'\x01' if value else b'\x00'
+
+
+# Maps column type OIDs (as found in cursor.description) to functions
+# returning a value's binary COPY representation.
+binary_encoders = {
+    16: _encode_bool,
+    17: _encode_bytea,
+    19: _encode_text,                               # name
+    20: lambda value: _int8.pack(int(value)),
+    21: lambda value: _int2.pack(int(value)),
+    23: lambda value: _int4.pack(int(value)),
+    25: _encode_text,
+    26: lambda value: struct.pack('!I', int(value)),  # oid
+    114: _encode_text,                              # json
+    700: lambda value: _float4.pack(float(value)),
+    701: lambda value: _float8.pack(float(value)),
+    1042: _encode_text,
+    1043: _encode_text,
+    1082: _encode_date,
+    1083: _encode_time,
+    1114: _encode_timestamp,
+    1184: _encode_timestamp,
+    1186: _encode_interval,
+    1700: _encode_numeric,
+    2950: _encode_uuid,
+    3802: lambda value: b'\x01' + _encode_text(value),  # jsonb, version 1
+}
+
+
+def binary_row_encoder(type_codes):
+    """
+    Returns a function encoding a row whose columns have the given type OIDs
+    as one binary-format COPY tuple, or None if one of the types has no
+    binary encoder.
+    """
+    try:
+        encoders = [binary_encoders[type_code] for type_code in type_codes]
+    except KeyError:
+        return None
+    field_count = _int2.pack(len(encoders))
+    pack_length = _int4.pack
+    null = _int4.pack(-1)
+
+    def encode_row(row):
+        parts = [field_count]
+        for encode, value in zip(encoders, row):
+            if value is None:
+                parts.append(null)
+            else:
+                data = encode(value)
+                parts.append(pack_length(len(data)))
+                parts.append(data)
+        return b''.join(parts)
+    return encode_row
+
+
+class RowStream(object):
+    """
+    A read-only file-like object producing COPY data on demand from an
+    iterable of row tuples, suitable for cursor.copy_expert().
+    """
+
+    def __init__(self, rows, encode_row, header=b'', trailer=b''):
+        self.rows = iter(rows)
+        self.encode_row = encode_row
+        self.buffer = header
+        self.trailer = trailer
+        self.exhausted = False
+        self.row_count = 0
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        while (size is None or size < 0 or length < size) and \
+                not self.exhausted:
+            try:
+                row = next(self.rows)
+            except StopIteration:
+                self.exhausted = True
+                chunks.append(self.trailer)
+                break
+            data = self.encode_row(row)
+            chunks.append(data)
+            length += len(data)
+            self.row_count += 1
+        data = b''.join(chunks)
+        if size is None or size < 0:
+            self.buffer = b''
+            return data
+        self.buffer = data[size:]
+        return data[:size]
@@ -29,3 +29,7 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     requires_sqlparse_for_splitting = False
     greatest_least_ignores_nulls = True
     can_clone_databases = True
+    can_synchronize_snapshots = True
+    can_defer_foreign_key_validation = True
+    # The wire protocol sends the number of bind parameters as an int16.
+    max_query_params = 65535
@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 
 from ibu.backends.base.introspection import (
     BaseDatabaseIntrospection, FieldInfo, TableInfo,
@@ -81,7 +81,7 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                        self.connection.ops.quote_name(table_name))
         return [FieldInfo(*((line[0],) + line[1:6]
                           + (field_map[line[0]][0] == 'YES',
-                             field_map[line[0]®][1])))
+                             field_map[line[0]][1])))
                 for line in cursor.description]
 
     def get_relations(self, cursor, table_name):
@@ -120,6 +120,69 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         key_columns.extend(cursor.fetchall())
         return key_columns
 
+    def get_table_row_estimate(self, cursor, table_name):
+        """
+        Returns the planner's row estimate for the given table, as of its last
+        VACUUM or ANALYZE.
+        """
+        cursor.execute("""
+            SELECT c.reltuples
+            FROM pg_catalog.pg_class c
+            WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)""", [table_name])
+        row = cursor.fetchone()
+        # reltuples is -1 (0 before PostgreSQL 14) for never analyzed tables.
+        if row is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+    def get_index_definitions(self, cursor, table_name):
+        """
+        Returns the pg_get_indexdef() definitions of the given table's
+        secondary indexes, which keep their method, expressions, predicate
+        and storage parameters.
+        """
+        cursor.execute("""
+            SELECT c2.relname, pg_catalog.pg_get_indexdef(idx.indexrelid)
+            FROM pg_catalog.pg_index idx
+            JOIN pg_catalog.pg_class c ON c.oid = idx.indrelid
+            JOIN pg_catalog.pg_class c2 ON c2.oid = idx.indexrelid
+            WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)
+                AND NOT idx.indisprimary AND NOT idx.indisunique
+                AND NOT EXISTS (
+                    SELECT 1 FROM pg_catalog.pg_constraint con
+                    WHERE con.conindid = idx.indexrelid)
+            ORDER BY c2.relname""", [table_name])
+        return OrderedDict(cursor.fetchall())
+
+    def get_foreign_key_definitions(self, cursor, table_name):
+        """
+        Returns the pg_get_constraintdef() definitions of the given table's
+        foreign keys, less their NOT VALID marker.
+        """
+        cursor.execute("""
+            SELECT con.conname, pg_catalog.pg_get_constraintdef(con.oid)
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_class c ON c.oid = con.conrelid
+            WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)
+                AND con.contype = 'f'
+            ORDER BY con.conname""", [table_name])
+        definitions = OrderedDict()
+        for name, definition in cursor.fetchall():
+            if definition.endswith(' NOT VALID'):
+                definition = definition[:-len(' NOT VALID')]
+            definitions[name] = definition
+        return definitions
+
+    def get_unvalidated_foreign_keys(self, cursor, table_name):
+        cursor.execute("""
+            SELECT con.conname
+            FROM pg_catalog.pg_constraint con
+            JOIN pg_catalog.pg_class c ON c.oid = con.conrelid
+            WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)
+                AND con.contype = 'f' AND NOT con.convalidated
+            ORDER BY con.conname""", [table_name])
+        return [row[0] for row in cursor.fetchall()]
+
     def get_indexes(self, cursor, table_name):
         # This query retrieves each index on the given table, including the
         # first associated field name
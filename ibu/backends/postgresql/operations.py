@@ -148,49 +148,27 @@ class DatabaseOperations(BaseDatabaseOperations):
             return "TABLESPACE %s" % self.quote_name(tablespace)
 
     def sequence_reset_sql(self, style, model_list):
-        from django.db import models
         output = []
         qn = self.quote_name
-        for model in model_list:
-            # Use `coalesce` to set the sequence for each model to the max pk value if there are records,
-            # or 1 if there are none. Set the `is_called` property (the third argument to `setval`) to true
-            # if there are records (as the max pk value is already in use), otherwise set it to false.
-            # Use pg_get_serial_sequence to get the underlying sequence name from the table name
-            # and column name (available since PostgreSQL 8)
-
-            for f in model._meta.local_fields:
-                if isinstance(f, models.AutoField):
-                    output.append(
-                        "%s setval(pg_get_serial_sequence('%s','%s'), "
-                        "coalesce(max(%s), 1), max(%s) %s null) %s %s;" % (
-                            style.SQL_KEYWORD('SELECT'),
-                            style.SQL_TABLE(qn(model._meta.db_table)),
-                            style.SQL_FIELD(f.column),
-                            style.SQL_FIELD(qn(f.column)),
-                            style.SQL_FIELD(qn(f.column)),
-                            style.SQL_KEYWORD('IS NOT'),
-                            style.SQL_KEYWORD('FROM'),
-                            style.SQL_TABLE(qn(model._meta.db_table)),
-                        )
-                    )
-                    # Only one AutoField is allowed per model, so don't bother
-                    # continuing.
-                    break
-            for f in model._meta.many_to_many:
-                if not f.remote_field.through:
-                    output.append(
-                        "%s setval(pg_get_serial_sequence('%s','%s'), "
-                        "coalesce(max(%s), 1), max(%s) %s null) %s %s;" % (
-                            style.SQL_KEYWORD('SELECT'),
-                            style.SQL_TABLE(qn(f.m2m_db_table())),
-                            style.SQL_FIELD('id'),
-                            style.SQL_FIELD(qn('id')),
-                            style.SQL_FIELD(qn('id')),
-                            style.SQL_KEYWORD('IS NOT'),
-                            style.SQL_KEYWORD('FROM'),
-                            style.SQL_TABLE(qn(f.m2m_db_table()))
-                        )
-                    )
+        # Use `coalesce` to set the sequence for each table to the max pk value if there are records,
+        # or 1 if there are none. Set the `is_called` property (the third argument to `setval`) to true
+        # if there are records (as the max pk value is already in use), otherwise set it to false.
+        # Use pg_get_serial_sequence to get the underlying sequence name from the table name
+        # and column name (available since PostgreSQL 8)
+        for table, column in self.sequence_reset_columns(model_list):
+            output.append(
+                "%s setval(pg_get_serial_sequence('%s','%s'), "
+                "coalesce(max(%s), 1), max(%s) %s null) %s %s;" % (
+                    style.SQL_KEYWORD('SELECT'),
+                    style.SQL_TABLE(qn(table)),
+                    style.SQL_FIELD(column),
+                    style.SQL_FIELD(qn(column)),
+                    style.SQL_FIELD(qn(column)),
+                    style.SQL_KEYWORD('IS NOT'),
+                    style.SQL_KEYWORD('FROM'),
+                    style.SQL_TABLE(qn(table)),
+                )
+            )
         return output
 
     def prep_for_iexact_query(self, x):
@@ -226,6 +204,43 @@ class DatabaseOperations(BaseDatabaseOperations):
     def return_insert_id(self):
         return "RETURNING %s", ()
 
+    def copy_from_sql(self, table, columns, copy_format='text'):
+        """
+        Returns the COPY statement that streams rows for `columns` of `table`
+        from the client in the given format ('text' or 'binary').
+        """
+        return 'COPY %s (%s) FROM STDIN WITH (FORMAT %s)' % (
+            self.quote_name(table),
+            ', '.join(self.quote_name(column) for column in columns),
+            copy_format,
+        )
+
+    def upsert_from_sql(self, table, source, columns, key_columns):
+        """
+        Returns the statement inserting `columns` of every row of the table
+        `source` into `table`, updating the rows whose `key_columns` already
+        exist (PostgreSQL 9.5+).
+        """
+        qn = self.quote_name
+        column_list = ', '.join(qn(column) for column in columns)
+        updates = ', '.join('%s = EXCLUDED.%s' % (qn(column), qn(column))
+                            for column in columns
+                            if column not in key_columns)
+        return 'INSERT INTO %s (%s) SELECT %s FROM %s ON CONFLICT (%s) %s' % (
+            qn(table), column_list, column_list, qn(source),
+            ', '.join(qn(column) for column in key_columns),
+            'DO UPDATE SET ' + updates if updates else 'DO NOTHING',
+        )
+
+    def key_sample_sql(self, table, column, fraction):
+        if self.connection.pg_version < 90500:
+            return super(DatabaseOperations, self).key_sample_sql(
+                table, column, fraction)
+        # Block sampling only reads the sampled pages.
+        return 'SELECT %s FROM %s TABLESAMPLE SYSTEM (%%s)' % (
+            self.quote_name(column), self.quote_name(table),
+        ), [fraction * 100]
+
     def bulk_insert_sql(self, fields, placeholder_rows):
         placeholder_rows_sql = (", ".join(row) for row in placeholder_rows)
         values_sql = ", ".join("(%s)" % sql for sql in placeholder_rows_sql)
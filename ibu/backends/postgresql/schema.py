@@ -11,9 +11,37 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
     sql_delete_sequence = "DROP SEQUENCE IF EXISTS %(sequence)s CASCADE"
     sql_set_sequence_max = "SELECT setval('%(sequence)s', MAX(%(column)s)) FROM %(table)s"
 
+    sql_create_fk_not_valid = BaseDatabaseSchemaEditor.sql_create_fk + " NOT VALID"
+    sql_create_fk_definition = "ALTER TABLE %(table)s ADD CONSTRAINT %(name)s %(definition)s"
+    sql_create_fk_definition_not_valid = sql_create_fk_definition + " NOT VALID"
+    sql_validate_fk = "ALTER TABLE %(table)s VALIDATE CONSTRAINT %(name)s"
+
     sql_create_varchar_index = "CREATE INDEX %(name)s ON %(table)s (%(columns)s varchar_pattern_ops)%(extra)s"
     sql_create_text_index = "CREATE INDEX %(name)s ON %(table)s (%(columns)s text_pattern_ops)%(extra)s"
 
+    def __init__(self, connection, collect_sql=False, atomic=True, validate_foreign_keys=True):
+        """
+        With validate_foreign_keys=False, foreign keys are created NOT VALID:
+        adding them doesn't scan the existing rows. They're checked later by
+        integrity.validate_constraints(), outside the transaction creating
+        them and with a SHARE UPDATE EXCLUSIVE lock only.
+        """
+        super(DatabaseSchemaEditor, self).__init__(connection, collect_sql, atomic)
+        if not validate_foreign_keys:
+            self.sql_create_fk = self.sql_create_fk_not_valid
+            self.sql_create_fk_definition = self.sql_create_fk_definition_not_valid
+
+    def add_foreign_key_definition(self, table, name, definition):
+        """
+        Adds the foreign key `name` to `table` from its introspected
+        `definition` (see DatabaseIntrospection.get_foreign_key_definitions()).
+        """
+        self.execute(self.sql_create_fk_definition % {
+            'table': self.quote_name(table),
+            'name': self.quote_name(name),
+            'definition': definition,
+        }, None)
+
     def quote_value(self, value):
         return psycopg2.extensions.adapt(value)
 
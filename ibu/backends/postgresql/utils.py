@@ -0,0 +1,30 @@
+import datetime
+
+ZERO = datetime.timedelta(0)
+
+
+class UTC(datetime.tzinfo):
+    """
+    UTC implementation, for the datetimes read by psycopg2.
+    """
+
+    def __repr__(self):
+        return "<UTC>"
+
+    def utcoffset(self, dt):
+        return ZERO
+
+    def tzname(self, dt):
+        return "UTC"
+
+    def dst(self, dt):
+        return ZERO
+
+
+utc = UTC()
+
+
+def utc_tzinfo_factory(offset):
+    if offset != 0:
+        raise AssertionError("database connection isn't set to UTC")
+    return utc
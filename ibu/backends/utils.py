@@ -118,8 +118,10 @@ class CursorDebugWrapper(CursorWrapper):
 ###############################################
 
 def typecast_date(s):
-    # returns None if s is null
-    return datetime.date(*map(int, s.split('-'))) if s else None
+    # returns None if s is null, or MySQL's zero date, like MySQLdb
+    if not s or s.startswith('0000-00-00'):
+        return None
+    return datetime.date(*map(int, s.split('-')))
 
 
 def typecast_time(s):  # does NOT store time zone information
@@ -137,7 +139,7 @@ def typecast_time(s):  # does NOT store time zone information
 def typecast_timestamp(s):  # does NOT store time zone information
     # "2005-07-29 15:48:00.590358-05"
     # "2005-07-29 09:56:00-05"
-    if not s:
+    if not s or s.startswith('0000-00-00'):
         return None
     if ' ' not in s:
         return typecast_date(s)
@@ -162,7 +164,7 @@ def typecast_timestamp(s):  # does NOT store time zone information
 
     return datetime.datetime(int(dates[0]), int(dates[1]), int(dates[2]),
                              int(times[0]), int(times[1]), int(seconds),
-                             int((microseconds + '000000')[:6]), 'UTC')
+                             int((microseconds + '000000')[:6]))
 
 
 def typecast_decimal(s):
@@ -171,6 +173,121 @@ def typecast_decimal(s):
     return decimal.Decimal(s)
 
 
+######################################################
+# Batch converters from database (string) to Python #
+######################################################
+
+# Each converter takes a whole column of a fetched batch and returns the
+# list of its converted values, like mapping the matching typecast_*()
+# function over it. The common ISO 8601 forms are parsed by the
+# fromisoformat() constructors (Python 3.7+), in C; a column they reject
+# is converted again by the typecast function.
+HAS_FROMISOFORMAT = hasattr(datetime.datetime, 'fromisoformat')
+
+
+def _text_values(values):
+    """
+    Returns `values` as text. Drivers hand columns they have no converter
+    for over as bytes.
+    """
+    for value in values:
+        if value is not None:
+            if isinstance(value, bytes):
+                return [None if value is None else value.decode('ascii')
+                        for value in values]
+            break
+    return values
+
+
+def typecast_dates(values):
+    values = _text_values(values)
+    if HAS_FROMISOFORMAT:
+        parse = datetime.date.fromisoformat
+        try:
+            return [parse(value) if value else None for value in values]
+        except ValueError:
+            pass
+    return [typecast_date(value) for value in values]
+
+
+def typecast_times(values):
+    values = _text_values(values)
+    if HAS_FROMISOFORMAT:
+        parse = datetime.time.fromisoformat
+        try:
+            return [parse(value) if value else None for value in values]
+        except ValueError:
+            pass
+    return [typecast_time(value) for value in values]
+
+
+def typecast_timestamps(values):
+    values = _text_values(values)
+    if HAS_FROMISOFORMAT:
+        parse, parse_date = datetime.datetime.fromisoformat, datetime.date.fromisoformat
+        try:
+            return [
+                None if not value else
+                parse(value).replace(tzinfo=None) if ' ' in value else
+                parse_date(value)
+                for value in values
+            ]
+        except ValueError:
+            pass
+    return [typecast_timestamp(value) for value in values]
+
+
+def typecast_decimals(values):
+    make_decimal = decimal.Decimal
+    return [make_decimal(value) if value else None
+            for value in _text_values(values)]
+
+
+BATCH_TYPECASTS = {
+    typecast_date: typecast_dates,
+    typecast_time: typecast_times,
+    typecast_timestamp: typecast_timestamps,
+    typecast_decimal: typecast_decimals,
+}
+
+
+def batch_typecast(typecast):
+    """
+    Returns the batch converter equivalent to the function `typecast`.
+    """
+    try:
+        return BATCH_TYPECASTS[typecast]
+    except KeyError:
+        return lambda values: [typecast(value) for value in values]
+
+
+class RowConverter(object):
+    """
+    Converts fetched rows column by column. The converters are compiled
+    once for a result's cursor `description`, from `typecasts`, a dict
+    mapping type codes to typecast functions; the other columns are passed
+    through untouched.
+    """
+
+    def __init__(self, description, typecasts):
+        self.converters = [
+            (position, batch_typecast(typecasts[column[1]]))
+            for position, column in enumerate(description or ())
+            if column[1] in typecasts
+        ]
+
+    def __call__(self, rows):
+        """
+        Returns the list of row tuples `rows`, converted.
+        """
+        if not self.converters or not rows:
+            return rows
+        columns = list(zip(*rows))
+        for position, convert in self.converters:
+            columns[position] = convert(columns[position])
+        return list(zip(*columns))
+
+
 ###############################################
 # Converters from Python to database (string) #
 ###############################################
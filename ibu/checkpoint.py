@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+A local checkpoint journal that lets interrupted copies and loads resume.
+
+The journal is an append-only file of JSON lines. Every entry is flushed and
+fsynced before the call recording it returns, so after a crash the journal
+reflects all the work that was known to be committed. A torn last line (the
+process died mid-write) is ignored when the journal is read back.
+
+Work items are identified by string keys. The protocol around each item is:
+
+    1. ``journal.start(key)`` before the item's destination transaction
+       begins;
+    2. ``journal.finish(key, ...)`` once that transaction is committed.
+
+An item that was started but not finished may or may not have been
+committed, so on resume it has to be cleared before it's redone.
+
+Incremental copies also keep, per table, the high watermark reached by the
+last committed sync in a small JSON state file (see Watermarks), and copies
+that rebuild indexes keep the definitions of the indexes they dropped until
+they're recreated (see IndexDefinitions); likewise for the foreign keys
+of copies that defer their validation (see ForeignKeyDefinitions).
+"""
+from __future__ import unicode_literals
+
+import json
+import logging
+import os
+import threading
+
+import six
+
+logger = logging.getLogger('ibu.checkpoint')
+
+DEFAULT_JOURNAL = '.ibu-journal'
+DEFAULT_WATERMARKS = '.ibu-watermarks'
+DEFAULT_INDEX_DEFINITIONS = '.ibu-indexes'
+DEFAULT_FOREIGN_KEY_DEFINITIONS = '.ibu-foreign-keys'
+
+STARTED = 'started'
+FINISHED = 'finished'
+PLANNED = 'planned'
+
+
+def _default(value):
+    # Key bounds may be dates, decimals, UUIDs... The databases accept their
+    # text form back as a query parameter, which is all the journal needs.
+    return six.text_type(value)
+
+
+def _replace(path, values):
+    """
+    Replaces the JSON file at `path` with `values`, atomically and durably.
+    """
+    data = json.dumps(values, default=_default, indent=2, sort_keys=True)
+    tmp_path = '%s.tmp' % path
+    with open(tmp_path, 'wb') as f:
+        f.write(data.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_path, path)
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+class Journal(object):
+    """
+    A checkpoint journal stored at `path`.
+
+    With `resume=False`, any existing journal is discarded; otherwise its
+    entries are loaded so that finished work can be skipped.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL, resume=False):
+        self.path = path
+        self.started = set()
+        self.finished = {}
+        self.plans = {}
+        self._lock = threading.Lock()
+        if resume:
+            self.read()
+        elif os.path.exists(path):
+            os.remove(path)
+        self._file = open(path, 'ab')
+        if self._file.tell() and not self._ends_with_newline():
+            # Terminate a torn last line so it doesn't swallow the next entry.
+            self._file.write(b'\n')
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    logger.warning("Ignoring a truncated entry in %s.",
+                                   self.path)
+                    continue
+                event, key = entry.get('event'), entry.get('key')
+                if event == STARTED:
+                    self.started.add(key)
+                elif event == FINISHED:
+                    self.finished[key] = entry
+                elif event == PLANNED:
+                    self.plans[key] = entry['items']
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def write(self, entry):
+        line = json.dumps(entry, default=_default, sort_keys=True) + '\n'
+        with self._lock:
+            self._file.write(line.encode('utf-8'))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def is_finished(self, key):
+        return key in self.finished
+
+    def is_dirty(self, key):
+        """
+        Returns True if the work for `key` was started by an earlier run but
+        isn't known to have been committed.
+        """
+        return key in self.started and key not in self.finished
+
+    def plan(self, key, items):
+        """
+        Records the work `items` (a list of JSON-serializable values) decided
+        for `key`, so that a resumed run splits the work the same way.
+        """
+        self.write({'event': PLANNED, 'key': key, 'items': items})
+        self.plans[key] = json.loads(json.dumps(items, default=_default))
+
+    def start(self, key):
+        self.write({'event': STARTED, 'key': key})
+        with self._lock:
+            self.started.add(key)
+
+    def finish(self, key, **data):
+        entry = dict(data, event=FINISHED, key=key)
+        self.write(entry)
+        with self._lock:
+            self.finished[key] = entry
+
+    def close(self):
+        self._file.close()
+
+
+class Watermarks(object):
+    """
+    The high watermarks of incremental copies, stored at `path` as a JSON
+    object mapping tables to {"column": ..., "value": ...}.
+
+    The file is rewritten atomically every time a watermark advances.
+    """
+
+    def __init__(self, path=DEFAULT_WATERMARKS):
+        self.path = path
+        self.values = _load(path)
+        self._lock = threading.Lock()
+
+    def get(self, table, column):
+        """
+        Returns the watermark of `table`, or None if `table` was never synced
+        on `column`.
+        """
+        entry = self.values.get(table)
+        if entry is None or entry['column'] != column:
+            return None
+        return entry['value']
+
+    def set(self, table, column, value):
+        with self._lock:
+            self.values[table] = {'column': column, 'value': value}
+            _replace(self.path, self.values)
+
+
+class IndexDefinitions(object):
+    """
+    The definitions of the indexes dropped for a load, stored at `path` as
+    a JSON object mapping tables to {index name: CREATE INDEX statement}.
+
+    Definitions are saved before their indexes are dropped and removed once
+    they're rebuilt, so that a crash in between doesn't lose any: the next
+    run finds them here and rebuilds them.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_DEFINITIONS):
+        self.path = path
+        self.values = _load(path)
+        self._lock = threading.Lock()
+
+    def tables(self):
+        return sorted(self.values)
+
+    def get(self, table):
+        return dict(self.values.get(table) or {})
+
+    def add(self, table, definitions):
+        """
+        Saves the {name: statement} `definitions` of indexes of `table`.
+        """
+        with self._lock:
+            self.values.setdefault(table, {}).update(definitions)
+            _replace(self.path, self.values)
+
+    def remove(self, table):
+        with self._lock:
+            if self.values.pop(table, None) is not None:
+                _replace(self.path, self.values)
+
+
+class ForeignKeyDefinitions(IndexDefinitions):
+    """
+    The definitions of the foreign keys dropped for a copy, stored at `path`
+    as a JSON object mapping tables to {constraint name: definition}, until
+    they're added back.
+    """
+
+    def __init__(self, path=DEFAULT_FOREIGN_KEY_DEFINITIONS):
+        super(ForeignKeyDefinitions, self).__init__(path)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Splitting tables into primary key ranges that can be read independently.
+
+Integer keys are split arithmetically between MIN() and MAX(). Other keys
+are split on quantiles of a random sample of the key column. The first and
+last ranges are left unbounded so that together the ranges always cover the
+whole table.
+"""
+from __future__ import unicode_literals
+
+import logging
+from collections import namedtuple
+
+import six
+from six.moves import range
+
+logger = logging.getLogger('ibu.chunking')
+
+# Rows sampled per requested chunk when splitting on non-integer keys.
+SAMPLE_ROWS_PER_CHUNK = 100
+
+
+class KeyRange(namedtuple('KeyRange', 'column low high')):
+    """
+    The rows whose `column` value is >= `low` and < `high`. A bound of None
+    leaves that side of the range open.
+    """
+
+    def sql(self, quote_name):
+        """
+        Returns (sql, params) for a WHERE condition selecting this range,
+        with the column quoted by `quote_name`.
+        """
+        column = quote_name(self.column)
+        conditions, params = [], []
+        if self.low is not None:
+            conditions.append('%s >= %%s' % column)
+            params.append(self.low)
+        if self.high is not None:
+            conditions.append('%s < %%s' % column)
+            params.append(self.high)
+        return ' AND '.join(conditions), params
+
+
+def ranges_from_boundaries(column, boundaries):
+    """
+    Returns the KeyRanges delimited by the sorted `boundaries`.
+    """
+    lows = [None] + list(boundaries)
+    highs = list(boundaries) + [None]
+    return [KeyRange(column, low, high) for low, high in zip(lows, highs)]
+
+
+def split_integer_range(column, minimum, maximum, chunks):
+    """
+    Splits the integer keys from `minimum` to `maximum` into at most `chunks`
+    ranges of equal width.
+    """
+    step = max(1, -(-(maximum - minimum + 1) // chunks))
+    return ranges_from_boundaries(
+        column, range(minimum + step, maximum + 1, step))
+
+
+def quantile_boundaries(sample, chunks):
+    """
+    Returns up to `chunks - 1` distinct boundaries splitting the values of
+    `sample` into groups of roughly equal size.
+    """
+    sample = sorted(sample)
+    boundaries = []
+    for i in range(1, chunks):
+        value = sample[i * len(sample) // chunks]
+        if not boundaries or value > boundaries[-1]:
+            boundaries.append(value)
+    if boundaries and boundaries[0] == sample[0]:
+        boundaries.pop(0)
+    return boundaries
+
+
+def _is_integer(value):
+    return isinstance(value, six.integer_types) and \
+        not isinstance(value, bool)
+
+
+def key_ranges(connection, table, chunks):
+    """
+    Splits `table` into at most `chunks` ranges of its primary key. Returns
+    None when the table has no single-column primary key or doesn't need to
+    be split.
+    """
+    if chunks < 2:
+        return None
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        column = connection.introspection.get_primary_key_column(
+            cursor, table)
+        if column is None:
+            return None
+        cursor.execute(ops.key_bounds_sql(table, column))
+        minimum, maximum = cursor.fetchone()
+        if minimum is None or minimum == maximum:
+            return None
+        if _is_integer(minimum) and _is_integer(maximum):
+            return split_integer_range(column, minimum, maximum, chunks)
+        row_count = connection.introspection.get_table_row_estimate(
+            cursor, table)
+        if not row_count:
+            cursor.execute('SELECT COUNT(*) FROM %s' % ops.quote_name(table))
+            row_count = cursor.fetchone()[0]
+        fraction = min(1.0, float(SAMPLE_ROWS_PER_CHUNK * chunks) / row_count)
+        sql, params = ops.key_sample_sql(table, column, fraction)
+        cursor.execute(sql, params)
+        sample = [row[0] for row in cursor.fetchall()]
+    if not sample:
+        return None
+    logger.debug("Sampled %d key(s) of '%s' to split it.", len(sample), table)
+    return ranges_from_boundaries(column, quantile_boundaries(sample, chunks))
@@ -7,8 +7,19 @@ Attributes:
 """
 from __future__ import print_function
 
+import logging
+
 import click
 
+from ibu.checkpoint import (
+    DEFAULT_FOREIGN_KEY_DEFINITIONS, DEFAULT_INDEX_DEFINITIONS,
+    DEFAULT_JOURNAL, DEFAULT_WATERMARKS, ForeignKeyDefinitions,
+    IndexDefinitions, Journal, Watermarks,
+)
+from ibu.config import Config
+from ibu.integrity import format_orphans
+from ibu.transfer import Transfer
+
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
@@ -16,13 +27,16 @@ CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 @click.group(name='ibu')
 @click.option('-d/-s', '--debug/--silent', default=False)
 @click.option('-v', '--version')
-def cli():
+def cli(debug, version):
     """
     Summary.
 
-    Returns:
-        TYPE: Description
+    Args:
+        debug (bool): Log what ibu does to stderr.
+        version (str): Description
     """
+    if debug:
+        logging.basicConfig(level=logging.DEBUG)
 
 
 @cli.command(context_settings=CONTEXT_SETTINGS)
@@ -46,5 +60,108 @@ def schema():
     """
     print("hello")
 
+
+@cli.command(context_settings=CONTEXT_SETTINGS)
+@click.option('-c', '--config', 'config_file', default='manifest.yml',
+              help='Path to the manifest declaring the src and dest '
+              'databases.')
+@click.option('-t', '--table', 'tables', multiple=True,
+              help='Only copy the given table (repeat for several tables).')
+@click.option('-e', '--exclude', multiple=True,
+              help='Skip the given table (repeat for several tables).')
+@click.option('-b', '--batch-size', type=int, default=None,
+              help='Number of rows written to dest per batch.')
+@click.option('-w', '--workers', type=int, default=None,
+              help='Number of tables copied concurrently.')
+@click.option('-k', '--chunks', type=int, default=None,
+              help='Split each table into this many primary key ranges '
+              'that are copied concurrently.')
+@click.option('-j', '--journal', 'journal_file', default=DEFAULT_JOURNAL,
+              help='Path to the checkpoint journal.')
+@click.option('-r', '--resume', is_flag=True, default=False,
+              help='Skip the work the checkpoint journal records as done.')
+@click.option('-i', '--incremental', is_flag=True, default=False,
+              help='Only copy the rows added or updated since the last '
+              'incremental copy, and upsert them into dest.')
+@click.option('--watermarks', 'watermarks_file', default=DEFAULT_WATERMARKS,
+              help='Path to the high watermarks of incremental copies.')
+@click.option('-S', '--snapshot', is_flag=True, default=None,
+              help='Read every table from one consistent snapshot of src, '
+              'shared by all the workers.')
+@click.option('-x', '--rebuild-indexes', is_flag=True, default=False,
+              help='Drop the secondary indexes of the dest tables before the '
+              'copy and rebuild them after it.')
+@click.option('--indexes', 'indexes_file', default=DEFAULT_INDEX_DEFINITIONS,
+              help='Path to the saved definitions of the dropped indexes.')
+@click.option('-F', '--defer-foreign-keys', is_flag=True, default=False,
+              help='Drop the foreign keys of the dest tables before the copy, '
+              'add them back NOT VALID after it and validate them '
+              'concurrently (PostgreSQL only).')
+@click.option('--foreign-keys', 'foreign_keys_file',
+              default=DEFAULT_FOREIGN_KEY_DEFINITIONS,
+              help='Path to the saved definitions of the dropped foreign '
+              'keys.')
+@click.option('--validate', is_flag=True, default=False,
+              help='Check the foreign keys of the copied tables for orphaned '
+              'rows afterwards, and fail if there are any.')
+def copy(config_file, tables, exclude, batch_size, workers, chunks,
+         journal_file, resume, incremental, watermarks_file, snapshot,
+         rebuild_indexes, indexes_file, defer_foreign_keys, foreign_keys_file,
+         validate):
+    """
+    Copy table rows from the src database straight into dest.
+
+    Args:
+        config_file (str): Path to the manifest file.
+        tables (tuple): Tables to copy; all tables when empty.
+        exclude (tuple): Tables to skip.
+        batch_size (int): Rows per batch written to dest.
+        workers (int): Tables copied concurrently.
+        chunks (int): Primary key ranges per table.
+        journal_file (str): Path to the checkpoint journal.
+        resume (bool): Continue an interrupted copy.
+        incremental (bool): Only copy rows above the stored watermarks.
+        watermarks_file (str): Path to the watermarks state file.
+        snapshot (bool): Read src from a synchronized snapshot.
+        rebuild_indexes (bool): Drop dest indexes during the copy.
+        indexes_file (str): Path to the dropped index definitions.
+        defer_foreign_keys (bool): Validate dest foreign keys after the copy.
+        foreign_keys_file (str): Path to the dropped foreign key definitions.
+        validate (bool): Report orphaned rows in dest after the copy.
+    """
+    watermarks = Watermarks(watermarks_file) if incremental else None
+    indexes = IndexDefinitions(indexes_file) if rebuild_indexes else None
+    foreign_keys = (ForeignKeyDefinitions(foreign_keys_file)
+                    if defer_foreign_keys else None)
+    journal = Journal(journal_file, resume=resume)
+    try:
+        transfer = Transfer(Config(config_file).config, tables=tables,
+                            exclude=exclude, batch_size=batch_size,
+                            workers=workers, chunks=chunks, journal=journal,
+                            watermarks=watermarks, snapshot=snapshot,
+                            indexes=indexes, foreign_keys=foreign_keys)
+        counts = transfer.run()
+    finally:
+        journal.close()
+    for table, count in counts.items():
+        click.echo('%s: %d row(s)' % (table, count))
+    for invalid in transfer.invalid_constraints:
+        click.echo('%s: %s is NOT VALID: %s' % (invalid.table, invalid.name,
+                                               invalid.error))
+    report = []
+    if validate:
+        report = transfer.validate(list(counts))
+        for orphans in report:
+            click.echo(format_orphans(orphans))
+    errors = []
+    if transfer.invalid_constraints:
+        errors.append('%d foreign key(s) failed validation and are left NOT '
+                      'VALID.' % len(transfer.invalid_constraints))
+    if report:
+        errors.append('%d foreign key(s) have orphaned rows.' % len(report))
+    if errors:
+        raise click.ClickException(' '.join(errors))
+
+
 if __name__ == '__main__':
-    cli()
\ No newline at end of file
+    cli()
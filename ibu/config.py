@@ -3,7 +3,7 @@ from __future__ import print_function
 import yaml
 import click
 
-from __init__ import docs_url
+from ibu import docs_url
 
 DEFAULT_DB_ALIAS = 'src'
 
@@ -16,7 +16,6 @@ class Config(object):
         try:
             with open(config_file) as stream:
                 self.config = yaml.safe_load(stream)
-                return(self.config)
         except IOError as e:
             msg = e.strerror + ': ' + e.filename
             msg += '\nPlease review the project docs at {0} ' + docs_url
@@ -4,9 +4,14 @@ import pkgutil
 from importlib import import_module
 from threading import local
 
+import six
+
+from ibu.backends.utils import cached_property
+from ibu.config import DEFAULT_DB_ALIAS
+
 DATABASE_ENGINES = {
-    'postgres': '',
-    'mysql': '',
+    'postgres': 'ibu.backends.postgresql',
+    'mysql': 'ibu.backends.mysql',
     'sqlite': '',
     'msserver': '',
     'oracle': ''
@@ -133,7 +138,8 @@ def load_backend(backend_name):
                          (backend_name, ", ".join(backend_reprs), e_user))
             raise ImproperlyConfigured(error_msg)
         else:
-            # If there's some other error
+            # If there's some other error, this must be an error in Ibu
+            raise
 
 
 class ConnectionDoesNotExist(Exception):
@@ -1,14 +1,134 @@
+import io
+import itertools
+import os
 import warnings
 from collections import OrderedDict
 
-from click import BaseCommand, BaseException
-from config import DEFAULT_DB_ALIAS
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import ProgressBar
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from ibu.files import pgzip
+from ibu.scheduler import topological_levels
+from ibu.shards import CountingStream, shard_entry, write_manifest
+from ibu.serializers import register_serializers
+from ibu.serializers.columnar import FORMAT as COLUMNAR, ColumnarWriter
+from ibu.serializers.rows import FORMAT as ROWS, RowWriter
+
+# Rows fetched per round trip by raw dumps.
+RAW_FETCH_SIZE = 2000
 
 
 class ProxyModelWarning(Warning):
     pass
 
 
+def paginate_by_pk(queryset, page_size):
+    """
+    Iterates over `queryset`, which must be ordered by primary key, one page
+    of at most `page_size` objects at a time. Each page is its own query
+    (WHERE pk > last ORDER BY pk LIMIT page_size), so it's an index range
+    scan and only one page is ever held in memory.
+    """
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        page = list(page[:page_size])
+        for obj in page:
+            yield obj
+        if len(page) < page_size:
+            return
+        last_pk = page[-1].pk
+
+
+def open_output(output, binary=False):
+    """
+    Opens the output file, compressing it if its name ends in .gz.
+    """
+    if not output.endswith('.gz'):
+        return open(output, 'wb' if binary else 'w')
+    stream = pgzip.open(output, 'wb')
+    return stream if binary else io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def raw_tables(connection, tables=None, exclude=()):
+    """
+    Returns the names of the database's tables, or of `tables`, less those
+    in `exclude`, in foreign key dependency order.
+    """
+    with connection.cursor() as cursor:
+        names = connection.introspection.table_names(cursor)
+        if tables:
+            unknown = set(tables).difference(names)
+            if unknown:
+                raise CommandError("Unknown table(s): %s" % ', '.join(sorted(unknown)))
+            names = [name for name in names if name in tables]
+        names = [name for name in names if name not in exclude]
+        try:
+            dependencies = connection.introspection.get_table_dependencies(cursor, names)
+        except NotImplementedError:
+            dependencies = dict((name, set()) for name in names)
+    return list(itertools.chain.from_iterable(topological_levels(dependencies)))
+
+
+def raw_rows(connection, table, columns):
+    """
+    Iterates over the rows of `table` as the plain tuples returned by a
+    streaming cursor, without building model instances.
+    """
+    qn = connection.ops.quote_name
+    sql = 'SELECT %s FROM %s' % (', '.join(qn(column) for column in columns), qn(table))
+    with connection.read_transaction():
+        with connection.cursor(streaming=True) as cursor:
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(RAW_FETCH_SIZE)
+                if not rows:
+                    return
+                for row in rows:
+                    yield row
+
+
+class RowEstimate(object):
+    """
+    Per-model row counts for progress reporting: estimated up front from
+    the database's statistics, then corrected as each model is scanned.
+    """
+
+    def __init__(self):
+        self.counts = OrderedDict()
+
+    def estimate(self, model, count):
+        self.counts[model] = count
+
+    def seen(self, model, count):
+        # A scan running past its estimate raises it as it goes.
+        if count > self.counts.get(model, 0):
+            self.counts[model] = count
+
+    def finish(self, model, count):
+        self.counts[model] = count
+
+    @property
+    def total(self):
+        return max(1, sum(self.counts.values()))
+
+
+class EstimatedProgressBar(ProgressBar):
+    """
+    A progress bar whose total is a RowEstimate, re-read at every update.
+    """
+
+    def __init__(self, output, estimate):
+        super(EstimatedProgressBar, self).__init__(output, estimate.total)
+        self.estimate = estimate
+
+    def update(self, count):
+        self.total_count = max(self.estimate.total, count)
+        super(EstimatedProgressBar, self).update(count)
+
+
 class Command(BaseCommand):
     help = ("Output the contents of the database as a fixture of the given "
             "format (using each model's default manager unless --all is "
@@ -18,7 +138,10 @@ class Command(BaseCommand):
         parser.add_argument('args', metavar='app_label[.ModelName]', nargs='*',
                             help='Restricts dumped data to the specified app_label or app_label.ModelName.')
         parser.add_argument('--format', default='json', dest='format',
-                            help='Specifies the output serialization format for fixtures.')
+                            help='Specifies the output serialization format for fixtures. '
+                            'Use jsonl to write objects as they are read, one per line, '
+                            'or columnar to write table rows in compact typed blocks '
+                            '(requires --output). --raw dumps also accept rows.')
         parser.add_argument('--indent', default=None, dest='indent', type=int,
                             help='Specifies the indent level to use when pretty-printing output.')
         parser.add_argument('--database', action='store', dest='database',
@@ -40,9 +163,75 @@ class Command(BaseCommand):
                             "Accepts a comma separated list of keys. "
                             "This option will only work when you specify one model.")
         parser.add_argument('-o', '--output', default=None, dest='output',
-                            help='Specifies file to which the output is written.')
+                            help='Specifies file to which the output is written. '
+                            'Output to a .gz file is compressed on all cores.')
+        parser.add_argument('--estimate', action='store_true', dest='estimate', default=False,
+                            help="Base the progress bar on the database's row estimates "
+                            "instead of counting every table first.")
+        parser.add_argument('--page-size', default=None, dest='page_size', type=int,
+                            help='Reads each model in pages of this many objects, '
+                            'using keyset pagination on the primary key instead of '
+                            'a single query.')
+        parser.add_argument('--shard-dir', default=None, dest='shard_dir',
+                            help='Writes the output to this directory instead, as shards of '
+                            'a single model each, indexed by a manifest.json.')
+        parser.add_argument('--shard-rows', default=100000, dest='shard_rows', type=int,
+                            help='Maximum number of objects per shard.')
+        parser.add_argument('--shard-bytes', default=None, dest='shard_bytes', type=int,
+                            help='Starts a new shard once this many uncompressed bytes '
+                            'have been written to the current one.')
+        parser.add_argument('--compress', action='store_true', dest='compress', default=False,
+                            help='Gzip-compresses every shard.')
+        parser.add_argument('--raw', action='store_true', dest='raw', default=False,
+                            help='Dumps table rows read with plain SQL instead of model '
+                            'instances, in the rows (default) or columnar format. Arguments and '
+                            '--exclude then name tables; no models are needed.')
+
+    def handle_raw(self, *tables, **options):
+        """
+        Dumps the rows of `tables` (every table by default), described by
+        introspection alone.
+        """
+        format = options.get('format')
+        output = options.get('output')
+        if format == 'json':
+            format = ROWS
+        if format not in (ROWS, COLUMNAR):
+            raise CommandError(
+                "Raw dumps are written in the %s or %s format." % (ROWS, COLUMNAR))
+        if format == COLUMNAR and not output:
+            raise CommandError(
+                "The columnar format can only be written to a file (--output).")
+        connection = connections[options.get('database')]
+        try:
+            names = raw_tables(connection, tables, options.get('exclude'))
+            if output:
+                stream = open_output(output, binary=format == COLUMNAR)
+            else:
+                self.stdout.ending = None
+                stream = self.stdout
+            try:
+                writer = ColumnarWriter(stream) if format == COLUMNAR else RowWriter(stream)
+                for table in names:
+                    with connection.cursor() as cursor:
+                        columns = [info.name for info in
+                                   connection.introspection.get_table_description(cursor, table)]
+                    count = writer.write_rows(table, columns, raw_rows(connection, table, columns))
+                    if options['verbosity'] >= 2:
+                        self.stderr.write("Dumped %d row(s) of %s." % (count, table))
+                if format == COLUMNAR:
+                    writer.close()
+            finally:
+                if output:
+                    stream.close()
+        except Exception as e:
+            if options.get('traceback'):
+                raise
+            raise CommandError("Unable to serialize database: %s" % e)
 
     def handle(self, *app_labels, **options):
+        if options.get('raw'):
+            return self.handle_raw(*app_labels, **options)
         format = options.get('format')
         indent = options.get('indent')
         using = options.get('database')
@@ -53,6 +242,12 @@ class Command(BaseCommand):
         use_natural_primary_keys = options.get('use_natural_primary_keys')
         use_base_manager = options.get('use_base_manager')
         pks = options.get('primary_keys')
+        page_size = options.get('page_size')
+        estimate = RowEstimate() if options.get('estimate') else None
+        shard_dir = options.get('shard_dir')
+        shard_rows = options.get('shard_rows')
+        shard_bytes = options.get('shard_bytes')
+        compress = options.get('compress')
 
         if pks:
             primary_keys = pks.split(',')
@@ -66,26 +261,26 @@ class Command(BaseCommand):
                 try:
                     model = apps.get_model(exclude)
                 except LookupError:
-                    raise BaseException(
+                    raise CommandError(
                         'Unknown model in excludes: %s' % exclude)
                 excluded_models.add(model)
             else:
                 try:
                     app_config = apps.get_app_config(exclude)
                 except LookupError as e:
-                    raise BaseException(str(e))
+                    raise CommandError(str(e))
                 excluded_apps.add(app_config)
 
         if len(app_labels) == 0:
             if primary_keys:
-                raise BaseException(
+                raise CommandError(
                     "You can only use --pks option with one model")
             app_list = OrderedDict((app_config, None)
                                    for app_config in apps.get_app_configs()
                                    if app_config.models_module is not None and app_config not in excluded_apps)
         else:
             if len(app_labels) > 1 and primary_keys:
-                raise BaseException(
+                raise CommandError(
                     "You can only use --pks option with one model")
             app_list = OrderedDict()
             for label in app_labels:
@@ -94,13 +289,13 @@ class Command(BaseCommand):
                     try:
                         app_config = apps.get_app_config(app_label)
                     except LookupError as e:
-                        raise BaseException(str(e))
+                        raise CommandError(str(e))
                     if app_config.models_module is None or app_config in excluded_apps:
                         continue
                     try:
                         model = app_config.get_model(model_label)
                     except LookupError:
-                        raise BaseException(
+                        raise CommandError(
                             "Unknown model: %s.%s" % (app_label, model_label))
 
                     app_list_value = app_list.setdefault(app_config, [])
@@ -113,32 +308,60 @@ class Command(BaseCommand):
                             app_list_value.append(model)
                 except ValueError:
                     if primary_keys:
-                        raise BaseException(
+                        raise CommandError(
                             "You can only use --pks option with one model")
                     # This is just an app - no model qualifier
                     app_label = label
                     try:
                         app_config = apps.get_app_config(app_label)
                     except LookupError as e:
-                        raise BaseException(str(e))
+                        raise CommandError(str(e))
                     if app_config.models_module is None or app_config in excluded_apps:
                         continue
                     app_list[app_config] = None
 
         # Check that the serialization format exists; this is a shortcut to
         # avoid collating all the objects and _then_ failing.
-        if format not in serializers.get_public_serializer_formats():
+        register_serializers()
+        if format == COLUMNAR:
+            if not output:
+                raise CommandError(
+                    "The columnar format can only be written to a file (--output).")
+        elif format not in serializers.get_public_serializer_formats():
             try:
                 serializers.get_serializer(format)
             except serializers.SerializerDoesNotExist:
                 pass
 
-            raise BaseException("Unknown serialization format: %s" % format)
+            raise CommandError("Unknown serialization format: %s" % format)
 
-        def get_objects(count_only=False):
+        def estimate_count(model):
             """
-            Collate the objects to be serialized. If count_only is True, just
-            count the number of objects to be serialized.
+            Return the estimated number of rows of the model's table, or None
+            on backends that can't estimate it, such as Django's own.
+            """
+            connection = connections[using]
+            if not hasattr(connection.introspection, 'get_table_row_estimate'):
+                return None
+            with connection.cursor() as cursor:
+                return connection.introspection.get_table_row_estimate(
+                    cursor, model._meta.db_table)
+
+        def counted(model, objects):
+            """
+            Yield `objects`, refining the model's row estimate on the way.
+            """
+            count = 0
+            for count, obj in enumerate(objects, 1):
+                if count % 1000 == 0:
+                    estimate.seen(model, count)
+                yield obj
+            estimate.finish(model, count)
+
+        def get_querysets():
+            """
+            Yield (model, queryset) for every model to dump, in dependency
+            order, with querysets ordered by primary key.
             """
             models = serializers.sort_dependencies(app_list.items())
             for model in models:
@@ -159,13 +382,112 @@ class Command(BaseCommand):
                         using).order_by(model._meta.pk.name)
                     if primary_keys:
                         queryset = queryset.filter(pk__in=primary_keys)
-                    if count_only:
-                        yield queryset.order_by().count()
+                    yield model, queryset
+
+        def iterate(model, queryset):
+            """
+            Iterate over the objects of the queryset.
+            """
+            if page_size:
+                objects = paginate_by_pk(queryset, page_size)
+            else:
+                objects = queryset.iterator()
+            if estimate is not None:
+                objects = counted(model, objects)
+            return objects
+
+        def get_objects(count_only=False):
+            """
+            Collate the objects to be serialized. If count_only is True, just
+            count the number of objects to be serialized, or estimate it when
+            --estimate is given.
+            """
+            for model, queryset in get_querysets():
+                if count_only:
+                    count = None
+                    if estimate is not None and not primary_keys:
+                        count = estimate_count(model)
+                    if count is None:
+                        count = queryset.order_by().count()
+                    if estimate is not None:
+                        estimate.estimate(model, count)
+                    yield count
+                    continue
+                for obj in iterate(model, queryset):
+                    yield obj
+
+        def dump_shards():
+            """
+            Serialize every model to shards of at most shard_rows objects
+            (and about shard_bytes bytes) in shard_dir, and index them in
+            its manifest.
+            """
+            if not os.path.isdir(shard_dir):
+                os.makedirs(shard_dir)
+            shards = []
+            for model, queryset in get_querysets():
+                objects = iterate(model, queryset)
+                for index in itertools.count(1):
+                    first = next(objects, None)
+                    if first is None:
+                        break
+                    name = '%s.%04d.%s%s' % (model._meta.label_lower, index, format,
+                                             '.gz' if compress else '')
+                    path = os.path.join(shard_dir, name)
+                    if compress:
+                        stream = io.TextIOWrapper(pgzip.open(path, 'wb'), encoding='utf-8')
                     else:
-                        for obj in queryset.iterator():
+                        stream = io.open(path, 'w', encoding='utf-8')
+                    stream = CountingStream(stream)
+                    rows = [1]
+
+                    def shard_objects():
+                        yield first
+                        while rows[0] < shard_rows:
+                            if shard_bytes and stream.count >= shard_bytes:
+                                return
+                            obj = next(objects, None)
+                            if obj is None:
+                                return
+                            rows[0] += 1
                             yield obj
 
+                    try:
+                        serializers.serialize(format, shard_objects(), indent=indent,
+                                              use_natural_foreign_keys=use_natural_foreign_keys,
+                                              use_natural_primary_keys=use_natural_primary_keys,
+                                              stream=stream)
+                    finally:
+                        stream.close()
+                    shards.append(shard_entry(shard_dir, name, model._meta.label_lower, rows[0]))
+                    if options['verbosity'] >= 2:
+                        self.stdout.write("Wrote %d object(s) to %s." % (rows[0], path))
+            write_manifest(shard_dir, format, shards)
+
+        def dump_columnar(stream):
+            """
+            Write the rows of every model's table as columnar blocks.
+            """
+            writer = ColumnarWriter(stream)
+            for model, queryset in get_querysets():
+                fields = model._meta.concrete_fields
+                rows = queryset.values_list(
+                    *[field.attname for field in fields]).iterator()
+                writer.write_rows(model._meta.db_table,
+                                  [field.column for field in fields], rows)
+            writer.close()
+
+        if shard_dir and format == COLUMNAR:
+            raise CommandError("The columnar format can't be sharded.")
+
         try:
+            if shard_dir:
+                dump_shards()
+                return
+            if format == COLUMNAR:
+                with open_output(output, binary=True) as stream:
+                    dump_columnar(stream)
+                return
             self.stdout.ending = None
             progress_output = None
             object_count = 0
@@ -174,17 +496,21 @@ class Command(BaseCommand):
             if (output and self.stdout.isatty() and options['verbosity'] > 0):
                 progress_output = self.stdout
                 object_count = sum(get_objects(count_only=True))
-            stream = open(output, 'w') if output else None
+            stream = open_output(output) if output else None
             try:
-                serializers.serialize(format, get_objects(), indent=indent,
-                                      use_natural_foreign_keys=use_natural_foreign_keys,
-                                      use_natural_primary_keys=use_natural_primary_keys,
-                                      stream=stream or self.stdout, progress_output=progress_output,
-                                      object_count=object_count)
+                serializer = serializers.get_serializer(format)()
+                if estimate is not None and progress_output:
+                    serializer.progress_class = (
+                        lambda output, total_count: EstimatedProgressBar(output, estimate))
+                serializer.serialize(get_objects(), indent=indent,
+                                     use_natural_foreign_keys=use_natural_foreign_keys,
+                                     use_natural_primary_keys=use_natural_primary_keys,
+                                     stream=stream or self.stdout, progress_output=progress_output,
+                                     object_count=object_count)
             finally:
                 if stream:
                     stream.close()
         except Exception as e:
             if show_traceback:
                 raise
-            raise BaseException("Unable to serialize database: %s" % e)
+            raise CommandError("Unable to serialize database: %s" % e)
@@ -3,11 +3,10 @@ from __future__ import unicode_literals
 import os
 from io import BytesIO, StringIO, UnsupportedOperation
 
-from django.core.files.utils import FileProxyMixin
-from django.utils import six
-from django.utils.encoding import (
-    force_bytes, force_str, python_2_unicode_compatible, smart_text,
-)
+import six
+from six import python_2_unicode_compatible
+
+from ibu.files.utils import FileProxyMixin
 
 
 @python_2_unicode_compatible
@@ -23,10 +22,10 @@ class File(FileProxyMixin):
             self.mode = file.mode
 
     def __str__(self):
-        return smart_text(self.name or '')
+        return six.ensure_text(self.name or '')
 
     def __repr__(self):
-        return force_str("<%s: %s>" % (self.__class__.__name__, self or "None"))
+        return six.ensure_str("<%s: %s>" % (self.__class__.__name__, self or "None"))
 
     def __bool__(self):
         return bool(self.name)
@@ -154,7 +153,7 @@ class ContentFile(File):
             stream_class = StringIO if isinstance(content, six.text_type) else BytesIO
         else:
             stream_class = BytesIO
-            content = force_bytes(content)
+            content = six.ensure_binary(content)
         super(ContentFile, self).__init__(stream_class(content), name=name)
         self.size = len(content)
 
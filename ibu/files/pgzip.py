@@ -0,0 +1,265 @@
+"""
+Parallel gzip compression and decompression, in the spirit of pigz and BGZF.
+
+The writer splits its input into blocks and compresses each one as a
+separate gzip member on a thread pool; zlib releases the GIL, so this scales
+across cores. Concatenated members are a valid gzip file (RFC 1952, section
+2.2), readable by gzip, zcat or GzipFile.
+
+Every member carries its compressed size in an FEXTRA subfield ('IB'), which
+lets the reader find the next member without inflating the current one, and
+so inflate several members concurrently. Files without that index -- those
+written by any other gzip implementation -- are read with GzipFile, and
+members without an index following indexed ones (say, appended with cat)
+are inflated sequentially.
+"""
+from __future__ import unicode_literals
+
+import gzip
+import io
+import multiprocessing
+import struct
+import time
+import zlib
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+__all__ = ('ParallelGzipReader', 'ParallelGzipWriter', 'open')
+
+BLOCK_SIZE = 1024 * 1024
+
+# Member header: magic, CM=deflate, FLG=FEXTRA, MTIME, XFL, OS=unknown,
+# XLEN, then one subfield: SI1 SI2 'IB', LEN 4, member size.
+_header = struct.Struct('<2sBBIBBH2sHI')
+_trailer = struct.Struct('<II')
+_MAGIC = b'\x1f\x8b'
+_SUBFIELD_ID = b'IB'
+_FEXTRA = 4
+_HEADER_SIZE = _header.size
+_XLEN = _HEADER_SIZE - 12
+
+
+def _default_workers():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def compress_member(data, level):
+    """
+    Returns `data` compressed as one indexed gzip member.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(data) + compressor.flush()
+    size = _HEADER_SIZE + len(deflated) + _trailer.size
+    header = _header.pack(_MAGIC, 8, _FEXTRA, int(time.time()), 0, 255,
+                          _XLEN, _SUBFIELD_ID, 4, size)
+    trailer = _trailer.pack(zlib.crc32(data) & 0xffffffff,
+                            len(data) & 0xffffffff)
+    return header + deflated + trailer
+
+
+def member_size(header):
+    """
+    Returns the size of the member starting with the bytes `header`, or
+    None if it doesn't carry an index subfield.
+    """
+    if len(header) < _HEADER_SIZE:
+        return None
+    magic, method, flags, _, _, _, xlen, subfield, length, size = \
+        _header.unpack(header[:_HEADER_SIZE])
+    if (magic != _MAGIC or method != 8 or flags != _FEXTRA or
+            xlen != _XLEN or subfield != _SUBFIELD_ID or length != 4):
+        return None
+    return size
+
+
+def decompress_member(member):
+    """
+    Returns the data of the indexed gzip member `member`.
+    """
+    data = zlib.decompress(member[_HEADER_SIZE:-_trailer.size],
+                           -zlib.MAX_WBITS)
+    crc, isize = _trailer.unpack(member[-_trailer.size:])
+    if crc != zlib.crc32(data) & 0xffffffff:
+        raise IOError("CRC check failed")
+    if isize != len(data) & 0xffffffff:
+        raise IOError("Incorrect length of data produced")
+    return data
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """
+    A binary file object compressing what's written to `fileobj` on
+    `workers` threads, one `block_size` block per gzip member. At most two
+    blocks per worker are held in memory.
+    """
+
+    def __init__(self, fileobj, level=6, block_size=BLOCK_SIZE, workers=None):
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        self.workers = workers or _default_workers()
+        self._pool = ThreadPool(self.workers)
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._members = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self._pending.append(
+            self._pool.apply_async(compress_member, (block, self.level)))
+        self._members += 1
+        while len(self._pending) > 2 * self.workers:
+            self._write_member()
+
+    def _write_member(self):
+        self.fileobj.write(self._pending.popleft().get())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            # An empty file still needs one member to be valid gzip.
+            if self._buffer or not self._members:
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self._write_member()
+            self.fileobj.close()
+        finally:
+            self._pool.close()
+            self._pool.join()
+            super(ParallelGzipWriter, self).close()
+
+
+class ParallelGzipReader(io.RawIOBase):
+    """
+    A binary file object decompressing the indexed gzip members of
+    `fileobj` on `workers` threads, up to two members per worker ahead of
+    the data being read. From the first member without an index on, the
+    rest of the file is inflated sequentially.
+    """
+
+    def __init__(self, fileobj, workers=None):
+        self.fileobj = fileobj
+        self.workers = workers or _default_workers()
+        self._pool = ThreadPool(self.workers)
+        self._pending = deque()
+        self._data = b''
+        self._position = 0
+        self._eof = False
+        self._sequential = None
+
+    def readable(self):
+        return True
+
+    def _read_member(self):
+        header = self.fileobj.read(_HEADER_SIZE)
+        if not header:
+            return None
+        size = member_size(header)
+        if size is None:
+            # Members without an index can only be found by inflating them.
+            self._sequential = self._inflate(header)
+            return None
+        rest = self.fileobj.read(size - _HEADER_SIZE)
+        if len(rest) != size - _HEADER_SIZE:
+            raise EOFError("Compressed file ended before the "
+                           "end-of-stream marker was reached")
+        return header + rest
+
+    def _inflate(self, data):
+        """
+        Yields the data of the members of the rest of the file, from the
+        bytes `data` on, inflated one after the other.
+        """
+        decompressor = None
+        while True:
+            if not data:
+                data = self.fileobj.read(BLOCK_SIZE)
+                if not data:
+                    break
+            if decompressor is None:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                chunk = decompressor.decompress(data)
+            except zlib.error as e:
+                raise IOError("Invalid gzip member: %s" % e)
+            data = decompressor.unused_data
+            if chunk:
+                yield chunk
+            if decompressor.eof:
+                decompressor = None
+        if decompressor is not None:
+            raise EOFError("Compressed file ended before the "
+                           "end-of-stream marker was reached")
+
+    def _fill(self):
+        while not self._eof and len(self._pending) < 2 * self.workers:
+            member = self._read_member()
+            if member is None:
+                self._eof = True
+            else:
+                self._pending.append(
+                    self._pool.apply_async(decompress_member, (member,)))
+
+    def readinto(self, b):
+        while self._position >= len(self._data):
+            self._fill()
+            if self._pending:
+                self._data = self._pending.popleft().get()
+            elif self._sequential is not None:
+                self._data = next(self._sequential, None)
+                if self._data is None:
+                    self._sequential = None
+                    self._data = b''
+                    return 0
+            else:
+                return 0
+            self._position = 0
+        n = min(len(b), len(self._data) - self._position)
+        b[:n] = self._data[self._position:self._position + n]
+        self._position += n
+        return n
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.fileobj.close()
+        finally:
+            self._pool.close()
+            self._pool.join()
+            super(ParallelGzipReader, self).close()
+
+
+def open(filename, mode='rb', level=6, workers=None):
+    """
+    Opens the gzip file `filename` for reading ('rb') or writing ('wb').
+
+    Files written by ParallelGzipWriter are decompressed in parallel; other
+    gzip files are read with GzipFile.
+    """
+    if mode == 'wb':
+        return io.BufferedWriter(ParallelGzipWriter(
+            io.open(filename, 'wb'), level=level, workers=workers))
+    if mode != 'rb':
+        raise ValueError("Invalid mode: %r" % mode)
+    fileobj = io.open(filename, 'rb')
+    header = fileobj.read(_HEADER_SIZE)
+    if member_size(header) is None:
+        fileobj.close()
+        return gzip.GzipFile(filename, 'rb')
+    fileobj.seek(0)
+    return io.BufferedReader(ParallelGzipReader(fileobj, workers=workers))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+A persistent index of the files in fixture directories.
+
+Resolving a fixture label means looking for files named after it in every
+fixture directory. Instead of globbing each directory for each label, the
+index keeps every directory's listing in a JSON file, keyed by the
+directory's modification time:
+
+    {"version": 1,
+     "dirs": {"/srv/app/fixtures": {"mtime": 1507012345.123,
+                                    "files": ["users.json", ...]}}}
+
+Adding, removing or renaming a file changes its directory's mtime, which
+invalidates the listing; it's then read again and the index rewritten. A
+listing read within RACY_SECONDS of the directory's last change isn't
+saved, since a later change could keep the same mtime.
+
+Saving the index changes the mtime of its own directory, so it's kept in the
+user's cache directory by default, out of the fixture directories (which
+include the current one).
+
+In memory, every listing is turned into a dict mapping fixture names (file
+names less one to three extensions: database, format and compression) to
+file names, so a label resolves in constant time per directory.
+"""
+from __future__ import unicode_literals
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger('ibu.fixture_index')
+
+DEFAULT_FIXTURE_INDEX = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'ibu', 'fixture-index.json')
+VERSION = 1
+
+# Extensions a fixture file name can have beyond its fixture name.
+MAX_EXTENSIONS = 3
+
+RACY_SECONDS = 2
+
+
+def fixture_names(filename):
+    """
+    Returns the fixture names `filename` could be found under.
+    """
+    parts = filename.split('.')
+    return set('.'.join(parts[:-count])
+               for count in range(1, min(MAX_EXTENSIONS, len(parts) - 1) + 1))
+
+
+class FixtureIndex(object):
+    """
+    The listings of fixture directories, persisted at `path`.
+    """
+
+    def __init__(self, path=DEFAULT_FIXTURE_INDEX):
+        self.path = path
+        self.dirs = {}
+        self.dirty = False
+        self._names = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    data = json.loads(f.read().decode('utf-8'))
+            except ValueError:
+                logger.warning("Ignoring the corrupt fixture index %s.", path)
+            else:
+                if data.get('version') == VERSION:
+                    self.dirs = data['dirs']
+
+    def names(self, directory):
+        """
+        Returns the dict mapping fixture names to the names of the files of
+        `directory`, reading the directory again if it changed since it was
+        indexed.
+        """
+        try:
+            return self._names[directory]
+        except KeyError:
+            pass
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            # Not cached: the directory may be created later.
+            files = []
+        else:
+            entry = self.dirs.get(directory)
+            if entry is not None and entry['mtime'] == mtime:
+                files = entry['files']
+            else:
+                files = sorted(os.listdir(directory))
+                if time.time() - mtime >= RACY_SECONDS:
+                    self.dirs[directory] = {'mtime': mtime, 'files': files}
+                    self.dirty = True
+                elif entry is not None:
+                    del self.dirs[directory]
+                    self.dirty = True
+        names = {}
+        for filename in files:
+            for name in fixture_names(filename):
+                names.setdefault(name, []).append(filename)
+        self._names[directory] = names
+        return names
+
+    def lookup(self, directory, fixture_name):
+        """
+        Returns the paths of the files of `directory` that could hold the
+        fixture `fixture_name`.
+        """
+        return [os.path.join(directory, filename)
+                for filename in self.names(directory).get(fixture_name, ())]
+
+    def save(self):
+        """
+        Writes the index back, atomically, if a listing changed.
+        """
+        if not self.dirty:
+            return
+        data = json.dumps({'version': VERSION, 'dirs': self.dirs},
+                          sort_keys=True)
+        tmp_path = '%s.tmp' % self.path
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(tmp_path, 'wb') as f:
+                f.write(data.encode('utf-8'))
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            # The index is only a cache.
+            logger.warning("Couldn't save the fixture index %s: %s",
+                           self.path, e)
+        else:
+            self.dirty = False
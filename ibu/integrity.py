@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Set-based foreign key validation, for data loaded with constraint checks
+disabled.
+
+Every foreign key is checked with a single anti-join query counting the
+referring rows whose value has no match in the referenced table, and
+another one fetching a sample of their primary keys when there are any.
+The checks run concurrently over a pool of connections, and all of them
+run to completion: the result is a report of every foreign key with
+orphaned rows, rather than an error about the first one.
+
+On backends that can defer foreign key validation, foreign keys added NOT
+VALID (see the PostgreSQL schema editor) are validated the same way by
+validate_constraints(): one ALTER TABLE ... VALIDATE CONSTRAINT per key,
+concurrently and each in its own transaction, which only takes a SHARE
+UPDATE EXCLUSIVE lock on the table.
+"""
+from __future__ import unicode_literals
+
+import logging
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+import six
+
+from ibu.connection import DatabaseError
+from ibu.scheduler import ConnectionPool
+
+logger = logging.getLogger('ibu.integrity')
+
+DEFAULT_SAMPLE_SIZE = 10
+
+# A foreign key from `column` of `table` to `referenced_column` of
+# `referenced_table`.
+ForeignKey = namedtuple(
+    'ForeignKey', 'table column referenced_table referenced_column')
+
+# The rows of a ForeignKey's table referencing missing rows: how many there
+# are, and up to `sample_size` of their primary keys (or, for tables
+# without one, of their dangling values).
+Orphans = namedtuple('Orphans', 'foreign_key count sample')
+
+# A foreign key `name` of `table` that failed validation with `error`.
+InvalidConstraint = namedtuple('InvalidConstraint', 'table name error')
+
+
+def foreign_keys(connection, tables=None):
+    """
+    Returns the ForeignKeys of `tables`, or of every table.
+    """
+    with connection.cursor() as cursor:
+        if tables is None:
+            tables = connection.introspection.table_names(cursor)
+        keys = []
+        for table in tables:
+            keys.extend(
+                ForeignKey(table, column, referenced_table, referenced_column)
+                for column, referenced_table, referenced_column in
+                connection.introspection.get_key_columns(cursor, table))
+    return keys
+
+
+def orphans_sql(connection, foreign_key, select):
+    """
+    Returns the anti-join selecting `select` from the rows of the foreign
+    key's table whose value isn't in the referenced table.
+    """
+    qn = connection.ops.quote_name
+    return (
+        'SELECT %(select)s FROM %(table)s referring '
+        'WHERE referring.%(column)s IS NOT NULL AND NOT EXISTS ('
+        'SELECT 1 FROM %(referenced_table)s referred '
+        'WHERE referred.%(referenced_column)s = referring.%(column)s)' % {
+            'select': select,
+            'table': qn(foreign_key.table),
+            'column': qn(foreign_key.column),
+            'referenced_table': qn(foreign_key.referenced_table),
+            'referenced_column': qn(foreign_key.referenced_column),
+        }
+    )
+
+
+def find_orphans(connection, foreign_key, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Returns the Orphans of `foreign_key`, with a count of 0 if there are
+    none.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(orphans_sql(connection, foreign_key, 'COUNT(*)'))
+        count = cursor.fetchone()[0]
+        sample = []
+        if count and sample_size:
+            key_column = connection.introspection.get_primary_key_column(
+                cursor, foreign_key.table) or foreign_key.column
+            cursor.execute('%s LIMIT %d' % (
+                orphans_sql(connection, foreign_key, 'referring.%s' %
+                            connection.ops.quote_name(key_column)),
+                sample_size))
+            sample = [row[0] for row in cursor.fetchall()]
+    return Orphans(foreign_key, count, sample)
+
+
+def validate_foreign_keys(connection, tables=None, workers=1,
+                          sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Checks every foreign key of `tables` (all tables by default) on up to
+    `workers` copies of `connection` at a time, and returns the list of
+    Orphans of the foreign keys that have orphaned rows.
+
+    With a single worker, the keys are checked on `connection` itself, which
+    sees the rows of its open transaction.
+    """
+    keys = foreign_keys(connection, tables)
+    if not keys:
+        return []
+    workers = max(1, min(workers, len(keys)))
+    if workers == 1:
+        results = [find_orphans(connection, foreign_key, sample_size)
+                   for foreign_key in keys]
+    else:
+        connections = ConnectionPool(connection, workers)
+        pool = ThreadPool(workers)
+
+        def check(foreign_key):
+            with connections.lease() as worker_connection:
+                return find_orphans(worker_connection, foreign_key,
+                                    sample_size)
+
+        try:
+            results = pool.map(check, keys, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+            connections.close()
+    report = [orphans for orphans in results if orphans.count]
+    for orphans in report:
+        logger.warning("%d row(s) of '%s' reference missing rows through "
+                       "'%s'.", orphans.count, orphans.foreign_key.table,
+                       orphans.foreign_key.column)
+    return report
+
+
+def format_orphans(orphans):
+    """
+    Returns a one-line description of `orphans`.
+    """
+    key = orphans.foreign_key
+    return '%s.%s -> %s.%s: %d orphaned row(s), e.g. %s' % (
+        key.table, key.column, key.referenced_table, key.referenced_column,
+        orphans.count, ', '.join(six.text_type(value)
+                                 for value in orphans.sample))
+
+
+def validate_constraint(connection, table, name):
+    """
+    Validates the NOT VALID foreign key `name` of `table`, and returns an
+    InvalidConstraint if existing rows violate it, None otherwise.
+    """
+    qn = connection.ops.quote_name
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(connection.SchemaEditorClass.sql_validate_fk % {
+                'table': qn(table), 'name': qn(name)})
+    except DatabaseError as e:
+        return InvalidConstraint(table, name, e)
+    logger.info("Validated '%s' of '%s'.", name, table)
+    return None
+
+
+def validate_constraints(connection, tables=None, workers=1):
+    """
+    Validates the NOT VALID foreign keys of `tables` (all tables by default)
+    on up to `workers` autocommit copies of `connection` at a time, and
+    returns the list of InvalidConstraints of those that failed; they stay
+    NOT VALID.
+    """
+    if not connection.features.can_defer_foreign_key_validation:
+        return []
+    with connection.cursor() as cursor:
+        if tables is None:
+            tables = connection.introspection.table_names(cursor)
+        constraints = [
+            (table, name) for table in tables
+            for name in connection.introspection
+            .get_unvalidated_foreign_keys(cursor, table)]
+    if not constraints:
+        return []
+    workers = max(1, min(workers, len(constraints)))
+    connections = ConnectionPool(connection, workers)
+    pool = ThreadPool(workers)
+
+    def validate(constraint):
+        with connections.lease() as worker_connection:
+            return validate_constraint(worker_connection, *constraint)
+
+    try:
+        results = pool.map(validate, constraints, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+        connections.close()
+    report = [invalid for invalid in results if invalid is not None]
+    for invalid in report:
+        logger.warning("'%s' of '%s' is left NOT VALID: %s", invalid.name,
+                       invalid.table, invalid.error)
+    return report
@@ -1,11 +1,12 @@
 from __future__ import unicode_literals
 
 import glob
-import gzip
 import os
+import threading
 import warnings
 import zipfile
-from itertools import product
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 
 from django.apps import apps
 from django.conf import settings
@@ -13,6 +14,7 @@ from django.core import serializers
 from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import BaseCommand, CommandError
 from django.core.management.color import no_style
+from django.core.serializers.base import DeserializedObject
 from django.db import (
     DEFAULT_DB_ALIAS, DatabaseError, IntegrityError, connections, router,
     transaction,
@@ -23,6 +25,15 @@ from django.utils.encoding import force_text
 from django.utils.functional import cached_property
 from django.utils.glob import glob_escape
 
+from ibu.checkpoint import DEFAULT_JOURNAL, Journal
+from ibu.files import pgzip
+from ibu.fixture_index import DEFAULT_FIXTURE_INDEX, FixtureIndex
+from ibu.integrity import format_orphans, validate_foreign_keys
+from ibu.serializers import register_serializers
+from ibu.serializers.columnar import FORMAT as COLUMNAR, ColumnarReader
+from ibu.serializers.rows import FORMAT as ROWS, read_tables
+from ibu.shards import is_shard_dir, read_manifest, shard_levels, verify_shard
+
 try:
     import bz2
     has_bz2 = True
@@ -47,6 +58,27 @@ class Command(BaseCommand):
             dest='ignore', default=False,
             help='Ignores entries in the serialized data for fields that do not '
             'currently exist on the model.')
+        parser.add_argument('--journal', action='store', dest='journal',
+            default=None, help='Records every installed fixture in the given '
+            'checkpoint journal. Each fixture is then installed in its own '
+            'transaction instead of all of them in one.')
+        parser.add_argument('--resume', action='store_true', dest='resume',
+            default=False, help='Skips the fixtures already installed '
+            'according to the checkpoint journal.')
+        parser.add_argument('--workers', action='store', dest='workers', type=int,
+            default=4, help='Number of shards of a sharded dump directory '
+            'loaded, or of foreign keys checked after loading shards, '
+            'concurrently.')
+        parser.add_argument('--shard', action='store', dest='shard', default=None,
+            help='Only (re)loads the shard with this file name from the '
+            'sharded dump directories.')
+        parser.add_argument('--fixture-index', action='store', dest='fixture_index',
+            default=DEFAULT_FIXTURE_INDEX, help='Path to the index of the fixture '
+            'directories, kept up to date from their modification times. It '
+            'must be outside of them.')
+        parser.add_argument('--no-fixture-index', action='store_false',
+            dest='use_fixture_index', default=True,
+            help='Looks for fixtures in the fixture directories themselves.')
 
     def handle(self, *fixture_labels, **options):
 
@@ -55,9 +87,24 @@ class Command(BaseCommand):
         self.app_label = options.get('app_label')
         self.hide_empty = options.get('hide_empty', False)
         self.verbosity = options.get('verbosity')
+        self.workers = options.get('workers') or 1
+        self.shard = options.get('shard')
+        self.fixture_index = None
+        if options.get('use_fixture_index', True):
+            self.fixture_index = FixtureIndex(
+                options.get('fixture_index') or DEFAULT_FIXTURE_INDEX)
+        self.journal = None
+        if options.get('journal') or options.get('resume'):
+            self.journal = Journal(options.get('journal') or DEFAULT_JOURNAL,
+                                   resume=options.get('resume'))
 
-        with transaction.atomic(using=self.using):
+        try:
             self.loaddata(fixture_labels)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+        if self.fixture_index is not None:
+            self.fixture_index.save()
 
         # Close the DB connection -- unless we're still in a transaction. This
         # is required as a workaround for an  edge case in MySQL: if the same
@@ -67,19 +114,19 @@ class Command(BaseCommand):
             connections[self.using].close()
 
     def loaddata(self, fixture_labels):
-        connection = connections[self.using]
-
         # Keep a count of the installed objects and fixtures
         self.fixture_count = 0
         self.loaded_object_count = 0
         self.fixture_object_count = 0
         self.models = set()
+        self.counts_lock = threading.Lock()
 
-        self.serialization_formats = serializers.get_public_serializer_formats()
+        register_serializers()
+        self.serialization_formats = serializers.get_public_serializer_formats() + [COLUMNAR, ROWS]
         # Forcing binary mode may be revisited after dropping Python 2 support (see #22399)
         self.compression_formats = {
             None: (open, 'rb'),
-            'gz': (gzip.GzipFile, 'rb'),
+            'gz': (pgzip.open, 'rb'),
             'zip': (SingleZipReader, 'r'),
         }
         if has_bz2:
@@ -90,34 +137,88 @@ class Command(BaseCommand):
         # checks can be expensive on some database (especially MSSQL), bail
         # out early if no fixtures are found.
         for fixture_label in fixture_labels:
-            if self.find_fixtures(fixture_label):
+            if is_shard_dir(fixture_label) or self.find_fixtures(fixture_label):
                 break
         else:
             return
 
-        with connection.constraint_checks_disabled():
+        # Without a journal, the fixtures are installed in a single
+        # transaction, checked before it commits unless shards are loaded
+        # too. Journaled fixtures and shards are each installed in their own
+        # transaction, on their own connection for concurrent shards, after
+        # the fixtures.
+        shard_dirs = [label for label in fixture_labels if is_shard_dir(label)]
+        labels = [label for label in fixture_labels if label not in shard_dirs]
+        if self.journal is None and labels:
+            with transaction.atomic(using=self.using):
+                self.load_labels(labels)
+                if not shard_dirs:
+                    self.finish_load()
+                    return
+        else:
+            self.load_labels(labels)
+        for directory in shard_dirs:
+            self.load_shards(directory)
+        self.finish_load()
+
+    def load_labels(self, fixture_labels):
+        """
+        Loads the fixtures of the given (non-shard) labels, with constraint
+        checks disabled.
+        """
+        with self.constraint_checks_disabled():
             for fixture_label in fixture_labels:
                 self.load_label(fixture_label)
 
+    @contextmanager
+    def constraint_checks_disabled(self):
+        """
+        Disables the constraint checks of the calling thread's connection
+        until the end of the block, even across the transactions of
+        journaled fixtures and shards: finish_load() validates the foreign
+        keys of everything loaded instead.
+
+        Django's PostgreSQL backend only defers checks to the end of the
+        current transaction, so outside of one the session's replication
+        role is set to 'replica' instead, which skips the foreign key
+        triggers (and needs superuser rights).
+        """
+        connection = connections[self.using]
+        if connection.vendor != 'postgresql' or connection.in_atomic_block:
+            with connection.constraint_checks_disabled():
+                yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('SET session_replication_role = replica')
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SET session_replication_role = DEFAULT')
+
+    def finish_load(self):
+        """
+        Checks the loaded tables' constraints, resets their sequences and
+        reports what was installed.
+        """
+        connection = connections[self.using]
+
         # Since we disabled constraint checks, we must manually check for
-        # any invalid keys that might have been added
+        # any invalid keys that might have been added. Uncommitted rows are
+        # only visible to this connection.
         table_names = [model._meta.db_table for model in self.models]
-        try:
-            connection.check_constraints(table_names=table_names)
-        except Exception as e:
-            e.args = ("Problem installing fixtures: %s" % e,)
-            raise
+        workers = 1 if connection.in_atomic_block else self.workers
+        report = validate_foreign_keys(connection, table_names, workers)
+        if report:
+            raise CommandError("Problem installing fixtures: %s" % '; '.join(
+                format_orphans(orphans) for orphans in report))
 
         # If we found even one object in a fixture, we need to reset the
         # database sequences.
         if self.loaded_object_count > 0:
-            sequence_sql = connection.ops.sequence_reset_sql(no_style(), self.models)
-            if sequence_sql:
-                if self.verbosity >= 2:
-                    self.stdout.write("Resetting sequences\n")
-                with connection.cursor() as cursor:
-                    for line in sequence_sql:
-                        cursor.execute(line)
+            if self.verbosity >= 2:
+                self.stdout.write("Resetting sequences\n")
+            self.reset_sequences(connection)
 
         if self.verbosity >= 1:
             if self.fixture_count == 0 and self.hide_empty:
@@ -129,64 +230,260 @@ class Command(BaseCommand):
                 self.stdout.write("Installed %d object(s) (of %d) from %d fixture(s)" %
                     (self.loaded_object_count, self.fixture_object_count, self.fixture_count))
 
+    def reset_sequences(self, connection):
+        """
+        Resets the sequences of the loaded models, through the ibu backends'
+        reset_sequences() or, on Django's own backends, by running the
+        statements of ops.sequence_reset_sql(): in one multi-statement query
+        on PostgreSQL, one at a time elsewhere.
+        """
+        if hasattr(connection, 'reset_sequences'):
+            connection.reset_sequences(no_style(), self.models)
+            return
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), self.models)
+        if not sequence_sql:
+            return
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('\n'.join(sequence_sql))
+            else:
+                for line in sequence_sql:
+                    cursor.execute(line)
+
     def load_label(self, fixture_label):
         """
         Loads fixtures files for a given label.
         """
-        show_progress = self.verbosity >= 3
         for fixture_file, fixture_dir, fixture_name in self.find_fixtures(fixture_label):
-            _, ser_fmt, cmp_fmt = self.parse_name(os.path.basename(fixture_file))
-            open_method, mode = self.compression_formats[cmp_fmt]
-            fixture = open_method(fixture_file, mode)
-            try:
-                self.fixture_count += 1
-                objects_in_fixture = 0
-                loaded_objects_in_fixture = 0
+            if self.journal is None:
+                self.load_fixture(fixture_file, fixture_dir, fixture_name)
+                continue
+            key = os.path.abspath(fixture_file)
+            if self.journal.is_finished(key):
                 if self.verbosity >= 2:
-                    self.stdout.write("Installing %s fixture '%s' from %s." %
-                        (ser_fmt, fixture_name, humanize(fixture_dir)))
-
-                objects = serializers.deserialize(ser_fmt, fixture,
-                    using=self.using, ignorenonexistent=self.ignore)
-
-                for obj in objects:
-                    objects_in_fixture += 1
-                    if router.allow_migrate_model(self.using, obj.object.__class__):
-                        loaded_objects_in_fixture += 1
-                        self.models.add(obj.object.__class__)
-                        try:
-                            obj.save(using=self.using)
-                            if show_progress:
-                                self.stdout.write(
-                                    '\rProcessed %i object(s).' % loaded_objects_in_fixture,
-                                    ending=''
-                                )
-                        except (DatabaseError, IntegrityError) as e:
-                            e.args = ("Could not load %(app_label)s.%(object_name)s(pk=%(pk)s): %(error_msg)s" % {
-                                'app_label': obj.object._meta.app_label,
-                                'object_name': obj.object._meta.object_name,
-                                'pk': obj.object.pk,
-                                'error_msg': force_text(e)
-                            },)
-                            raise
-                if objects and show_progress:
-                    self.stdout.write('')  # add a newline after progress indicator
+                    self.stdout.write("Skipping fixture '%s' from %s: already "
+                        "installed." % (fixture_name, humanize(fixture_dir)))
+                continue
+            # A fixture left dirty by an interrupted run may have been
+            # committed: it's reloaded over the rows it already wrote.
+            replay = self.journal.is_dirty(key)
+            self.journal.start(key)
+            with transaction.atomic(using=self.using):
+                objects_in_fixture = self.load_fixture(
+                    fixture_file, fixture_dir, fixture_name, replay)
+            self.journal.finish(key, objects=objects_in_fixture)
+
+    def load_fixture(self, fixture_file, fixture_dir, fixture_name, replay=False):
+        """
+        Loads a single fixture file and returns the number of objects it
+        contained. With `replay`, rows that may already be loaded are
+        replaced rather than inserted again; saving objects with explicit
+        primary keys does so anyway.
+        """
+        show_progress = self.verbosity >= 3
+        _, ser_fmt, cmp_fmt = self.parse_name(os.path.basename(fixture_file))
+        if ser_fmt in (COLUMNAR, ROWS):
+            return self.load_table_rows(fixture_file, fixture_dir, fixture_name,
+                                        ser_fmt, cmp_fmt, replay)
+        open_method, mode = self.compression_formats[cmp_fmt]
+        fixture = open_method(fixture_file, mode)
+        try:
+            with self.counts_lock:
+                self.fixture_count += 1
+            objects_in_fixture = 0
+            loaded_objects_in_fixture = 0
+            if self.verbosity >= 2:
+                self.stdout.write("Installing %s fixture '%s' from %s." %
+                    (ser_fmt, fixture_name, humanize(fixture_dir)))
+
+            objects = serializers.deserialize(ser_fmt, fixture,
+                using=self.using, ignorenonexistent=self.ignore)
+
+            for obj in objects:
+                objects_in_fixture += 1
+                if router.allow_migrate_model(self.using, obj.object.__class__):
+                    loaded_objects_in_fixture += 1
+                    self.models.add(obj.object.__class__)
+                    try:
+                        obj.save(using=self.using)
+                        if show_progress:
+                            self.stdout.write(
+                                '\rProcessed %i object(s).' % loaded_objects_in_fixture,
+                                ending=''
+                            )
+                    except (DatabaseError, IntegrityError) as e:
+                        e.args = ("Could not load %(app_label)s.%(object_name)s(pk=%(pk)s): %(error_msg)s" % {
+                            'app_label': obj.object._meta.app_label,
+                            'object_name': obj.object._meta.object_name,
+                            'pk': obj.object.pk,
+                            'error_msg': force_text(e)
+                        },)
+                        raise
+            if objects and show_progress:
+                self.stdout.write('')  # add a newline after progress indicator
+            with self.counts_lock:
                 self.loaded_object_count += loaded_objects_in_fixture
                 self.fixture_object_count += objects_in_fixture
-            except Exception as e:
-                if not isinstance(e, CommandError):
-                    e.args = ("Problem installing fixture '%s': %s" % (fixture_file, e),)
-                raise
+        except Exception as e:
+            if not isinstance(e, CommandError):
+                e.args = ("Problem installing fixture '%s': %s" % (fixture_file, e),)
+            raise
+        finally:
+            fixture.close()
+
+        # Warn if the fixture we loaded contains 0 objects.
+        if objects_in_fixture == 0:
+            warnings.warn(
+                "No fixture data found for '%s'. (File format may be "
+                "invalid.)" % fixture_name,
+                RuntimeWarning
+            )
+        return objects_in_fixture
+
+    def load_shards(self, directory):
+        """
+        Loads the shards of a sharded dump directory, or only the one named
+        by --shard. The shards of one model are loaded concurrently, models
+        one after the other in the manifest's dependency order.
+        """
+        shards = read_manifest(directory)['shards']
+        if self.shard:
+            shards = [shard for shard in shards if shard['file'] == self.shard]
+            if not shards:
+                raise CommandError("No shard named '%s' in %s." %
+                    (self.shard, humanize(directory)))
+        pool = ThreadPool(min(self.workers, len(shards)) or 1)
+        try:
+            for level in shard_levels(shards):
+                pool.map(lambda shard: self.load_shard(directory, shard),
+                         level, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    def load_shard(self, directory, shard):
+        """
+        Verifies a shard against its checksum and installs it in its own
+        transaction, on the calling thread's connection.
+        """
+        fixture_file = os.path.join(directory, shard['file'])
+        key = os.path.abspath(fixture_file)
+        if self.journal is not None and self.journal.is_finished(key):
+            if self.verbosity >= 2:
+                self.stdout.write("Skipping shard '%s' from %s: already "
+                    "installed." % (shard['file'], humanize(directory)))
+            return
+        try:
+            verify_shard(directory, shard)
+        except ValueError as e:
+            raise CommandError(force_text(e))
+        replay = self.journal is not None and self.journal.is_dirty(key)
+        if self.journal is not None:
+            self.journal.start(key)
+        connection = connections[self.using]
+        try:
+            with self.constraint_checks_disabled():
+                with transaction.atomic(using=self.using):
+                    objects_in_shard = self.load_fixture(
+                        fixture_file, directory, shard['file'], replay)
+        finally:
+            # Connections are per thread; don't leave the pool's open.
+            connection.close()
+        if self.journal is not None:
+            self.journal.finish(key, objects=objects_in_shard)
+
+    def load_table_rows(self, fixture_file, fixture_dir, fixture_name, ser_fmt,
+                        cmp_fmt, replay=False):
+        """
+        Loads a columnar or rows fixture by handing its rows straight to the
+        connection's bulk writer, table by table, and returns the number of
+        rows loaded. With `replay`, they're upserted on the tables' primary
+        keys instead. Connections without a bulk writer, such as Django's
+        own, save the rows through the tables' models.
+
+        Uncompressed columnar fixtures are memory-mapped rather than read.
+        """
+        connection = connections[self.using]
+        with self.counts_lock:
+            self.fixture_count += 1
+        if self.verbosity >= 2:
+            self.stdout.write("Installing %s fixture '%s' from %s." %
+                (ser_fmt, fixture_name, humanize(fixture_dir)))
+        models = dict((model._meta.db_table, model) for model in apps.get_models())
+        open_method, mode = self.compression_formats[cmp_fmt]
+        try:
+            if ser_fmt == COLUMNAR and cmp_fmt is None:
+                reader = ColumnarReader(fixture_file)
+            else:
+                fixture = open_method(fixture_file, mode)
+                if ser_fmt == COLUMNAR:
+                    try:
+                        reader = ColumnarReader(fixture)
+                    finally:
+                        fixture.close()
+                else:
+                    reader = fixture
+            if ser_fmt == COLUMNAR:
+                tables = ((block.table, block.column_names, block.rows())
+                          for block in reader.blocks())
+            else:
+                tables = read_tables(reader)
+            rows_in_fixture = 0
+            try:
+                for table, columns, rows in tables:
+                    if table in models:
+                        self.models.add(models[table])
+                    if not hasattr(connection, 'bulk_insert_rows'):
+                        rows_in_fixture += self.save_rows(
+                            models.get(table), table, columns, rows)
+                    elif replay:
+                        rows_in_fixture += self.upsert_rows(
+                            connection, table, columns, rows)
+                    else:
+                        rows_in_fixture += connection.bulk_insert_rows(
+                            table, columns, rows)
             finally:
-                fixture.close()
-
-            # Warn if the fixture we loaded contains 0 objects.
-            if objects_in_fixture == 0:
-                warnings.warn(
-                    "No fixture data found for '%s'. (File format may be "
-                    "invalid.)" % fixture_name,
-                    RuntimeWarning
-                )
+                reader.close()
+        except Exception as e:
+            e.args = ("Problem installing fixture '%s': %s" % (fixture_file, e),)
+            raise
+        with self.counts_lock:
+            self.loaded_object_count += rows_in_fixture
+            self.fixture_object_count += rows_in_fixture
+        return rows_in_fixture
+
+    def save_rows(self, model, table, columns, rows):
+        """
+        Saves `rows` into `table` as instances of its `model`, replacing
+        those with the same primary key like deserialized objects.
+        """
+        if model is None:
+            raise CommandError("Table '%s' has no model, and the '%s' database "
+                "has no bulk writer to load its rows with." % (table, self.using))
+        attnames = dict((field.column, field.attname)
+                        for field in model._meta.concrete_fields)
+        unknown = [column for column in columns if column not in attnames]
+        if unknown:
+            raise CommandError("Table '%s' has no field for column(s) %s." %
+                (table, ', '.join(unknown)))
+        attnames = [attnames[column] for column in columns]
+        count = 0
+        for count, row in enumerate(rows, 1):
+            obj = DeserializedObject(model(**dict(zip(attnames, row))))
+            obj.save(using=self.using)
+        return count
+
+    def upsert_rows(self, connection, table, columns, rows):
+        """
+        Writes `rows` into `table`, replacing those with the same primary key.
+        """
+        with connection.cursor() as cursor:
+            key_column = connection.introspection.get_primary_key_column(
+                cursor, table)
+        if key_column is None:
+            raise CommandError("Table '%s' needs a primary key for its fixture "
+                               "to be reloaded." % table)
+        return connection.bulk_upsert_rows(table, columns, rows, [key_column])
 
     @lru_cache.lru_cache(maxsize=None)
     def find_fixtures(self, fixture_label):
@@ -194,9 +491,8 @@ class Command(BaseCommand):
         Finds fixture files for a given label.
         """
         fixture_name, ser_fmt, cmp_fmt = self.parse_name(fixture_label)
-        databases = [self.using, None]
         cmp_fmts = list(self.compression_formats.keys()) if cmp_fmt is None else [cmp_fmt]
-        ser_fmts = serializers.get_public_serializer_formats() if ser_fmt is None else [ser_fmt]
+        ser_fmts = self.serialization_formats if ser_fmt is None else [ser_fmt]
 
         if self.verbosity >= 2:
             self.stdout.write("Loading '%s' fixtures..." % fixture_name)
@@ -211,18 +507,16 @@ class Command(BaseCommand):
                                 for dir_ in fixture_dirs]
                 fixture_name = os.path.basename(fixture_name)
 
-        suffixes = ('.'.join(ext for ext in combo if ext)
-                for combo in product(databases, ser_fmts, cmp_fmts))
-        targets = set('.'.join((fixture_name, suffix)) for suffix in suffixes)
-
+        prefix = fixture_name + '.'
         fixture_files = []
         for fixture_dir in fixture_dirs:
             if self.verbosity >= 2:
                 self.stdout.write("Checking %s for fixtures..." % humanize(fixture_dir))
             fixture_files_in_dir = []
-            path = os.path.join(fixture_dir, fixture_name)
-            for candidate in glob.iglob(glob_escape(path) + '*'):
-                if os.path.basename(candidate) in targets:
+            for candidate in self.fixture_candidates(fixture_dir, fixture_name):
+                basename = os.path.basename(candidate)
+                if basename.startswith(prefix) and self.is_fixture_suffix(
+                        basename[len(prefix):], ser_fmts, cmp_fmts):
                     # Save the fixture_dir and fixture_name for future error messages.
                     fixture_files_in_dir.append((candidate, fixture_dir, fixture_name))
 
@@ -243,6 +537,32 @@ class Command(BaseCommand):
 
         return fixture_files
 
+    def is_fixture_suffix(self, suffix, ser_fmts, cmp_fmts):
+        """
+        Returns True if the file name suffix following a fixture name is an
+        optional database alias, one of `ser_fmts` and one of `cmp_fmts`
+        (which includes None when the compression is optional).
+        """
+        parts = suffix.split('.')
+        cmp_fmt = None
+        if len(parts) > 1 and parts[-1] in self.compression_formats:
+            cmp_fmt = parts.pop()
+        if cmp_fmt not in cmp_fmts:
+            return False
+        if len(parts) == 2 and parts[0] == self.using:
+            parts.pop(0)
+        return len(parts) == 1 and parts[0] in ser_fmts
+
+    def fixture_candidates(self, fixture_dir, fixture_name):
+        """
+        Returns the paths of the files of fixture_dir that may be fixtures
+        named fixture_name, from the fixture index if there's one.
+        """
+        if self.fixture_index is not None:
+            return self.fixture_index.lookup(fixture_dir, fixture_name)
+        path = os.path.join(fixture_dir, fixture_name)
+        return glob.iglob(glob_escape(path) + '*')
+
     @cached_property
     def fixture_dirs(self):
         """
@@ -303,14 +623,32 @@ class Command(BaseCommand):
 
 
 class SingleZipReader(zipfile.ZipFile):
+    """
+    A zip archive holding a single fixture, read as a stream: the member is
+    decompressed as it's read instead of all at once.
+    """
 
     def __init__(self, *args, **kwargs):
         zipfile.ZipFile.__init__(self, *args, **kwargs)
         if len(self.namelist()) != 1:
+            zipfile.ZipFile.close(self)
             raise ValueError("Zip-compressed fixtures must contain one file.")
+        self.member = self.open(self.namelist()[0])
+
+    def read(self, size=-1):
+        return self.member.read(size)
+
+    def readline(self, size=-1):
+        return self.member.readline(size)
+
+    def __iter__(self):
+        return iter(self.member)
 
-    def read(self):
-        return zipfile.ZipFile.read(self, self.namelist()[0])
+    def close(self):
+        member = getattr(self, 'member', None)
+        if member is not None:
+            member.close()
+        zipfile.ZipFile.close(self)
 
 
 def humanize(dirname):
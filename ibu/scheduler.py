@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel scheduling of per-table work in foreign key dependency order.
+
+Tables are grouped into topological levels: every table only references
+tables from earlier levels, so all the work of one level (whole tables or
+key ranges of them) can be processed concurrently, each item over its own
+pair of connections.
+"""
+from __future__ import unicode_literals
+
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+from six.moves import queue
+
+logger = logging.getLogger('ibu.scheduler')
+
+
+def topological_levels(dependencies):
+    """
+    Groups the tables of `dependencies`, a dict mapping each table to the set
+    of tables it references, into a list of levels (sorted lists of table
+    names). Each table only references tables from earlier levels.
+
+    Tables caught in a reference cycle can't be ordered; they are returned
+    together as the last level.
+    """
+    pending = dict((table, set(referenced) & set(dependencies))
+                   for table, referenced in dependencies.items())
+    levels = []
+    while pending:
+        level = sorted(table for table, referenced in pending.items()
+                       if not referenced)
+        if not level:
+            cyclic = sorted(pending)
+            logger.warning("Tables with circular foreign keys are scheduled "
+                           "last: %s", ', '.join(cyclic))
+            levels.append(cyclic)
+            break
+        levels.append(level)
+        for table in level:
+            del pending[table]
+        for referenced in pending.values():
+            referenced.difference_update(level)
+    return levels
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of up to `size` copies of `connection`. Each copy is
+    used by one thread at a time and opens its own database connection.
+    """
+
+    def __init__(self, connection, size):
+        self.connection = connection
+        self.size = size
+        self._idle = queue.Queue()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._connections) < self.size:
+                connection = self.connection.copy()
+                self._connections.append(connection)
+                return connection
+        return self._idle.get()
+
+    def fill(self):
+        """
+        Opens the connections the pool hasn't opened yet and returns all of
+        its connections. Meant to be called before any is checked out.
+        """
+        with self._lock:
+            while len(self._connections) < self.size:
+                connection = self.connection.copy()
+                connection.ensure_connection()
+                self._connections.append(connection)
+                self._idle.put(connection)
+            return list(self._connections)
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+    @contextmanager
+    def lease(self):
+        """
+        Context manager checking a connection out of the pool.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._idle = queue.Queue()
+
+
+class TableScheduler(object):
+    """
+    Runs a task for every work item on `workers` threads, one topological
+    level at a time. Each task gets its own connections to `source` and
+    `dest`, with the destination's foreign key checks disabled.
+    """
+
+    def __init__(self, source, dest, workers=1):
+        self.workers = max(1, workers)
+        self.sources = ConnectionPool(source, self.workers)
+        self.dests = ConnectionPool(dest, self.workers)
+
+    def run_task(self, task, item):
+        with self.sources.lease() as source, self.dests.lease() as dest:
+            with dest.constraint_checks_disabled():
+                return task(item, source, dest)
+
+    def run(self, levels, task):
+        """
+        Calls `task(item, source, dest)` for every item of `levels`, a list
+        of lists of hashable work items, and returns an OrderedDict mapping
+        items to the task's results, in schedule order. The first failing
+        task's exception is re-raised once its level has finished.
+        """
+        results = OrderedDict()
+        pool = ThreadPool(self.workers)
+        try:
+            for level in levels:
+                logger.debug("Scheduling %d item(s).", len(level))
+                level_results = pool.map(
+                    lambda item: self.run_task(task, item), level,
+                    chunksize=1)
+                results.update(zip(level, level_results))
+        finally:
+            pool.close()
+            pool.join()
+        return results
+
+    def close(self):
+        self.sources.close()
+        self.dests.close()
@@ -0,0 +1,23 @@
+"""
+Fixture serialization formats provided by ibu, in addition to Django's.
+
+Each module implements Django's serializer interface (a Serializer class and
+a Deserializer function) and is registered under the file extension it
+handles, so that dump's --format and load's fixture discovery both pick it
+up, including compressed variants such as fixture.jsonl.gz.
+"""
+from __future__ import unicode_literals
+
+BUILTIN_SERIALIZERS = {
+    'jsonl': 'ibu.serializers.jsonl',
+}
+
+
+def register_serializers():
+    """
+    Registers ibu's serialization formats with Django's serializers
+    framework. Safe to call several times.
+    """
+    from django.core import serializers
+    for format, module in BUILTIN_SERIALIZERS.items():
+        serializers.register_serializer(format, module)
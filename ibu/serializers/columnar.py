@@ -0,0 +1,404 @@
+"""
+A compact columnar binary fixture format.
+
+A columnar fixture is a sequence of blocks, each holding up to
+BLOCK_ROWS rows of one table, stored column by column:
+
+    MAGIC
+    block*          uint32 header length, JSON header, column segments
+    index           JSON list of {"table", "offset", "rows"} for every block
+    uint64          offset of the index
+    MAGIC
+
+Every column has a null mask segment (one byte per row) followed by its
+values: a single typed array (array module, native byte order recorded in
+the header) for numbers, dates and times, or an array of end offsets plus the
+concatenated UTF-8 or raw bytes for variable-length values.
+
+Files are read through mmap: fixed-width columns are exposed as memoryview
+casts of the mapping, without being copied or parsed, and whole blocks of
+row tuples can be handed to a backend's bulk_insert_rows().
+
+Unlike the formats registered with Django's serializers framework, the
+format is row based rather than model based, so dump and load handle it
+themselves.
+
+The format requires Python 3, for the 64-bit array typecodes and
+memoryview.cast().
+"""
+from __future__ import unicode_literals
+
+import datetime
+import decimal
+import json
+import mmap
+import struct
+import sys
+import uuid
+from array import array
+from collections import namedtuple
+from itertools import islice
+
+import six
+from six.moves import zip
+
+FORMAT = 'columnar'
+MAGIC = b'IBUCOL\x01\n'
+BLOCK_ROWS = 10000
+
+_uint32 = struct.Struct('<I')
+_uint64 = struct.Struct('<Q')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MIDNIGHT = datetime.datetime.combine(_EPOCH.date(), datetime.time())
+
+
+class _UTC(datetime.tzinfo):
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return 'UTC'
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+
+utc = _UTC()
+
+
+def _microseconds(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _encode_datetime(value):
+    if value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return _microseconds(value - _EPOCH)
+
+
+def _decode_datetime(value):
+    return _EPOCH + datetime.timedelta(microseconds=value)
+
+
+def _decode_datetimetz(value):
+    return _decode_datetime(value).replace(tzinfo=utc)
+
+
+def _decode_time(value):
+    return (_MIDNIGHT + datetime.timedelta(microseconds=value)).time()
+
+
+def _to_text(value):
+    return six.text_type(value).encode('utf-8')
+
+
+def _from_text(data):
+    return bytes(data).decode('utf-8')
+
+
+# Fixed-width column types: type -> (array typecode, encode, decode).
+# None means the value is stored as is.
+FIXED_TYPES = {
+    'bool': ('b', int, bool),
+    'int': ('q', None, None),
+    'float': ('d', None, None),
+    'date': ('q', lambda value: value.toordinal(),
+             datetime.date.fromordinal),
+    'time': ('q', lambda value: _microseconds(
+        datetime.datetime.combine(_EPOCH.date(), value) - _MIDNIGHT),
+        _decode_time),
+    'datetime': ('q', _encode_datetime, _decode_datetime),
+    'datetimetz': ('q', _encode_datetime, _decode_datetimetz),
+    'timedelta': ('q', _microseconds,
+                  lambda value: datetime.timedelta(microseconds=value)),
+}
+
+# Variable-length column types: type -> (encode to bytes, decode from bytes).
+VARIABLE_TYPES = {
+    'text': (_to_text, _from_text),
+    'bytes': (bytes, bytes),
+    'bigint': (_to_text, lambda data: int(_from_text(data))),
+    'decimal': (_to_text, lambda data: decimal.Decimal(_from_text(data))),
+    'uuid': (_to_text, lambda data: uuid.UUID(_from_text(data))),
+    'json': (lambda value: json.dumps(value).encode('utf-8'),
+             lambda data: json.loads(_from_text(data))),
+}
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def column_type(values):
+    """
+    Returns the column type able to store all the non-null `values`.
+    """
+    types = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            types.add('bool')
+        elif isinstance(value, six.integer_types):
+            types.add('int' if _INT64_MIN <= value <= _INT64_MAX
+                      else 'bigint')
+        elif isinstance(value, float):
+            types.add('float')
+        elif isinstance(value, datetime.datetime):
+            types.add('datetime' if value.tzinfo is None else 'datetimetz')
+        elif isinstance(value, datetime.date):
+            types.add('date')
+        elif isinstance(value, datetime.time) and value.tzinfo is None:
+            types.add('time')
+        elif isinstance(value, datetime.timedelta):
+            types.add('timedelta')
+        elif isinstance(value, decimal.Decimal):
+            types.add('decimal')
+        elif isinstance(value, uuid.UUID):
+            types.add('uuid')
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            types.add('bytes')
+        elif isinstance(value, (dict, list)):
+            types.add('json')
+        else:
+            types.add('text')
+    if not types:
+        return 'text'
+    if types == set(['int', 'bigint']):
+        return 'bigint'
+    if len(types) > 1:
+        raise ValueError("Can't store a column mixing %s values."
+                         % ', '.join(sorted(types)))
+    return types.pop()
+
+
+def _check_python():
+    if six.PY2:
+        raise NotImplementedError("The %s format requires Python 3." % FORMAT)
+
+
+def _cast(buf, typecode, byteorder):
+    if byteorder == sys.byteorder:
+        return buf.cast(typecode)
+    values = array(typecode, bytes(buf))
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+
+class Column(namedtuple('Column', 'name type nulls data offsets')):
+    """
+    The stored values of one column of a block. `nulls` and `data` are
+    buffers over the file; `offsets` is only set for variable-length types.
+    """
+
+    def values(self):
+        """
+        Iterates over the column's decoded values.
+        """
+        nulls = self.nulls
+        if self.type in FIXED_TYPES:
+            decode = FIXED_TYPES[self.type][2]
+            for is_null, value in zip(nulls, self.data):
+                if is_null:
+                    yield None
+                else:
+                    yield value if decode is None else decode(value)
+        else:
+            decode = VARIABLE_TYPES[self.type][1]
+            data, offsets = self.data, self.offsets
+            start = 0
+            for is_null, end in zip(nulls, offsets):
+                yield None if is_null else decode(data[start:end])
+                start = end
+
+
+class Block(namedtuple('Block', 'table row_count columns')):
+    """
+    `row_count` rows of `table`, as a list of Columns.
+    """
+
+    @property
+    def column_names(self):
+        return [column.name for column in self.columns]
+
+    def rows(self):
+        """
+        Iterates over the block's rows as tuples.
+        """
+        return zip(*[column.values() for column in self.columns])
+
+
+class ColumnarWriter(object):
+    """
+    Writes columnar blocks to the binary file object `stream`, which must
+    be positioned at its start. close() writes the index; it doesn't close
+    `stream`.
+    """
+
+    def __init__(self, stream, block_rows=BLOCK_ROWS):
+        _check_python()
+        self.stream = stream
+        self.block_rows = block_rows
+        self.index = []
+        self.offset = 0
+        self._write(MAGIC)
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.offset += len(data)
+
+    def write_rows(self, table, columns, rows):
+        """
+        Writes the row tuples of the iterable `rows` as blocks of `table`
+        and returns the number of rows written.
+        """
+        rows = iter(rows)
+        count = 0
+        while True:
+            block = list(islice(rows, self.block_rows))
+            if not block:
+                return count
+            self.write_block(table, columns, block)
+            count += len(block)
+
+    def write_block(self, table, columns, rows):
+        """
+        Writes the list of row tuples `rows` as a single block.
+        """
+        segments = []
+        header_columns = []
+        for name, values in zip(columns, zip(*rows)):
+            type_ = column_type(values)
+            nulls = array('B', [value is None for value in values])
+            column = {'name': name, 'type': type_}
+            if type_ in FIXED_TYPES:
+                typecode, encode, _ = FIXED_TYPES[type_]
+                data = array(typecode, [
+                    0 if value is None else
+                    value if encode is None else encode(value)
+                    for value in values])
+                parts = [nulls, data]
+            else:
+                encode = VARIABLE_TYPES[type_][0]
+                chunks = [b'' if value is None else encode(value)
+                          for value in values]
+                offsets, end = array('Q'), 0
+                for chunk in chunks:
+                    end += len(chunk)
+                    offsets.append(end)
+                parts = [nulls, offsets, b''.join(chunks)]
+            column['segments'] = [len(_tobytes(part)) for part in parts]
+            segments.extend(parts)
+            header_columns.append(column)
+        header = json.dumps({
+            'table': table,
+            'rows': len(rows),
+            'byteorder': sys.byteorder,
+            'columns': header_columns,
+        }).encode('utf-8')
+        self.index.append({'table': table, 'offset': self.offset,
+                           'rows': len(rows)})
+        self._write(_uint32.pack(len(header)))
+        self._write(header)
+        for segment in segments:
+            self._write(_tobytes(segment))
+
+    def close(self):
+        index_offset = self.offset
+        self._write(json.dumps(self.index).encode('utf-8'))
+        self._write(_uint64.pack(index_offset))
+        self._write(MAGIC)
+
+
+def _tobytes(segment):
+    if isinstance(segment, array):
+        return segment.tobytes() if hasattr(segment, 'tobytes') \
+            else segment.tostring()
+    return segment
+
+
+class ColumnarReader(object):
+    """
+    Reads a columnar fixture from `fixture`: the path of an uncompressed
+    file, which is memory-mapped, or a file object, whose content is read
+    into memory (e.g. when it's decompressed on the fly).
+    """
+
+    def __init__(self, fixture):
+        _check_python()
+        self._file = self._mmap = None
+        if isinstance(fixture, six.string_types):
+            self._file = open(fixture, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+            self.buffer = memoryview(self._mmap)
+        else:
+            self.buffer = memoryview(fixture.read())
+        size = len(self.buffer)
+        trailer = len(MAGIC) + _uint64.size
+        if (size < len(MAGIC) + trailer or
+                self.buffer[:len(MAGIC)].tobytes() != MAGIC or
+                self.buffer[size - len(MAGIC):].tobytes() != MAGIC):
+            raise ValueError("Not a columnar fixture.")
+        index_offset = _uint64.unpack(
+            self.buffer[size - trailer:size - len(MAGIC)].tobytes())[0]
+        self.index = json.loads(
+            self.buffer[index_offset:size - trailer].tobytes().decode('utf-8'))
+
+    def tables(self):
+        """
+        Returns the names of the tables in the fixture, in file order.
+        """
+        names = []
+        for entry in self.index:
+            if entry['table'] not in names:
+                names.append(entry['table'])
+        return names
+
+    def read_block(self, offset):
+        """
+        Returns the Block stored at `offset`.
+        """
+        buf = self.buffer
+        length = _uint32.unpack(buf[offset:offset + _uint32.size].tobytes())[0]
+        position = offset + _uint32.size
+        header = json.loads(
+            buf[position:position + length].tobytes().decode('utf-8'))
+        position += length
+        byteorder = header['byteorder']
+        columns = []
+        for column in header['columns']:
+            parts = []
+            for size in column['segments']:
+                parts.append(buf[position:position + size])
+                position += size
+            nulls = _cast(parts[0], 'B', byteorder)
+            if column['type'] in FIXED_TYPES:
+                typecode = FIXED_TYPES[column['type']][0]
+                columns.append(Column(column['name'], column['type'], nulls,
+                                      _cast(parts[1], typecode, byteorder),
+                                      None))
+            else:
+                columns.append(Column(column['name'], column['type'], nulls,
+                                      parts[2],
+                                      _cast(parts[1], 'Q', byteorder)))
+        return Block(header['table'], header['rows'], columns)
+
+    def blocks(self, table=None):
+        """
+        Iterates over the fixture's blocks, or only those of `table`.
+        """
+        for entry in self.index:
+            if table is None or entry['table'] == table:
+                yield self.read_block(entry['offset'])
+
+    def close(self):
+        self.buffer = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Blocks still reference the mapping; it's unmapped once
+                # they're garbage collected.
+                pass
+            self._file.close()
@@ -0,0 +1,79 @@
+"""
+Serialize data to/from JSON Lines: one JSON object per line.
+
+Unlike the JSON format, which writes and parses a single array, objects are
+written as soon as they're serialized and read back one line at a time, so
+neither dump nor load ever holds more than one object in memory.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import json
+import sys
+
+import six
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import (
+    Deserializer as PythonDeserializer, Serializer as PythonSerializer,
+)
+
+
+class Serializer(PythonSerializer):
+    """
+    Convert a queryset to JSON Lines.
+    """
+    internal_use_only = False
+
+    def _init_options(self):
+        self.json_kwargs = self.options.copy()
+        self.json_kwargs.pop('stream', None)
+        self.json_kwargs.pop('fields', None)
+        # Every object must fit on one line.
+        self.json_kwargs.pop('indent', None)
+        self.json_kwargs['separators'] = (',', ': ')
+        self.json_kwargs.setdefault('cls', DjangoJSONEncoder)
+
+    def start_serialization(self):
+        self._init_options()
+
+    def end_serialization(self):
+        pass
+
+    def end_object(self, obj):
+        # self._current has the field data
+        json.dump(self.get_dump_object(obj), self.stream, **self.json_kwargs)
+        self.stream.write('\n')
+        self._current = None
+
+    def getvalue(self):
+        # Grand-parent super
+        return super(PythonSerializer, self).getvalue()
+
+
+def _lines(stream_or_string):
+    if isinstance(stream_or_string, (bytes, six.text_type)):
+        return stream_or_string.splitlines()
+    if not hasattr(stream_or_string, '__iter__'):
+        # Readers such as zip members may only support read().
+        return stream_or_string.read().splitlines()
+    return stream_or_string
+
+
+def Deserializer(stream_or_string, **options):
+    """
+    Deserialize a stream or string of JSON Lines data, one line at a time.
+    """
+    for line in _lines(stream_or_string):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            for obj in PythonDeserializer([json.loads(line)], **options):
+                yield obj
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            # Map to deserializer error
+            six.reraise(DeserializationError, DeserializationError(e),
+                        sys.exc_info()[2])
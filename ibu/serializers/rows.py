@@ -0,0 +1,209 @@
+"""
+Raw table rows as JSON Lines.
+
+A rows fixture holds whole tables rather than model instances. Each table
+starts with a header object naming its columns, followed by one JSON array
+per row, in column order:
+
+    {"table": "library_book", "columns": ["id", "title", "author_id"]}
+    [1, "Dune", 7]
+    [2, "Emma", 3]
+
+dump --raw writes it straight from cursor rows and introspected column
+names, and load hands its rows to the backend's bulk_insert_rows(), so
+neither side needs models. Values are encoded losslessly by RowEncoder.
+Binary and temporal values are written as objects tagged with their type,
+and read back as the same Python values, ready for the bulk writers:
+
+    {"$bytes": "<base64>"}
+    {"$date": "2017-01-02"}
+    {"$time": "03:04:05.000006"}
+    {"$datetime": "2017-01-02T03:04:05.000006+00:00"}
+    {"$duration": "-P1DT02H03M04.000005S"}
+
+Aware datetimes are read back in UTC. Decimals, UUIDs and aware times are
+written as strings, which the databases cast to the column type on insert.
+
+Like the columnar format, it's row based rather than model based, so dump
+and load handle it themselves.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import base64
+import datetime
+import decimal
+import json
+import re
+import uuid
+from collections import OrderedDict
+from itertools import groupby
+
+import six
+
+from .columnar import utc
+
+FORMAT = 'rows'
+BYTES_KEY = '$bytes'
+DATE_KEY = '$date'
+TIME_KEY = '$time'
+DATETIME_KEY = '$datetime'
+DURATION_KEY = '$duration'
+
+_time_re = re.compile(
+    r'(\d{2}):(\d{2}):(\d{2})(?:\.(\d{6}))?(?:([+-])(\d{2}):(\d{2}))?$')
+_duration_re = re.compile(r'(-?)P(\d+)DT(\d{2})H(\d{2})M(\d{2})\.(\d{6})S$')
+
+
+def duration_iso_string(duration):
+    """
+    Returns the timedelta `duration` as an ISO 8601 duration, such as
+    'P1DT02H03M04.000005S'.
+    """
+    sign = ''
+    if duration < datetime.timedelta(0):
+        sign, duration = '-', -duration
+    minutes, seconds = divmod(duration.seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return '%sP%dDT%02dH%02dM%02d.%06dS' % (
+        sign, duration.days, hours, minutes, seconds, duration.microseconds)
+
+
+def parse_duration(value):
+    """
+    Returns the timedelta of the ISO 8601 duration `value`, as written by
+    duration_iso_string().
+    """
+    match = _duration_re.match(value)
+    if match is None:
+        raise ValueError("Invalid duration: '%s'." % value)
+    sign, days, hours, minutes, seconds, microseconds = match.groups()
+    duration = datetime.timedelta(
+        days=int(days), hours=int(hours), minutes=int(minutes),
+        seconds=int(seconds), microseconds=int(microseconds))
+    return -duration if sign else duration
+
+
+def _parse_time(value):
+    """
+    Returns the time of the ISO 8601 time `value` and its UTC offset, or
+    None if it has none.
+    """
+    match = _time_re.match(value)
+    if match is None:
+        raise ValueError("Invalid time: '%s'." % value)
+    hour, minute, second, microsecond, sign, offset_hours, offset_minutes = \
+        match.groups()
+    time = datetime.time(int(hour), int(minute), int(second),
+                         int(microsecond or 0))
+    if sign is None:
+        return time, None
+    offset = datetime.timedelta(hours=int(offset_hours),
+                                minutes=int(offset_minutes))
+    return time, -offset if sign == '-' else offset
+
+
+def _parse_date(value):
+    return datetime.date(*[int(part) for part in value.split('-')])
+
+
+def _parse_datetime(value):
+    date, time = value.split('T')
+    time, offset = _parse_time(time)
+    value = datetime.datetime.combine(_parse_date(date), time)
+    if offset is None:
+        return value
+    return (value - offset).replace(tzinfo=utc)
+
+
+DECODERS = {
+    BYTES_KEY: base64.b64decode,
+    DATE_KEY: _parse_date,
+    TIME_KEY: lambda value: _parse_time(value)[0],
+    DATETIME_KEY: _parse_datetime,
+    DURATION_KEY: parse_duration,
+}
+
+
+class RowEncoder(json.JSONEncoder):
+    """
+    A JSON encoder that doesn't lose any part of the values of database
+    rows.
+    """
+
+    def default(self, o):
+        if isinstance(o, (bytes, bytearray, memoryview)):
+            return {BYTES_KEY: base64.b64encode(bytes(o)).decode('ascii')}
+        if isinstance(o, datetime.datetime):
+            return {DATETIME_KEY: o.isoformat()}
+        if isinstance(o, datetime.date):
+            return {DATE_KEY: o.isoformat()}
+        if isinstance(o, datetime.time):
+            # A time's UTC offset depends on its date, so aware times stay
+            # strings.
+            if o.tzinfo is not None:
+                return o.isoformat()
+            return {TIME_KEY: o.isoformat()}
+        if isinstance(o, datetime.timedelta):
+            return {DURATION_KEY: duration_iso_string(o)}
+        if isinstance(o, (decimal.Decimal, uuid.UUID)):
+            return six.text_type(o)
+        return super(RowEncoder, self).default(o)
+
+
+def _decode_object(obj):
+    if len(obj) == 1:
+        key, value = next(iter(obj.items()))
+        if key in DECODERS:
+            return DECODERS[key](value)
+    return obj
+
+
+class RowWriter(object):
+    """
+    Writes tables of row tuples to the text stream `stream`.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.encode = RowEncoder(separators=(',', ':')).encode
+
+    def write_rows(self, table, columns, rows):
+        """
+        Writes the header of `table` and the row tuples of the iterable
+        `rows`, and returns the number of rows written.
+        """
+        write, encode = self.stream.write, self.encode
+        write(json.dumps(OrderedDict([('table', table),
+                                      ('columns', list(columns))])) + '\n')
+        count = 0
+        for count, row in enumerate(rows, 1):
+            write(encode(row) + '\n')
+        return count
+
+
+def _values(stream):
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if line.strip():
+            yield json.loads(line, object_hook=_decode_object)
+
+
+def read_tables(stream):
+    """
+    Iterates over the tables of the rows fixture `stream` (a text or binary
+    file object) as (table, columns, rows), where `rows` lazily yields row
+    tuples and must be consumed before the next table is read.
+    """
+    header = None
+    for is_header, values in groupby(_values(stream),
+                                     lambda value: isinstance(value, dict)):
+        if is_header:
+            # Tables without rows are just consecutive headers.
+            for header in values:
+                pass
+        elif header is None:
+            raise ValueError("Rows fixture doesn't start with a table header.")
+        else:
+            yield (header['table'], header['columns'],
+                   (tuple(row) for row in values))
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Sharded fixture directories.
+
+A sharded dump is a directory of fixture files, each holding at most a given
+number of objects (or bytes) of a single model, and a manifest.json index:
+
+    {
+        "format": "jsonl",
+        "shards": [
+            {"file": "app.model.0001.jsonl.gz", "model": "app.model",
+             "rows": 100000, "bytes": 1834921, "sha256": "..."},
+            ...
+        ]
+    }
+
+Shards are listed in dependency order, so that a model's shards only
+reference models listed earlier. Each shard is an ordinary fixture, which
+makes it possible to load shards in parallel, and to reload a single one.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+
+import six
+
+MANIFEST_NAME = 'manifest.json'
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST_NAME)
+
+
+def is_shard_dir(path):
+    """
+    Returns True if `path` is a sharded dump directory.
+    """
+    return os.path.isdir(path) and os.path.isfile(manifest_path(path))
+
+
+def file_sha256(path):
+    """
+    Returns the hex SHA-256 digest of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    with io.open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def shard_entry(directory, name, model, rows):
+    """
+    Returns the manifest entry of the shard file `name`, just written.
+    """
+    path = os.path.join(directory, name)
+    return OrderedDict([
+        ('file', name),
+        ('model', model),
+        ('rows', rows),
+        ('bytes', os.path.getsize(path)),
+        ('sha256', file_sha256(path)),
+    ])
+
+
+def write_manifest(directory, format, shards):
+    """
+    Writes the manifest of the shards of `directory`, replacing any previous
+    one atomically.
+    """
+    path = manifest_path(directory)
+    tmp_path = '%s.tmp' % path
+    data = json.dumps(OrderedDict([('format', format), ('shards', shards)]),
+                      indent=2)
+    with io.open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.rename(tmp_path, path)
+
+
+def read_manifest(directory):
+    with io.open(manifest_path(directory), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_shard(directory, shard):
+    """
+    Raises ValueError if the shard's file doesn't match its manifest entry.
+    """
+    path = os.path.join(directory, shard['file'])
+    if os.path.getsize(path) != shard['bytes'] or \
+            file_sha256(path) != shard['sha256']:
+        raise ValueError("Shard '%s' doesn't match its checksum." % path)
+
+
+def shard_levels(shards):
+    """
+    Groups the manifest's `shards` into lists of shards of the same model,
+    in manifest order. The shards of one level can be loaded concurrently.
+    """
+    levels = []
+    for shard in shards:
+        if levels and levels[-1][0]['model'] == shard['model']:
+            levels[-1].append(shard)
+        else:
+            levels.append([shard])
+    return levels
+
+
+class CountingStream(object):
+    """
+    Wraps the text or binary stream `stream`, counting the bytes written
+    through it. Text is counted once encoded with the stream's encoding.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.encoding = getattr(stream, 'encoding', None) or 'utf-8'
+        self.count = 0
+
+    def write(self, data):
+        if isinstance(data, six.text_type):
+            self.count += len(data.encode(self.encoding))
+        else:
+            self.count += len(data)
+        return self.stream.write(data)
+
+    def __getattr__(self, attr):
+        return getattr(self.stream, attr)
@@ -0,0 +1,614 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming table copy between the databases declared in manifest.yml.
+
+Rows are read through the source backend's cursor and handed to the
+destination backend's bulk writer as plain tuples, at most ``batch_size``
+rows at a time. Nothing is written to disk and no model instances are built
+on the way.
+
+Every table, or primary key range of a table, is written in its own
+destination transaction and recorded in a checkpoint journal once committed,
+so an interrupted copy can be resumed without redoing finished work.
+
+With the ``snapshot`` option, the source connections all read from one
+synchronized snapshot, so concurrently copied tables and key ranges are
+consistent with each other, as of the moment the copy started.
+
+With ``rebuild_indexes``, the destination tables' secondary indexes are
+dropped before the copy and rebuilt after it, several tables at a time.
+Their definitions are saved first (see checkpoint.IndexDefinitions), so a
+crash in between doesn't lose them: the next such run rebuilds them.
+
+With ``defer_foreign_keys``, the destination tables' foreign keys are
+dropped before the copy, saved the same way (see
+checkpoint.ForeignKeyDefinitions), and added back NOT VALID after it, which
+doesn't scan the tables. They're then validated concurrently, each with
+ALTER TABLE ... VALIDATE CONSTRAINT in its own transaction, which only
+takes a SHARE UPDATE EXCLUSIVE lock (see integrity.validate_constraints()).
+This needs a backend that can defer foreign key validation.
+
+Incremental copies only read the rows above each table's last synced high
+watermark (its primary key, or the column configured under
+``copy.watermarks`` in manifest.yml) and upsert them into the destination.
+"""
+from __future__ import unicode_literals
+
+import logging
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from importlib import import_module
+
+from ibu.backends.base.base import ImproperlyConfigured
+from ibu.backends.utils import cached_property
+from ibu.chunking import KeyRange, key_ranges
+from ibu.connection import DATABASE_ENGINES
+from ibu.integrity import validate_constraints, validate_foreign_keys
+from ibu.scheduler import TableScheduler, topological_levels
+
+logger = logging.getLogger('ibu.transfer')
+
+SOURCE_ALIAS = 'src'
+DEST_ALIAS = 'dest'
+DEFAULT_BATCH_SIZE = 10000
+
+# A unit of copy work: the rows of `table` within `key_range` (None for the
+# whole table). `key` identifies it in the checkpoint journal.
+Chunk = namedtuple('Chunk', 'table key_range key')
+
+
+def database_settings(config, alias):
+    """
+    Translates the manifest entry for `alias` into the settings dictionary
+    expected by a backend's DatabaseWrapper.
+    """
+    try:
+        entry = config[alias]
+    except (KeyError, TypeError):
+        raise ImproperlyConfigured(
+            "manifest.yml doesn't declare a '%s' database." % alias)
+    try:
+        engine = DATABASE_ENGINES[entry['adapter']]
+    except KeyError:
+        raise ImproperlyConfigured(
+            "'%s' isn't a supported adapter for the '%s' database. Try one "
+            "of: %s" % (entry.get('adapter'), alias,
+                        ', '.join(sorted(DATABASE_ENGINES))))
+    if not engine:
+        raise ImproperlyConfigured(
+            "The '%s' adapter has no backend yet." % entry['adapter'])
+    db = entry.get('db') or {}
+    return {
+        'ENGINE': engine,
+        'NAME': db.get('name', ''),
+        'USER': db.get('user', ''),
+        'PASSWORD': db.get('pass', ''),
+        'HOST': db.get('host', ''),
+        'PORT': db.get('port', ''),
+        'OPTIONS': db.get('options') or {},
+        'ATOMIC_REQUESTS': False,
+        'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': 0,
+        'TIME_ZONE': None,
+    }
+
+
+def open_connection(config, alias):
+    """
+    Returns a DatabaseWrapper for the manifest database `alias`. The
+    connection itself is opened lazily on first use.
+    """
+    settings_dict = database_settings(config, alias)
+    backend = import_module('%s.base' % settings_dict['ENGINE'])
+    # The transfer engine owns every wrapper it creates, so it's responsible
+    # for keeping each one on a single thread at a time.
+    return backend.DatabaseWrapper(settings_dict, alias,
+                                   allow_thread_sharing=True)
+
+
+class TableTransfer(object):
+    """
+    Copies the rows of one table from `source` to `dest`, optionally limited
+    to the primary key range `key_range` (a chunking.KeyRange).
+
+    With a `watermark` column, only the rows whose value is above `since`
+    (or equal to it, if `inclusive`) are read, and the highest value copied
+    is kept in `high_watermark` (None if nothing was copied). With
+    `key_columns`, rows are upserted on those columns instead of inserted.
+    """
+
+    def __init__(self, source, dest, table, batch_size=DEFAULT_BATCH_SIZE,
+                 key_range=None, watermark=None, since=None, inclusive=False,
+                 key_columns=None):
+        self.source = source
+        self.dest = dest
+        self.table = table
+        self.batch_size = batch_size
+        self.key_range = key_range
+        self.watermark = watermark
+        self.since = since
+        self.inclusive = inclusive
+        self.key_columns = key_columns
+        self.high_watermark = None
+
+    @cached_property
+    def columns(self):
+        """
+        The names of the columns present in both the source and the
+        destination table, in source order.
+        """
+        with self.source.cursor() as cursor:
+            source_columns = [
+                info.name for info in
+                self.source.introspection.get_table_description(
+                    cursor, self.table)
+            ]
+        with self.dest.cursor() as cursor:
+            dest_columns = set(
+                info.name for info in
+                self.dest.introspection.get_table_description(
+                    cursor, self.table)
+            )
+        return [column for column in source_columns
+                if column in dest_columns]
+
+    def where_sql(self, connection):
+        """
+        Returns (sql, params) for the WHERE clause limiting a statement on
+        `connection` to `key_range`; ('', None) when there's no limit.
+        """
+        conditions, params = [], []
+        if self.key_range is not None:
+            where, range_params = self.key_range.sql(
+                connection.ops.quote_name)
+            if where:
+                conditions.append(where)
+                params.extend(range_params)
+        if self.watermark is not None and self.since is not None:
+            conditions.append('%s %s %%s' % (
+                connection.ops.quote_name(self.watermark),
+                '>=' if self.inclusive else '>'))
+            params.append(self.since)
+        if not conditions:
+            return '', None
+        return ' WHERE ' + ' AND '.join(conditions), params
+
+    def select_sql(self):
+        """
+        Returns (sql, params) selecting the rows to copy.
+        """
+        qn = self.source.ops.quote_name
+        where, params = self.where_sql(self.source)
+        sql = 'SELECT %s FROM %s%s' % (
+            ', '.join(qn(column) for column in self.columns),
+            qn(self.table),
+            where,
+        )
+        return sql, params
+
+    def clear(self):
+        """
+        Deletes the destination rows this transfer would write, undoing a
+        previous attempt that may or may not have been committed.
+        """
+        where, params = self.where_sql(self.dest)
+        with self.dest.cursor() as cursor:
+            cursor.execute('DELETE FROM %s%s' % (
+                self.dest.ops.quote_name(self.table), where), params)
+
+    def batches(self):
+        """
+        Yields lists of at most `batch_size` row tuples read from the source
+        table.
+        """
+        # Build the query first: introspecting the columns needs its own
+        # cursor, which a pending streaming result would block on MySQL.
+        sql, params = self.select_sql()
+        with self.source.read_transaction():
+            with self.source.cursor(streaming=True) as cursor:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    def check_watermark(self):
+        """
+        Raises ImproperlyConfigured unless the watermark column is copied,
+        i.e. it's in both the source and the destination table.
+        """
+        if self.watermark not in self.columns:
+            raise ImproperlyConfigured(
+                "The watermark column '%s' of table '%s' must exist in both "
+                "the source and the destination." % (self.watermark,
+                                                     self.table))
+
+    def run(self):
+        """
+        Copies the table and returns the number of rows written.
+        """
+        if not self.columns:
+            logger.warning("Table '%s' has no columns in common between the "
+                           "source and destination; skipping.", self.table)
+            return 0
+        if self.watermark is not None:
+            self.check_watermark()
+            position = self.columns.index(self.watermark)
+        count = 0
+        for rows in self.batches():
+            if self.key_columns:
+                count += self.dest.bulk_upsert_rows(
+                    self.table, self.columns, rows, self.key_columns)
+            else:
+                count += self.dest.bulk_insert_rows(
+                    self.table, self.columns, rows)
+            if self.watermark is not None:
+                values = [row[position] for row in rows
+                          if row[position] is not None]
+                if values:
+                    highest = max(values)
+                    if self.high_watermark is None or \
+                            highest > self.high_watermark:
+                        self.high_watermark = highest
+            logger.debug("Copied %d row(s) of '%s'.", count, self.table)
+        return count
+
+
+class Transfer(object):
+    """
+    Copies tables from the manifest's source database to its destination.
+
+    `config` is the parsed manifest (Config().config). Options left as None
+    fall back to the manifest's ``copy`` section. Progress is recorded in the
+    checkpoint `journal` (a checkpoint.Journal), if given.
+
+    Passing `watermarks` (a checkpoint.Watermarks) makes the copy
+    incremental: tables aren't split into key ranges, only the rows above
+    the stored watermarks are read, and they're upserted into `dest`.
+
+    With `snapshot`, every source connection reads from the same snapshot
+    (see BaseDatabaseWrapper.synchronized_snapshot()).
+
+    Passing `indexes` (a checkpoint.IndexDefinitions) makes the copy drop
+    the destination tables' secondary indexes first and rebuild them last.
+    Passing `foreign_keys` (a checkpoint.ForeignKeyDefinitions) does the
+    same with their foreign keys, which are then validated concurrently;
+    the foreign keys that failed validation are left NOT VALID and listed
+    in `invalid_constraints`.
+    """
+
+    def __init__(self, config, tables=None, exclude=None, batch_size=None,
+                 workers=None, chunks=None, journal=None, watermarks=None,
+                 snapshot=None, indexes=None, foreign_keys=None,
+                 source_alias=SOURCE_ALIAS, dest_alias=DEST_ALIAS):
+        options = config.get('copy') or {}
+        self.config = config
+        self.tables = tables or options.get('tables') or []
+        self.exclude = set(exclude or options.get('exclude') or [])
+        self.batch_size = (batch_size or options.get('batch_size') or
+                           DEFAULT_BATCH_SIZE)
+        self.workers = workers or options.get('workers') or 1
+        self.chunks = chunks or options.get('chunks') or 1
+        self.journal = journal
+        self.watermarks = watermarks
+        self.watermark_columns = options.get('watermarks') or {}
+        self.snapshot = (snapshot if snapshot is not None
+                         else options.get('snapshot', False))
+        self.indexes = indexes
+        self.foreign_keys = foreign_keys
+        self.invalid_constraints = []
+        self.source = open_connection(config, source_alias)
+        self.dest = open_connection(config, dest_alias)
+
+    def table_names(self):
+        """
+        Returns the source tables to copy, honoring the ``tables`` and
+        ``exclude`` options.
+        """
+        with self.source.cursor() as cursor:
+            names = self.source.introspection.table_names(cursor)
+        if self.tables:
+            unknown = set(self.tables).difference(names)
+            if unknown:
+                raise ImproperlyConfigured(
+                    "Unknown source table(s): %s" % ', '.join(sorted(unknown)))
+            names = [name for name in names if name in self.tables]
+        return [name for name in names if name not in self.exclude]
+
+    def schedule(self, tables):
+        """
+        Returns `tables` grouped into foreign key dependency levels.
+        """
+        try:
+            with self.source.cursor() as cursor:
+                dependencies = self.source.introspection\
+                    .get_table_dependencies(cursor, tables)
+        except NotImplementedError:
+            dependencies = dict((table, set()) for table in tables)
+        return topological_levels(dependencies)
+
+    def watermark_column(self, table):
+        """
+        Returns (column, inclusive) for the watermark of `table`: the column
+        configured in the manifest, or the primary key. Rows sharing the
+        last value of a configured column may have been written after the
+        previous sync, so that value is read again.
+        """
+        if table in self.watermark_columns:
+            return self.watermark_columns[table], True
+        with self.source.cursor() as cursor:
+            column = self.source.introspection.get_primary_key_column(
+                cursor, table)
+        return column, False
+
+    def check_watermarks(self, tables):
+        """
+        Raises ImproperlyConfigured if the watermark of any of `tables` can't
+        be used, before anything is copied.
+        """
+        for table in tables:
+            column, _ = self.watermark_column(table)
+            if column is None:
+                raise ImproperlyConfigured(
+                    "Table '%s' needs a primary key for an incremental copy."
+                    % table)
+            transfer = TableTransfer(self.source, self.dest, table,
+                                     watermark=column)
+            if transfer.columns:
+                transfer.check_watermark()
+
+    def key_ranges(self, table):
+        """
+        Returns the key ranges `table` is split into, or None to copy it
+        whole. A resumed copy reuses the ranges of the interrupted one.
+        """
+        if self.journal is None:
+            return key_ranges(self.source, table, self.chunks)
+        if table in self.journal.plans:
+            ranges = [KeyRange(*bounds) for bounds in self.journal.plans[table]]
+        else:
+            ranges = key_ranges(self.source, table, self.chunks)
+            self.journal.plan(table, [list(key_range)
+                                      for key_range in ranges or []])
+        return ranges or None
+
+    def split(self, tables):
+        """
+        Returns the Chunks of `tables`. Tables with a single-column primary
+        key are split into up to `chunks` key ranges; other tables are copied
+        whole, with a key_range of None.
+        """
+        chunks = []
+        for table in tables:
+            ranges = None if self.watermarks else self.key_ranges(table)
+            if ranges is None:
+                chunks.append(Chunk(table, None, table))
+            else:
+                chunks.extend(Chunk(table, key_range, '%s:%d' % (table, i))
+                              for i, key_range in enumerate(ranges))
+        return chunks
+
+    def table_transfer(self, chunk, source, dest):
+        """
+        Returns the TableTransfer copying `chunk`.
+        """
+        transfer = TableTransfer(source, dest, chunk.table,
+                                 batch_size=self.batch_size,
+                                 key_range=chunk.key_range)
+        if self.watermarks is None:
+            return transfer
+        column, inclusive = self.watermark_column(chunk.table)
+        with dest.cursor() as cursor:
+            key_column = dest.introspection.get_primary_key_column(
+                cursor, chunk.table)
+        if column is None or key_column is None:
+            raise ImproperlyConfigured(
+                "Table '%s' needs a primary key for an incremental copy."
+                % chunk.table)
+        transfer.watermark = column
+        transfer.since = self.watermarks.get(chunk.table, column)
+        transfer.inclusive = inclusive
+        transfer.key_columns = [key_column]
+        return transfer
+
+    def copy_chunk(self, chunk, source, dest):
+        """
+        Copies `chunk` in a single destination transaction and records it in
+        the journal once committed.
+        """
+        transfer = self.table_transfer(chunk, source, dest)
+        # Upserts are idempotent: an interrupted incremental copy is simply
+        # run again.
+        dirty = (self.journal is not None and self.watermarks is None and
+                 self.journal.is_dirty(chunk.key))
+        if self.journal is not None:
+            self.journal.start(chunk.key)
+        with dest.transaction():
+            if dirty:
+                logger.info("Clearing '%s' left over from an interrupted "
+                            "copy.", chunk.key)
+                transfer.clear()
+            count = transfer.run()
+        if transfer.high_watermark is not None:
+            self.watermarks.set(chunk.table, transfer.watermark,
+                                transfer.high_watermark)
+        if self.journal is not None:
+            self.journal.finish(chunk.key, rows=count)
+        logger.info("Copied %d row(s) of '%s'.", count, chunk.key)
+        return count
+
+    def drop_indexes(self, tables):
+        """
+        Saves the definitions of the secondary indexes of the destination
+        `tables`, then drops them.
+        """
+        qn = self.dest.ops.quote_name
+        template = self.dest.SchemaEditorClass.sql_delete_index
+        for table in tables:
+            with self.dest.cursor() as cursor:
+                try:
+                    definitions = self.dest.introspection\
+                        .get_index_definitions(cursor, table)
+                except NotImplementedError:
+                    logger.warning("The destination backend can't introspect "
+                                   "indexes; they're kept during the copy.")
+                    return
+            if not definitions:
+                continue
+            # Saved first: from here on, they must not be lost.
+            self.indexes.add(table, definitions)
+            with self.dest.cursor() as cursor:
+                for name in definitions:
+                    cursor.execute(template % {'table': qn(table),
+                                               'name': qn(name)})
+            logger.info("Dropped %d index(es) of '%s'.", len(definitions),
+                        table)
+
+    def rebuild_table_indexes(self, table, source, dest):
+        """
+        Creates the saved indexes of `table` that don't exist, and forgets
+        their definitions.
+        """
+        with dest.cursor() as cursor:
+            existing = dest.introspection.get_index_definitions(cursor, table)
+            definitions = self.indexes.get(table)
+            for name, sql in sorted(definitions.items()):
+                if name not in existing:
+                    cursor.execute(sql)
+        self.indexes.remove(table)
+        logger.info("Rebuilt %d index(es) of '%s'.", len(definitions), table)
+
+    def rebuild_indexes(self, scheduler):
+        """
+        Rebuilds every saved index, the indexes of up to `workers` tables at
+        a time.
+        """
+        tables = self.indexes.tables()
+        if tables:
+            scheduler.run([tables], self.rebuild_table_indexes)
+
+    def drop_foreign_keys(self, tables):
+        """
+        Saves the definitions of the foreign keys of the destination
+        `tables`, then drops them.
+        """
+        if not self.dest.features.can_defer_foreign_key_validation:
+            logger.warning("The destination backend can't defer foreign key "
+                           "validation; foreign keys are kept during the "
+                           "copy.")
+            return
+        qn = self.dest.ops.quote_name
+        template = self.dest.SchemaEditorClass.sql_delete_fk
+        for table in tables:
+            with self.dest.cursor() as cursor:
+                definitions = self.dest.introspection\
+                    .get_foreign_key_definitions(cursor, table)
+            if not definitions:
+                continue
+            # Saved first: from here on, they must not be lost.
+            self.foreign_keys.add(table, definitions)
+            with self.dest.cursor() as cursor:
+                for name in definitions:
+                    cursor.execute(template % {'table': qn(table),
+                                               'name': qn(name)})
+            logger.info("Dropped %d foreign key(s) of '%s'.",
+                        len(definitions), table)
+
+    def restore_foreign_keys(self):
+        """
+        Adds every saved foreign key that doesn't exist back NOT VALID and
+        forgets their definitions, then validates the NOT VALID foreign keys
+        of those tables, `workers` at a time.
+        """
+        tables = self.foreign_keys.tables()
+        if not tables:
+            return
+        editor = self.dest.schema_editor(validate_foreign_keys=False)
+        # Adding NOT VALID foreign keys doesn't scan the tables, but locks
+        # both ends of each: one at a time is as fast as it gets.
+        for table in tables:
+            with self.dest.cursor() as cursor:
+                existing = self.dest.introspection\
+                    .get_foreign_key_definitions(cursor, table)
+            definitions = self.foreign_keys.get(table)
+            for name, definition in sorted(definitions.items()):
+                if name not in existing:
+                    editor.add_foreign_key_definition(table, name, definition)
+            self.foreign_keys.remove(table)
+        self.invalid_constraints = validate_constraints(self.dest, tables,
+                                                        self.workers)
+
+    @contextmanager
+    def source_snapshot(self, scheduler):
+        """
+        Context manager sharing one snapshot between the source connection,
+        used to plan the copy, and all of the scheduler's source connections,
+        if the `snapshot` option is set.
+        """
+        if not self.snapshot:
+            yield
+            return
+        with self.source.synchronized_snapshot(scheduler.sources.fill()):
+            logger.info("Reading the source from a synchronized snapshot.")
+            yield
+
+    def validate(self, tables=None):
+        """
+        Checks the foreign keys of the destination `tables` (by default the
+        selected source tables) for orphaned rows, `workers` at a time, and
+        returns the report of integrity.validate_foreign_keys().
+        """
+        if tables is None:
+            tables = self.table_names()
+        try:
+            return validate_foreign_keys(self.dest, tables, self.workers)
+        finally:
+            self.source.close()
+            self.dest.close()
+
+    def run(self):
+        """
+        Copies every selected table and returns an OrderedDict mapping table
+        names to the number of rows written.
+
+        Tables are copied in foreign key dependency order. Up to `workers`
+        independent tables, or primary key ranges of the same table, are
+        copied concurrently. Chunks the journal records as finished are
+        skipped; their journaled row counts are included in the result.
+        """
+        scheduler = TableScheduler(self.source, self.dest, self.workers)
+        try:
+            with self.source_snapshot(scheduler):
+                counts = OrderedDict()
+                levels = []
+                tables = self.table_names()
+                if self.watermarks is not None:
+                    self.check_watermarks(tables)
+                for level in self.schedule(tables):
+                    pending = []
+                    for chunk in self.split(level):
+                        counts.setdefault(chunk.table, 0)
+                        if (self.journal is not None and
+                                self.journal.is_finished(chunk.key)):
+                            counts[chunk.table] += \
+                                self.journal.finished[chunk.key]['rows']
+                        else:
+                            pending.append(chunk)
+                    levels.append(pending)
+                if self.indexes is not None:
+                    self.drop_indexes(list(counts))
+                if self.foreign_keys is not None:
+                    self.drop_foreign_keys(list(counts))
+                for chunk, count in scheduler.run(levels,
+                                                  self.copy_chunk).items():
+                    counts[chunk.table] += count
+            if self.indexes is not None:
+                self.rebuild_indexes(scheduler)
+            if self.foreign_keys is not None:
+                self.restore_foreign_keys()
+            return counts
+        finally:
+            scheduler.close()
+            self.source.close()
+            self.dest.close()
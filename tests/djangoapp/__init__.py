@@ -0,0 +1,43 @@
+"""
+A Django app for the tests of the management commands and serializers, over
+a SQLite database file. Tests using it are skipped when Django isn't
+installed.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import django
+except ImportError:
+    django = None
+
+skip_unless_django = unittest.skipIf(django is None, "Django isn't installed.")
+
+
+def setup():
+    """
+    Configures Django, once, and creates the app's tables.
+    """
+    from django.conf import settings
+    if settings.configured:
+        return
+    directory = tempfile.mkdtemp()
+    settings.configure(
+        DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            # A file rather than :memory:, which is private to each thread.
+            'NAME': os.path.join(directory, 'db.sqlite3'),
+        }},
+        INSTALLED_APPS=[__name__],
+    )
+    django.setup()
+    atexit.register(shutil.rmtree, directory, True)
+
+    from django.apps import apps
+    from django.db import connection
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config('djangoapp').get_models():
+            editor.create_model(model)
@@ -0,0 +1,13 @@
+from __future__ import unicode_literals
+
+from django.db import models
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+
+
+class Book(models.Model):
+    title = models.CharField(max_length=100)
+    author = models.ForeignKey(Author, models.CASCADE)
+    published = models.DateField(null=True)
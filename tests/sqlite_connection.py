@@ -0,0 +1,222 @@
+"""
+A stand-in for ibu's database wrappers, over a SQLite database file, for the
+tests of the code driving them (transfers, integrity checks, ...).
+
+It implements the part of the wrapper API that code uses, plus a log of the
+statements run and of the streaming cursors opened.
+"""
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+FieldInfo = namedtuple('FieldInfo', 'name type_code null_ok')
+
+
+class Cursor(object):
+
+    def __init__(self, connection, streaming=False):
+        self.connection = connection
+        self.cursor = connection.connection.cursor()
+        self.streaming = streaming
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.close()
+
+    def execute(self, sql, params=None):
+        self.connection.log(sql, streaming=self.streaming)
+        return self.cursor.execute(sql.replace('%s', '?'), params or ())
+
+    def executemany(self, sql, param_list):
+        self.connection.log(sql)
+        return self.cursor.executemany(sql.replace('%s', '?'), param_list)
+
+
+class Operations(object):
+
+    def quote_name(self, name):
+        return '"%s"' % name
+
+    def key_bounds_sql(self, table, column):
+        return 'SELECT MIN(%s), MAX(%s) FROM %s' % (
+            self.quote_name(column), self.quote_name(column),
+            self.quote_name(table))
+
+
+class Introspection(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def table_names(self, cursor=None):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                       "ORDER BY name")
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_table_description(self, cursor, table_name):
+        cursor.execute('PRAGMA table_info("%s")' % table_name)
+        return [FieldInfo(row[1], row[2], not row[3])
+                for row in cursor.fetchall()]
+
+    def get_primary_key_column(self, cursor, table_name):
+        cursor.execute('PRAGMA table_info("%s")' % table_name)
+        for row in cursor.fetchall():
+            if row[5]:
+                return row[1]
+        return None
+
+    def get_key_columns(self, cursor, table_name):
+        cursor.execute('PRAGMA foreign_key_list("%s")' % table_name)
+        return [(row[3], row[2], row[4]) for row in cursor.fetchall()]
+
+    def get_table_dependencies(self, cursor, table_names):
+        return dict((table, set(
+            referenced for _, referenced, _ in
+            self.get_key_columns(cursor, table)
+            if referenced in table_names and referenced != table))
+            for table in table_names)
+
+    def get_index_definitions(self, cursor, table_name):
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = "
+                       "'index' AND tbl_name = %s AND sql IS NOT NULL "
+                       "ORDER BY name", [table_name])
+        return OrderedDict(cursor.fetchall())
+
+
+class Features(object):
+    can_defer_foreign_key_validation = True
+
+
+class SchemaEditorClass(object):
+    """
+    Logs the foreign keys it adds, as SQLite can't alter constraints.
+    """
+    sql_delete_index = 'DROP INDEX %(name)s'
+    sql_delete_fk = 'ALTER TABLE %(table)s DROP CONSTRAINT %(name)s'
+    sql_create_fk_definition = 'ALTER TABLE %(table)s ADD CONSTRAINT %(name)s %(definition)s'
+
+    def __init__(self, connection, validate_foreign_keys=True):
+        self.connection = connection
+        self.validate_foreign_keys = validate_foreign_keys
+
+    def add_foreign_key_definition(self, table, name, definition):
+        sql = self.sql_create_fk_definition % {
+            'table': self.connection.ops.quote_name(table),
+            'name': self.connection.ops.quote_name(name),
+            'definition': definition,
+        }
+        if not self.validate_foreign_keys:
+            sql += ' NOT VALID'
+        self.connection.log(sql)
+
+
+class SQLiteConnection(object):
+    """
+    A database wrapper over the SQLite database at `path`. Its copies
+    connect to the same database and share the log.
+    """
+    vendor = 'sqlite'
+    SchemaEditorClass = SchemaEditorClass
+
+    def __init__(self, path, queries=None):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False,
+                                          isolation_level=None)
+        self.ops = Operations()
+        self.introspection = Introspection(self)
+        self.features = Features()
+        self.queries = [] if queries is None else queries
+        self.lock = threading.Lock()
+        self.in_atomic_block = False
+
+    def log(self, sql, streaming=False):
+        with self.lock:
+            self.queries.append({
+                'sql': sql,
+                'streaming': streaming,
+                'in_transaction': self.connection.in_transaction,
+            })
+
+    def executescript(self, script):
+        self.connection.executescript(script)
+
+    def rows(self, sql, params=()):
+        return self.connection.execute(sql, params).fetchall()
+
+    def copy(self):
+        return SQLiteConnection(self.path, self.queries)
+
+    def ensure_connection(self):
+        pass
+
+    def close(self):
+        pass
+
+    def cursor(self, streaming=False):
+        return Cursor(self, streaming)
+
+    def schema_editor(self, *args, **kwargs):
+        return self.SchemaEditorClass(self, *args, **kwargs)
+
+    def get_autocommit(self):
+        return not self.connection.in_transaction
+
+    @contextmanager
+    def transaction(self):
+        self.connection.execute('BEGIN')
+        try:
+            yield
+        except Exception:
+            self.connection.execute('ROLLBACK')
+            raise
+        else:
+            self.connection.execute('COMMIT')
+
+    @contextmanager
+    def read_transaction(self):
+        if not self.get_autocommit():
+            yield
+            return
+        self.connection.execute('BEGIN')
+        try:
+            yield
+        finally:
+            self.connection.execute('ROLLBACK')
+
+    @contextmanager
+    def constraint_checks_disabled(self):
+        yield
+
+    def bulk_insert_rows(self, table, columns, rows):
+        rows = list(rows)
+        with self.cursor() as cursor:
+            cursor.executemany('INSERT INTO "%s" (%s) VALUES (%s)' % (
+                table, ', '.join('"%s"' % column for column in columns),
+                ', '.join(['%s'] * len(columns))), rows)
+        return len(rows)
+
+    def bulk_upsert_rows(self, table, columns, rows, key_columns):
+        rows = list(rows)
+        with self.cursor() as cursor:
+            cursor.executemany('INSERT OR REPLACE INTO "%s" (%s) VALUES (%s)' % (
+                table, ', '.join('"%s"' % column for column in columns),
+                ', '.join(['%s'] * len(columns))), rows)
+        return len(rows)
+
+    def statements(self, pattern):
+        """
+        Returns the logged statements matching the regular expression
+        `pattern`.
+        """
+        return [query for query in self.queries
+                if re.search(pattern, query['sql'])]
@@ -0,0 +1,97 @@
+"""Tests for the PostgreSQL COPY encoders."""
+import datetime
+import decimal
+import struct
+import unittest
+import uuid
+
+from ibu.backends.postgresql.bulk import (
+    BINARY_HEADER, BINARY_TRAILER, RowStream, binary_row_encoder,
+    encode_text_row, encode_text_value,
+)
+
+
+class EncodeTextTests(unittest.TestCase):
+
+    def test_null_and_booleans(self):
+        self.assertEqual(encode_text_value(None), b'\\N')
+        self.assertEqual(encode_text_value(True), b't')
+        self.assertEqual(encode_text_value(False), b'f')
+
+    def test_special_characters_are_escaped(self):
+        self.assertEqual(encode_text_value('a\tb\nc\rd\\e'),
+                         b'a\\tb\\nc\\rd\\\\e')
+
+    def test_unicode(self):
+        self.assertEqual(encode_text_value('\xe9t\xe9'),
+                         '\xe9t\xe9'.encode('utf-8'))
+
+    def test_bytes_are_hex_escaped(self):
+        self.assertEqual(encode_text_value(b'\x00\xff'), b'\\\\x00ff')
+        self.assertEqual(encode_text_value(memoryview(b'\x01')), b'\\\\x01')
+
+    def test_temporal_values(self):
+        self.assertEqual(
+            encode_text_value(datetime.datetime(2017, 1, 2, 3, 4, 5, 6)),
+            b'2017-01-02T03:04:05.000006')
+        self.assertEqual(encode_text_value(datetime.date(2017, 1, 2)),
+                         b'2017-01-02')
+        self.assertEqual(
+            encode_text_value(datetime.timedelta(days=1, seconds=2,
+                                                 microseconds=3)),
+            b'1 days 2 seconds 3 microseconds')
+
+    def test_row(self):
+        self.assertEqual(encode_text_row((1, None, 'x')), b'1\t\\N\tx\n')
+
+
+class EncodeBinaryTests(unittest.TestCase):
+
+    def test_unknown_type_has_no_encoder(self):
+        self.assertIsNone(binary_row_encoder([23, 99999]))
+
+    def test_row(self):
+        encode_row = binary_row_encoder([23, 25, 16])
+        self.assertEqual(
+            encode_row((7, 'ab', None)),
+            struct.pack('!hii', 3, 4, 7) + struct.pack('!i', 2) + b'ab' +
+            struct.pack('!i', -1))
+
+    def test_numeric(self):
+        encode_row = binary_row_encoder([1700])
+        data = encode_row((decimal.Decimal('-12345.678'),))
+        # One field of 8 header bytes and three base-10000 digits.
+        self.assertEqual(
+            data[6:],
+            struct.pack('!hhHh', 3, 1, 0x4000, 3) +
+            struct.pack('!3H', 1, 2345, 6780))
+
+    def test_timestamp_and_uuid(self):
+        value = uuid.uuid4()
+        encode_row = binary_row_encoder([1114, 2950])
+        data = encode_row((datetime.datetime(2000, 1, 1, 0, 0, 1), value))
+        self.assertEqual(data[6:14], struct.pack('!q', 1000000))
+        self.assertEqual(data[18:], value.bytes)
+
+
+class RowStreamTests(unittest.TestCase):
+
+    def test_reads_in_pieces(self):
+        rows = [(i, 'row %d' % i) for i in range(100)]
+        stream = RowStream(rows, encode_text_row)
+        chunks = []
+        while True:
+            chunk = stream.read(7)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(b''.join(chunks),
+                         b''.join(encode_text_row(row) for row in rows))
+        self.assertEqual(stream.row_count, 100)
+
+    def test_header_and_trailer(self):
+        stream = RowStream([(1,)], binary_row_encoder([23]),
+                           header=BINARY_HEADER, trailer=BINARY_TRAILER)
+        data = stream.read()
+        self.assertTrue(data.startswith(BINARY_HEADER))
+        self.assertTrue(data.endswith(BINARY_TRAILER))
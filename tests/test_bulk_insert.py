@@ -0,0 +1,108 @@
+"""Tests for the multi-row INSERT statements of the base database wrapper."""
+import unittest
+
+from ibu.backends.base.base import BaseDatabaseWrapper, estimate_row_bytes
+from ibu.backends.base.features import BaseDatabaseFeatures
+from ibu.backends.base.operations import BaseDatabaseOperations
+
+
+class FakeCursor(object):
+
+    def __init__(self, queries):
+        self.queries = queries
+
+    def execute(self, sql, params=None):
+        self.queries.append((sql, params))
+
+    def close(self):
+        pass
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self.queries)
+
+
+class Operations(BaseDatabaseOperations):
+
+    def quote_name(self, name):
+        return '"%s"' % name
+
+
+class DatabaseWrapper(BaseDatabaseWrapper):
+
+    def __init__(self, max_query_params=None, max_statement_bytes=None):
+        super(DatabaseWrapper, self).__init__({}, allow_thread_sharing=True)
+        self.features = BaseDatabaseFeatures(self)
+        self.features.max_query_params = max_query_params
+        self.ops = Operations(self)
+        self.max_statement_bytes = max_statement_bytes
+        self.connection = FakeConnection()
+        self.autocommit = True
+
+    def create_cursor(self):
+        return self.connection.cursor()
+
+
+class BulkInsertBatchesTests(unittest.TestCase):
+
+    def batches(self, rows, **kwargs):
+        wrapper = DatabaseWrapper(**kwargs)
+        return [len(batch) for batch in
+                wrapper.bulk_insert_batches(['id', 'title'], iter(rows))]
+
+    def test_no_rows(self):
+        self.assertEqual(self.batches([]), [])
+
+    def test_read_size(self):
+        rows = [(i, 'x') for i in range(2500)]
+        self.assertEqual(self.batches(rows), [1000, 1000, 500])
+
+    def test_max_query_params(self):
+        rows = [(i, 'x') for i in range(10)]
+        # 7 parameters fit 3 rows of 2 columns.
+        self.assertEqual(self.batches(rows, max_query_params=7), [3, 3, 3, 1])
+
+    def test_max_statement_bytes(self):
+        rows = [(i, 'x' * 100) for i in range(10)]
+        row_bytes = estimate_row_bytes(rows[0])
+        # Batches are kept to half of the limit.
+        self.assertEqual(
+            self.batches(rows, max_statement_bytes=6 * row_bytes + 1),
+            [3, 3, 3, 1])
+        # Both limits apply.
+        self.assertEqual(
+            self.batches(rows, max_query_params=4,
+                         max_statement_bytes=6 * row_bytes),
+            [2, 2, 2, 2, 2])
+
+    def test_row_larger_than_max_statement_bytes(self):
+        # It is sent on its own, and left to the server to reject.
+        rows = [(1, 'x'), (2, 'x' * 1000), (3, 'x')]
+        self.assertEqual(self.batches(rows, max_statement_bytes=1000),
+                         [1, 1, 1])
+
+
+class BulkInsertRowsTests(unittest.TestCase):
+
+    def test_statements(self):
+        wrapper = DatabaseWrapper(max_query_params=4)
+        count = wrapper.bulk_insert_rows(
+            'book', ['id', 'title'], [(1, 'a'), (2, 'b'), (3, 'c')])
+        self.assertEqual(count, 3)
+        self.assertEqual(wrapper.connection.queries, [
+            ('INSERT INTO "book" ("id", "title") VALUES (%s, %s), (%s, %s)',
+             [1, 'a', 2, 'b']),
+            ('INSERT INTO "book" ("id", "title") VALUES (%s, %s)', [3, 'c']),
+        ])
+
+    def test_statements_are_cached(self):
+        wrapper = DatabaseWrapper()
+        sql = wrapper.insert_statement('book', ['id'], 2)
+        self.assertIs(wrapper.insert_statement('book', ['id'], 2), sql)
+        self.assertEqual(wrapper.insert_statement('book', ['id'], 1),
+                         'INSERT INTO "book" ("id") VALUES (%s)')
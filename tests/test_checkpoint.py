@@ -0,0 +1,81 @@
+"""Tests for the checkpoint journal and state files."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from ibu.checkpoint import IndexDefinitions, Journal, Watermarks
+
+
+class CheckpointTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+
+class JournalTests(CheckpointTestCase):
+
+    def test_replay(self):
+        path = self.path('journal')
+        journal = Journal(path)
+        journal.plan('book', [[None, 10], [10, None]])
+        journal.start('book:0')
+        journal.finish('book:0', rows=10)
+        journal.start('book:1')
+        journal.close()
+
+        journal = Journal(path, resume=True)
+        self.addCleanup(journal.close)
+        self.assertTrue(journal.is_finished('book:0'))
+        self.assertEqual(journal.finished['book:0']['rows'], 10)
+        self.assertFalse(journal.is_dirty('book:0'))
+        self.assertTrue(journal.is_dirty('book:1'))
+        self.assertFalse(journal.is_finished('book:1'))
+        self.assertEqual(journal.plans['book'], [[None, 10], [10, None]])
+
+    def test_torn_last_line_is_ignored(self):
+        path = self.path('journal')
+        journal = Journal(path)
+        journal.finish('author', rows=3)
+        journal.close()
+        with open(path, 'ab') as f:
+            f.write(b'{"event": "finished", "key": "bo')
+
+        journal = Journal(path, resume=True)
+        journal.finish('book', rows=5)
+        journal.close()
+        journal = Journal(path, resume=True)
+        self.addCleanup(journal.close)
+        self.assertEqual(sorted(journal.finished), ['author', 'book'])
+
+    def test_without_resume_the_journal_is_discarded(self):
+        path = self.path('journal')
+        journal = Journal(path)
+        journal.finish('author', rows=3)
+        journal.close()
+        journal = Journal(path)
+        self.addCleanup(journal.close)
+        self.assertFalse(journal.is_finished('author'))
+
+
+class StateFileTests(CheckpointTestCase):
+
+    def test_watermarks(self):
+        path = self.path('watermarks')
+        Watermarks(path).set('book', 'updated', '2017-01-02')
+        watermarks = Watermarks(path)
+        self.assertEqual(watermarks.get('book', 'updated'), '2017-01-02')
+        self.assertIsNone(watermarks.get('book', 'id'))
+
+    def test_index_definitions(self):
+        path = self.path('indexes')
+        definitions = IndexDefinitions(path)
+        definitions.add('book', {'book_title': 'CREATE INDEX book_title'})
+        self.assertEqual(IndexDefinitions(path).get('book'),
+                         {'book_title': 'CREATE INDEX book_title'})
+        definitions.remove('book')
+        self.assertEqual(IndexDefinitions(path).tables(), [])
@@ -0,0 +1,128 @@
+"""Tests for splitting tables into primary key ranges."""
+import unittest
+
+from ibu.chunking import (
+    KeyRange, key_ranges, quantile_boundaries, split_integer_range,
+)
+
+
+class FakeCursor(object):
+    """
+    Answers the key bounds query with `bounds`, and any other query with
+    the rows of `sample`.
+    """
+
+    def __init__(self, bounds, sample):
+        self.bounds = bounds
+        self.sample = sample
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql, params=None):
+        self.queries.append(sql)
+
+    def fetchone(self):
+        if self.queries[-1].startswith('SELECT MIN('):
+            return self.bounds
+        return (len(self.sample),)
+
+    def fetchall(self):
+        return [(value,) for value in self.sample]
+
+
+class FakeOperations(object):
+
+    def quote_name(self, name):
+        return '"%s"' % name
+
+    def key_bounds_sql(self, table, column):
+        return 'SELECT MIN(%s), MAX(%s) FROM %s' % (column, column, table)
+
+    def key_sample_sql(self, table, column, fraction):
+        return 'SELECT %s FROM %s' % (column, table), [fraction]
+
+
+class FakeIntrospection(object):
+
+    def __init__(self, primary_key):
+        self.primary_key = primary_key
+
+    def get_primary_key_column(self, cursor, table):
+        return self.primary_key
+
+    def get_table_row_estimate(self, cursor, table):
+        return None
+
+
+class FakeConnection(object):
+
+    def __init__(self, bounds, sample=(), primary_key='id'):
+        self.ops = FakeOperations()
+        self.introspection = FakeIntrospection(primary_key)
+        self._cursor = FakeCursor(bounds, list(sample))
+
+    def cursor(self):
+        return self._cursor
+
+
+class KeyRangeTests(unittest.TestCase):
+
+    def test_sql(self):
+        quote = lambda name: '"%s"' % name
+        self.assertEqual(KeyRange('id', None, None).sql(quote), ('', []))
+        self.assertEqual(KeyRange('id', 10, 20).sql(quote),
+                         ('"id" >= %s AND "id" < %s', [10, 20]))
+        self.assertEqual(KeyRange('id', None, 20).sql(quote),
+                         ('"id" < %s', [20]))
+
+
+class SplitTests(unittest.TestCase):
+
+    def test_integer_range(self):
+        self.assertEqual(split_integer_range('id', 1, 100, 4), [
+            KeyRange('id', None, 26),
+            KeyRange('id', 26, 51),
+            KeyRange('id', 51, 76),
+            KeyRange('id', 76, None),
+        ])
+
+    def test_integer_range_narrower_than_chunks(self):
+        self.assertEqual(split_integer_range('id', 1, 2, 4), [
+            KeyRange('id', None, 2), KeyRange('id', 2, None),
+        ])
+
+    def test_quantile_boundaries(self):
+        self.assertEqual(quantile_boundaries(list('hgfedcba'), 4),
+                         ['c', 'e', 'g'])
+
+    def test_quantile_boundaries_skip_duplicates(self):
+        self.assertEqual(quantile_boundaries(['a'] * 6 + ['b', 'c'], 4),
+                         ['b'])
+
+
+class KeyRangesTests(unittest.TestCase):
+
+    def test_ranges_cover_the_table(self):
+        ranges = key_ranges(FakeConnection((1, 1000)), 'book', 3)
+        self.assertEqual(len(ranges), 3)
+        self.assertIsNone(ranges[0].low)
+        self.assertIsNone(ranges[-1].high)
+        for previous, current in zip(ranges, ranges[1:]):
+            self.assertEqual(previous.high, current.low)
+
+    def test_unsplittable_tables(self):
+        self.assertIsNone(key_ranges(FakeConnection((1, 1000)), 'book', 1))
+        self.assertIsNone(key_ranges(FakeConnection((None, None)), 'book', 4))
+        self.assertIsNone(key_ranges(FakeConnection((5, 5)), 'book', 4))
+        self.assertIsNone(key_ranges(
+            FakeConnection((1, 1000), primary_key=None), 'book', 4))
+
+    def test_non_integer_keys_are_sampled(self):
+        sample = ['k%02d' % i for i in range(40)]
+        ranges = key_ranges(FakeConnection(('k00', 'k39'), sample), 'tag', 4)
+        self.assertEqual([r.high for r in ranges], ['k10', 'k20', 'k30', None])
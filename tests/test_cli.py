@@ -0,0 +1,64 @@
+"""Tests for the ibu command line."""
+import collections
+import os
+import shutil
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ibu.cli import cli
+
+MANIFEST = """\
+databases:
+  src: {ENGINE: ibu.backends.postgresql, NAME: src}
+  dest: {ENGINE: ibu.backends.postgresql, NAME: dest}
+"""
+
+
+class CopyCommandTests(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = CliRunner()
+        patcher = mock.patch('ibu.cli.Transfer')
+        self.Transfer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.transfer = self.Transfer.return_value
+        self.transfer.run.return_value = collections.OrderedDict(
+            [('author', 2), ('book', 3)])
+        self.transfer.invalid_constraints = []
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.manifest = os.path.join(self.directory, 'manifest.yml')
+        with open(self.manifest, 'w') as f:
+            f.write(MANIFEST)
+
+    def invoke(self, *args, **kwargs):
+        journal = os.path.join(self.directory, 'journal')
+        return self.runner.invoke(
+            cli, list(kwargs.get('options', ())) +
+            ['copy', '-c', self.manifest, '-j', journal] + list(args))
+
+    def test_copy(self):
+        result = self.invoke('-t', 'book', '-w', '2')
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output, 'author: 2 row(s)\nbook: 3 row(s)\n')
+        config = self.Transfer.call_args[0][0]
+        self.assertEqual(config['databases']['dest']['NAME'], 'dest')
+        kwargs = self.Transfer.call_args[1]
+        self.assertEqual(kwargs['tables'], ('book',))
+        self.assertEqual(kwargs['workers'], 2)
+        self.assertIsNone(kwargs['watermarks'])
+        self.assertFalse(self.transfer.validate.called)
+
+    def test_debug(self):
+        with mock.patch('logging.basicConfig') as basic_config:
+            result = self.invoke(options=['--debug'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(basic_config.called)
@@ -0,0 +1,101 @@
+"""Tests for the columnar fixture format."""
+import datetime
+import decimal
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ibu.serializers.columnar import (
+    ColumnarReader, ColumnarWriter, column_type,
+)
+
+COLUMNS = ['id', 'title', 'price', 'published', 'updated', 'cover', 'ref',
+           'available', 'rating', 'big', 'read_at', 'loan', 'meta']
+
+ROWS = [
+    (1, 'Dune', decimal.Decimal('9.99'), datetime.date(1965, 8, 1),
+     datetime.datetime(2017, 1, 2, 3, 4, 5, 123456), b'\x00\xff',
+     uuid.UUID(int=1), True, 4.5, 2 ** 70, datetime.time(23, 59, 59, 999999),
+     datetime.timedelta(days=14), {'tags': ['sf']}),
+    (2, 'Emma', None, None, None, None, None, False, None, None, None, None,
+     None),
+    (3, None, decimal.Decimal('-0.5'), datetime.date(1815, 12, 23),
+     datetime.datetime(1815, 12, 23), b'', uuid.UUID(int=2), None, -1.0, 5,
+     datetime.time(0, 0), datetime.timedelta(microseconds=-1), []),
+]
+
+
+def write(stream, tables, block_rows=2):
+    writer = ColumnarWriter(stream, block_rows=block_rows)
+    for table, columns, rows in tables:
+        writer.write_rows(table, columns, rows)
+    writer.close()
+
+
+class ColumnarRoundTripTests(unittest.TestCase):
+
+    def read_rows(self, reader, table=None):
+        rows = []
+        for block in reader.blocks(table):
+            rows.extend(block.rows())
+        return rows
+
+    def test_file_object_round_trip(self):
+        stream = io.BytesIO()
+        write(stream, [('book', COLUMNS, ROWS), ('author', ['id'], [(7,)])])
+        stream.seek(0)
+        reader = ColumnarReader(stream)
+        self.assertEqual(reader.tables(), ['book', 'author'])
+        self.assertEqual(self.read_rows(reader, 'book'), ROWS)
+        self.assertEqual(self.read_rows(reader, 'author'), [(7,)])
+        self.assertEqual(next(reader.blocks()).column_names, COLUMNS)
+        reader.close()
+
+    def test_memory_mapped_round_trip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'books.columnar')
+        with open(path, 'wb') as f:
+            write(f, [('book', COLUMNS, ROWS)])
+        reader = ColumnarReader(path)
+        try:
+            self.assertEqual(self.read_rows(reader), ROWS)
+        finally:
+            reader.close()
+
+    def test_empty_table(self):
+        stream = io.BytesIO()
+        write(stream, [('book', COLUMNS, [])])
+        stream.seek(0)
+        self.assertEqual(ColumnarReader(stream).tables(), [])
+
+    def test_not_a_columnar_fixture(self):
+        with self.assertRaises(ValueError):
+            ColumnarReader(io.BytesIO(b'[{"model": "library.book"}]'))
+
+
+class ColumnTypeTests(unittest.TestCase):
+
+    def test_types(self):
+        self.assertEqual(column_type([None, None]), 'text')
+        self.assertEqual(column_type([1, None, 2 ** 64]), 'bigint')
+        self.assertEqual(column_type([True, False]), 'bool')
+
+    def test_mixed_types(self):
+        with self.assertRaises(ValueError):
+            column_type([1, 'one'])
+
+    def test_python_2(self):
+        with mock.patch('six.PY2', True):
+            with self.assertRaises(NotImplementedError):
+                ColumnarWriter(io.BytesIO())
+            with self.assertRaises(NotImplementedError):
+                ColumnarReader(io.BytesIO())
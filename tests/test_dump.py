@@ -0,0 +1,205 @@
+"""Tests for the dump command."""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from . import djangoapp
+from .djangoapp import skip_unless_django
+
+
+def setUpModule():
+    if djangoapp.django is not None:
+        djangoapp.setup()
+
+
+@skip_unless_django
+class DumpTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from .djangoapp.models import Author, Book
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        for pk in range(1, 4):
+            Author.objects.create(pk=pk, name='Author %d' % pk)
+        for pk in range(1, 6):
+            Book.objects.create(pk=pk, title='Book %d' % pk, author_id=pk % 3 + 1)
+        self.addCleanup(Author.objects.all().delete)
+        self.addCleanup(Book.objects.all().delete)
+
+    def path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def dump(self, *args, **options):
+        from django.core.management import call_command
+        from ibu.dump import Command
+        options.setdefault('verbosity', 0)
+        stdout = options.pop('stdout', None) or io.StringIO()
+        call_command(Command(), *args, stdout=stdout, **options)
+        return stdout.getvalue()
+
+
+class DumpShardsTests(DumpTestCase):
+
+    def test_dump_shards(self):
+        from django.core import serializers
+        from ibu.shards import read_manifest, verify_shard
+        shard_dir = self.path('shards')
+        self.dump('djangoapp', shard_dir=shard_dir, shard_rows=2)
+        manifest = read_manifest(shard_dir)
+        self.assertEqual(manifest['format'], 'json')
+        self.assertEqual(
+            [(shard['file'], shard['model'], shard['rows'])
+             for shard in manifest['shards']],
+            [('djangoapp.author.0001.json', 'djangoapp.author', 2),
+             ('djangoapp.author.0002.json', 'djangoapp.author', 1),
+             ('djangoapp.book.0001.json', 'djangoapp.book', 2),
+             ('djangoapp.book.0002.json', 'djangoapp.book', 2),
+             ('djangoapp.book.0003.json', 'djangoapp.book', 1)])
+        pks = []
+        for shard in manifest['shards']:
+            verify_shard(shard_dir, shard)
+            with io.open(self.path('shards', shard['file']), encoding='utf-8') as f:
+                pks.append([obj.object.pk for obj in
+                            serializers.deserialize('json', f.read())])
+        self.assertEqual(pks, [[1, 2], [3], [1, 2], [3, 4], [5]])
+
+    def test_shard_bytes(self):
+        from ibu.shards import read_manifest
+        shard_dir = self.path('shards')
+        self.dump('djangoapp.book', shard_dir=shard_dir, shard_bytes=1,
+                  compress=True)
+        shards = read_manifest(shard_dir)['shards']
+        # Each shard is full once its first object is written.
+        self.assertEqual([shard['rows'] for shard in shards], [1] * 5)
+        self.assertTrue(shards[0]['file'].endswith('.json.gz'))
+
+    def test_columnar_shards(self):
+        from django.core.management import CommandError
+        with self.assertRaises(CommandError):
+            self.dump('djangoapp', format='columnar', output=self.path('out'),
+                      shard_dir=self.path('shards'))
+
+
+class DumpTests(DumpTestCase):
+
+    def test_dump(self):
+        output = json.loads(self.dump('djangoapp.author'))
+        self.assertEqual([obj['pk'] for obj in output], [1, 2, 3])
+
+
+class TTY(io.StringIO):
+
+    def isatty(self):
+        return True
+
+
+class EstimateTests(DumpTestCase):
+
+    def dump_with_progress(self, **options):
+        output = self.path('dump.json')
+        progress = self.dump('djangoapp', output=output, estimate=True,
+                             verbosity=1, stdout=TTY(), **options)
+        with io.open(output, encoding='utf-8') as f:
+            return progress, json.load(f)
+
+    def test_estimates(self):
+        from django.db import connection
+        # Both tables are underestimated: the total is raised as they're
+        # scanned, and the bar still ends full.
+        with mock.patch.object(connection.introspection, 'get_table_row_estimate',
+                               create=True, return_value=1) as get_estimate:
+            with mock.patch('django.db.models.QuerySet.count') as count:
+                progress, objects = self.dump_with_progress()
+        self.assertEqual(
+            [call[0][1] for call in get_estimate.call_args_list],
+            ['djangoapp_author', 'djangoapp_book'])
+        self.assertFalse(count.called)
+        self.assertEqual(len(objects), 8)
+        self.assertTrue(progress.endswith('[%s]\n' % ('.' * 75)))
+
+    def test_backend_without_estimates(self):
+        from django.db import connection
+        self.assertFalse(hasattr(connection.introspection, 'get_table_row_estimate'))
+        with mock.patch('django.db.models.QuerySet.count', return_value=4) as count:
+            progress, objects = self.dump_with_progress()
+        self.assertEqual(count.call_count, 2)
+        self.assertEqual(len(objects), 8)
+        self.assertTrue(progress.endswith('[%s]\n' % ('.' * 75)))
+
+
+@skip_unless_django
+class RowEstimateTests(unittest.TestCase):
+
+    def test_estimate(self):
+        from ibu.dump import RowEstimate
+        estimate = RowEstimate()
+        self.assertEqual(estimate.total, 1)
+        estimate.estimate('author', 10)
+        estimate.estimate('book', 100)
+        self.assertEqual(estimate.total, 110)
+        estimate.seen('author', 5)
+        self.assertEqual(estimate.total, 110)
+        estimate.seen('author', 20)
+        self.assertEqual(estimate.total, 120)
+        estimate.finish('author', 25)
+        estimate.finish('book', 50)
+        self.assertEqual(estimate.total, 75)
+
+    def test_progress_bar_follows_the_estimate(self):
+        from ibu.dump import EstimatedProgressBar, RowEstimate
+        estimate = RowEstimate()
+        estimate.estimate('author', 10)
+        output = io.StringIO()
+        bar = EstimatedProgressBar(output, estimate)
+        bar.update(5)
+        self.assertEqual(output.getvalue().count('.'), 37)
+        estimate.finish('author', 20)
+        bar.update(10)
+        # Still half way: the total grew with the estimate.
+        self.assertEqual(output.getvalue().count('.'), 37)
+        bar.update(20)
+        self.assertTrue(output.getvalue().endswith('[%s]\n' % ('.' * 75)))
+
+
+class PaginateByPkTests(DumpTestCase):
+
+    def test_pages(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from ibu.dump import paginate_by_pk
+        from .djangoapp.models import Book
+        with CaptureQueriesContext(connection) as queries:
+            books = list(paginate_by_pk(Book.objects.order_by('pk'), 2))
+        self.assertEqual([book.pk for book in books], [1, 2, 3, 4, 5])
+        # One query per page, each starting after the last key seen.
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn('>', queries[0]['sql'])
+        self.assertIn('LIMIT 2', queries[0]['sql'])
+        self.assertIn('> 4', queries[2]['sql'])
+
+    def test_full_last_page(self):
+        from ibu.dump import paginate_by_pk
+        from .djangoapp.models import Author
+        authors = paginate_by_pk(Author.objects.order_by('pk'), 3)
+        self.assertEqual([author.pk for author in authors], [1, 2, 3])
+        self.assertEqual(list(paginate_by_pk(Author.objects.none(), 3)), [])
+
+    def test_filtered_queryset(self):
+        from ibu.dump import paginate_by_pk
+        from .djangoapp.models import Book
+        books = paginate_by_pk(Book.objects.filter(author_id=2).order_by('pk'), 1)
+        self.assertEqual([book.pk for book in books], [1, 4])
+
+    def test_dump_page_size(self):
+        output = json.loads(self.dump('djangoapp', page_size=2))
+        self.assertEqual([(obj['model'], obj['pk']) for obj in output],
+                         [('djangoapp.author', pk) for pk in range(1, 4)] +
+                         [('djangoapp.book', pk) for pk in range(1, 6)])
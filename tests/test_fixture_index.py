@@ -0,0 +1,93 @@
+"""Tests for the persistent index of fixture directories."""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from ibu.fixture_index import DEFAULT_FIXTURE_INDEX, FixtureIndex, fixture_names
+
+
+class FixtureIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.fixtures = os.path.join(self.directory, 'fixtures')
+        os.mkdir(self.fixtures)
+        for name in ('books.json', 'books.default.json.gz', 'authors.jsonl'):
+            open(os.path.join(self.fixtures, name), 'w').close()
+        self.age(self.fixtures)
+        self.path = os.path.join(self.directory, 'cache', 'index.json')
+
+    def age(self, path):
+        # Listings read right after a change aren't saved.
+        past = time.time() - 60
+        os.utime(path, (past, past))
+
+    def test_fixture_names(self):
+        self.assertEqual(fixture_names('books.default.json.gz'),
+                         set(['books', 'books.default', 'books.default.json']))
+        self.assertEqual(fixture_names('books'), set())
+
+    def test_lookup(self):
+        index = FixtureIndex(self.path)
+        self.assertEqual(
+            sorted(index.lookup(self.fixtures, 'books')),
+            [os.path.join(self.fixtures, 'books.default.json.gz'),
+             os.path.join(self.fixtures, 'books.json')])
+        self.assertEqual(index.lookup(self.fixtures, 'users'), [])
+        self.assertEqual(index.lookup(os.path.join(self.directory, 'missing'),
+                                      'books'), [])
+
+    def test_saved_listing_is_reused(self):
+        index = FixtureIndex(self.path)
+        index.lookup(self.fixtures, 'books')
+        index.save()
+        self.assertTrue(os.path.exists(self.path))
+        with mock.patch('os.listdir') as listdir:
+            self.assertEqual(len(FixtureIndex(self.path).lookup(self.fixtures, 'books')), 2)
+        self.assertFalse(listdir.called)
+
+    def test_changed_directory_is_read_again(self):
+        index = FixtureIndex(self.path)
+        index.lookup(self.fixtures, 'books')
+        index.save()
+        open(os.path.join(self.fixtures, 'users.json'), 'w').close()
+        # Recently changed: read, but not saved.
+        index = FixtureIndex(self.path)
+        self.assertEqual(len(index.lookup(self.fixtures, 'users')), 1)
+        self.assertTrue(index.dirty)
+        index.save()
+        self.assertNotIn(self.fixtures, FixtureIndex(self.path).dirs)
+
+        self.age(self.fixtures)
+        index = FixtureIndex(self.path)
+        self.assertEqual(len(index.lookup(self.fixtures, 'users')), 1)
+        index.save()
+        self.assertIn('users.json', FixtureIndex(self.path).dirs[self.fixtures]['files'])
+
+    def test_saving_in_a_fixture_directory(self):
+        # The index changes its directory's mtime, invalidating its listing.
+        path = os.path.join(self.fixtures, 'index.json')
+        index = FixtureIndex(path)
+        index.lookup(self.fixtures, 'books')
+        index.save()
+        index = FixtureIndex(path)
+        index.lookup(self.fixtures, 'books')
+        self.assertTrue(index.dirty)
+
+    def test_default_path_is_outside_the_current_directory(self):
+        self.assertTrue(os.path.isabs(DEFAULT_FIXTURE_INDEX))
+        self.assertNotEqual(os.path.dirname(DEFAULT_FIXTURE_INDEX), os.getcwd())
+
+    def test_corrupt_index(self):
+        os.mkdir(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{')
+        self.assertEqual(FixtureIndex(self.path).dirs, {})
@@ -0,0 +1,91 @@
+"""Tests for the set-based foreign key validation."""
+import sqlite3
+import unittest
+
+from ibu.integrity import (
+    ForeignKey, Orphans, format_orphans, validate_foreign_keys,
+)
+
+
+class Introspection(object):
+
+    def table_names(self, cursor):
+        return ['author', 'book']
+
+    def get_key_columns(self, cursor, table):
+        return [('author_id', 'author', 'id')] if table == 'book' else []
+
+    def get_primary_key_column(self, cursor, table):
+        return 'id'
+
+
+class Ops(object):
+
+    def quote_name(self, name):
+        return '"%s"' % name
+
+
+class Cursor(object):
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.close()
+
+
+class Connection(object):
+    """
+    The parts of a database wrapper used by validate_foreign_keys(), over an
+    in-memory SQLite database that can't be copied.
+    """
+    introspection = Introspection()
+    ops = Ops()
+
+    def __init__(self):
+        self.connection = sqlite3.connect(':memory:')
+
+    def cursor(self):
+        return Cursor(self.connection.cursor())
+
+    def copy(self):
+        raise AssertionError("A single worker mustn't copy the connection.")
+
+
+class ValidateForeignKeysTests(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = Connection()
+        self.connection.connection.executescript(
+            'CREATE TABLE author (id INTEGER PRIMARY KEY);'
+            'CREATE TABLE book (id INTEGER PRIMARY KEY, author_id INTEGER);'
+            'INSERT INTO author VALUES (1);'
+            'INSERT INTO book VALUES (1, 1), (2, 2), (3, NULL), (4, 3);')
+
+    def test_single_worker_uses_the_connection(self):
+        report = validate_foreign_keys(self.connection, ['book'])
+        self.assertEqual(report, [
+            Orphans(ForeignKey('book', 'author_id', 'author', 'id'), 2, [2, 4]),
+        ])
+
+    def test_sample_size(self):
+        report = validate_foreign_keys(self.connection, sample_size=1)
+        self.assertEqual(report[0].count, 2)
+        self.assertEqual(len(report[0].sample), 1)
+
+    def test_no_orphans(self):
+        self.connection.connection.execute('DELETE FROM book WHERE id > 1')
+        self.assertEqual(validate_foreign_keys(self.connection), [])
+
+    def test_format_orphans(self):
+        orphans = Orphans(ForeignKey('book', 'author_id', 'author', 'id'),
+                          2, [2, 4])
+        self.assertEqual(format_orphans(orphans),
+                         'book.author_id -> author.id: 2 orphaned row(s), '
+                         'e.g. 2, 4')
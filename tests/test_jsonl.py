@@ -0,0 +1,81 @@
+"""Tests for the JSON Lines fixture format."""
+import datetime
+import io
+import json
+import unittest
+
+from . import djangoapp
+from .djangoapp import skip_unless_django
+from .test_dump import DumpTestCase
+
+
+def setUpModule():
+    if djangoapp.django is not None:
+        djangoapp.setup()
+        from ibu.serializers import register_serializers
+        register_serializers()
+
+
+@skip_unless_django
+class JSONLinesTests(unittest.TestCase):
+
+    def setUp(self):
+        from .djangoapp.models import Author, Book
+        self.author = Author(pk=1, name='Ursula\nLe Guin')
+        self.book = Book(pk=2, title='Earthsea', author=self.author,
+                         published=datetime.date(1968, 1, 1))
+
+    def serialize(self, objects, **options):
+        from django.core import serializers
+        return serializers.serialize('jsonl', objects, **options)
+
+    def deserialize(self, data):
+        from django.core import serializers
+        return [obj.object for obj in serializers.deserialize('jsonl', data)]
+
+    def test_one_object_per_line(self):
+        data = self.serialize([self.author, self.book], indent=2)
+        lines = data.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1]), {
+            'model': 'djangoapp.book', 'pk': 2,
+            'fields': {'title': 'Earthsea', 'author': 1, 'published': '1968-01-01'},
+        })
+
+    def test_round_trip(self):
+        data = self.serialize([self.author, self.book])
+        author, book = self.deserialize(data)
+        self.assertEqual((author.pk, author.name), (1, 'Ursula\nLe Guin'))
+        self.assertEqual((book.pk, book.title, book.author_id, book.published),
+                         (2, 'Earthsea', 1, datetime.date(1968, 1, 1)))
+
+    def test_streams(self):
+        data = self.serialize([self.author, self.book]) + '\n'
+        # Text and binary streams are read line by line, blank lines skipped.
+        self.assertEqual(len(self.deserialize(io.StringIO(data))), 2)
+        self.assertEqual(len(self.deserialize(io.BytesIO(data.encode('utf-8')))), 2)
+
+        class Reader(object):
+            def __init__(self, data):
+                self.read = io.BytesIO(data).read
+
+        self.assertEqual(len(self.deserialize(Reader(data.encode('utf-8')))), 2)
+
+    def test_invalid_line(self):
+        from django.core.serializers.base import DeserializationError
+        data = self.serialize([self.author]) + '{"model": \n'
+        with self.assertRaises(DeserializationError):
+            self.deserialize(data)
+
+
+class DumpJSONLinesTests(DumpTestCase):
+
+    def test_dump(self):
+        lines = self.dump('djangoapp.author', format='jsonl').splitlines()
+        self.assertEqual([json.loads(line)['pk'] for line in lines], [1, 2, 3])
+
+    def test_unknown_format(self):
+        from django.core.management import CommandError
+        with self.assertRaises(CommandError) as cm:
+            self.dump('djangoapp', format='jsonx')
+        self.assertEqual(str(cm.exception), 'Unknown serialization format: jsonx')
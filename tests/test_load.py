@@ -0,0 +1,198 @@
+"""Tests for the load command."""
+import datetime
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from . import djangoapp
+from .djangoapp import skip_unless_django
+
+
+def setUpModule():
+    if djangoapp.django is not None:
+        djangoapp.setup()
+
+
+@skip_unless_django
+class LoadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from .djangoapp.models import Author, Book
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(Author.objects.all().delete)
+        self.addCleanup(Book.objects.all().delete)
+
+    def path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def load(self, *labels, **options):
+        from django.core.management import call_command
+        from ibu.load import Command
+        options.setdefault('verbosity', 0)
+        options.setdefault('use_fixture_index', False)
+        call_command(Command(), *labels, stdout=io.StringIO(), **options)
+
+    def write_columnar(self, name, tables):
+        from ibu.serializers.columnar import ColumnarWriter
+        with open(self.path(name), 'wb') as f:
+            writer = ColumnarWriter(f)
+            for table, columns, rows in tables:
+                writer.write_rows(table, columns, rows)
+            writer.close()
+        return self.path(name)
+
+    def books(self):
+        from .djangoapp.models import Book
+        return list(Book.objects.order_by('pk').values_list(
+            'pk', 'title', 'author_id', 'published'))
+
+
+class TableRowsTests(LoadTestCase):
+
+    def test_saved_through_models(self):
+        # Django's connections have no bulk writer.
+        from django.db import connection
+        self.assertFalse(hasattr(connection, 'bulk_insert_rows'))
+        fixture = self.write_columnar('library.columnar', [
+            ('djangoapp_author', ['id', 'name'], [(1, 'Herbert')]),
+            ('djangoapp_book', ['id', 'title', 'author_id'],
+             [(1, 'Dune', 1), (2, 'Dune Messiah', 1)]),
+        ])
+        self.load(fixture)
+        self.assertEqual(self.books(), [(1, 'Dune', 1, None),
+                                        (2, 'Dune Messiah', 1, None)])
+        # Rows with the same primary key are replaced.
+        fixture = self.write_columnar('update.columnar', [
+            ('djangoapp_book', ['id', 'title', 'author_id'],
+             [(2, 'Children of Dune', 1)]),
+        ])
+        self.load(fixture)
+        self.assertEqual(self.books()[1], (2, 'Children of Dune', 1, None))
+
+    def test_rows_fixture(self):
+        from ibu.serializers.rows import RowWriter
+        with io.open(self.path('library.rows'), 'w', encoding='utf-8') as f:
+            writer = RowWriter(f)
+            writer.write_rows('djangoapp_author', ['id', 'name'], [(1, 'Herbert')])
+            writer.write_rows('djangoapp_book', ['id', 'title', 'author_id', 'published'],
+                              [(1, 'Dune', 1, datetime.date(1965, 8, 1))])
+        self.load(self.path('library.rows'))
+        self.assertEqual(self.books(), [(1, 'Dune', 1, datetime.date(1965, 8, 1))])
+
+    def test_table_without_model(self):
+        from django.core.management import CommandError
+        fixture = self.write_columnar('other.columnar', [
+            ('other_table', ['id'], [(1,)]),
+        ])
+        with self.assertRaises(CommandError) as cm:
+            self.load(fixture)
+        self.assertIn("Table 'other_table' has no model", str(cm.exception))
+
+    def test_unknown_column(self):
+        from django.core.management import CommandError
+        fixture = self.write_columnar('book.columnar', [
+            ('djangoapp_book', ['id', 'isbn'], [(1, '0441172717')]),
+        ])
+        with self.assertRaises(CommandError) as cm:
+            self.load(fixture)
+        self.assertIn("has no field for column(s) isbn", str(cm.exception))
+
+
+JSONL = (
+    '{"model": "djangoapp.author", "pk": 1, "fields": {"name": "Herbert"}}\n'
+    '{"model": "djangoapp.book", "pk": 1, "fields": {"title": "Dune", '
+    '"author": 1, "published": "1965-08-01"}}\n'
+)
+
+
+class ZipFixtureTests(LoadTestCase):
+
+    def write_zip(self, name, members):
+        with zipfile.ZipFile(self.path(name), 'w', zipfile.ZIP_DEFLATED) as f:
+            for member, data in members:
+                f.writestr(member, data)
+        return self.path(name)
+
+    def test_reader(self):
+        from ibu.load import SingleZipReader
+        path = self.write_zip('books.jsonl.zip', [('books.jsonl', JSONL)])
+        reader = SingleZipReader(path, 'r')
+        try:
+            lines = JSONL.encode('utf-8').splitlines(True)
+            self.assertEqual(reader.readline(), lines[0])
+            self.assertEqual(reader.read(5), lines[1][:5])
+            self.assertEqual(list(reader), [lines[1][5:]])
+            self.assertEqual(reader.read(), b'')
+        finally:
+            reader.close()
+        self.assertIsNone(reader.fp)
+
+    def test_several_members(self):
+        from ibu.load import SingleZipReader
+        path = self.write_zip('books.jsonl.zip', [('a.jsonl', ''), ('b.jsonl', '')])
+        with self.assertRaises(ValueError):
+            SingleZipReader(path, 'r')
+
+    def test_load(self):
+        from ibu.serializers import register_serializers
+        register_serializers()
+        for format in ('jsonl', 'json'):
+            data = JSONL
+            if format == 'json':
+                data = '[%s]' % ','.join(JSONL.splitlines())
+            path = self.write_zip('books.%s.zip' % format,
+                                  [('books.%s' % format, data)])
+            self.load(path)
+            self.assertEqual(self.books(), [(1, 'Dune', 1, datetime.date(1965, 8, 1))])
+
+
+def author_fixture(pk, name, format='json'):
+    obj = ('{"model": "djangoapp.author", "pk": %d, "fields": {"name": "%s"}}'
+           % (pk, name))
+    return obj if format == 'jsonl' else '[%s]' % obj
+
+
+class FindFixturesTests(LoadTestCase):
+
+    def setUp(self):
+        super(FindFixturesTests, self).setUp()
+        for name, pk in (('library.default.json', 1), ('library.other.json', 2),
+                         ('library_extra.json', 3), ('library.json.txt', 4)):
+            with open(self.path(name), 'w') as f:
+                f.write(author_fixture(pk, name))
+
+    def authors(self):
+        from .djangoapp.models import Author
+        return list(Author.objects.order_by('pk').values_list('pk', flat=True))
+
+    def load(self, *labels, **options):
+        index = os.path.join(self.directory, 'cache', 'index.json')
+        for use_fixture_index in (False, True):
+            super(FindFixturesTests, self).load(
+                *labels, use_fixture_index=use_fixture_index,
+                fixture_index=index, **options)
+
+    def test_database_alias(self):
+        # Fixtures for other databases, or other names, are ignored.
+        self.load(self.path('library'))
+        self.assertEqual(self.authors(), [1])
+
+    def test_formats(self):
+        from django.core.management import CommandError
+        from ibu.serializers import register_serializers
+        register_serializers()
+        with gzip.open(self.path('library.jsonl.gz'), 'wb') as f:
+            f.write(author_fixture(5, 'gz', 'jsonl').encode('utf-8'))
+        with self.assertRaises(CommandError) as cm:
+            self.load(self.path('library'))
+        self.assertIn("Multiple fixtures named 'library'", str(cm.exception))
+        self.load(self.path('library.jsonl'))
+        self.assertEqual(self.authors(), [5])
+        with self.assertRaises(CommandError) as cm:
+            self.load(self.path('library.json.gz'))
+        self.assertIn("No fixture named 'library' found.", str(cm.exception))
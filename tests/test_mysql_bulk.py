@@ -0,0 +1,107 @@
+"""Tests for the LOAD DATA LOCAL INFILE encoders of the mysql backend."""
+import datetime
+import decimal
+import io
+import unittest
+
+from ibu.backends.mysql.bulk import (
+    ER_DUP_ENTRY, check_load_data, encode_row, encode_value, write_rows,
+)
+from ibu.connection import DataError, IntegrityError
+
+
+class PlusTwo(datetime.tzinfo):
+
+    def utcoffset(self, dt):
+        return datetime.timedelta(hours=2)
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+
+class EncodeValueTests(unittest.TestCase):
+
+    def test_null_and_booleans(self):
+        self.assertEqual(encode_value(None), b'\\N')
+        self.assertEqual(encode_value(True), b'1')
+        self.assertEqual(encode_value(False), b'0')
+
+    def test_special_characters_are_escaped(self):
+        self.assertEqual(encode_value('a\tb\nc\\d\r\x00\x1a'),
+                         b'a\\tb\\nc\\\\d\\r\\0\\Z')
+
+    def test_unicode_and_bytes(self):
+        self.assertEqual(encode_value(u'\u00e9t\u00e9'), b'\xc3\xa9t\xc3\xa9')
+        self.assertEqual(encode_value(b'\x00\xff\t'), b'\\0\xff\\t')
+        self.assertEqual(encode_value(memoryview(b'ab')), b'ab')
+
+    def test_temporal_values(self):
+        self.assertEqual(encode_value(datetime.date(2017, 1, 2)),
+                         b'2017-01-02')
+        self.assertEqual(encode_value(datetime.datetime(2017, 1, 2, 3, 4, 5)),
+                         b'2017-01-02 03:04:05')
+        # Aware datetimes are stored as UTC.
+        aware = datetime.datetime(2017, 1, 2, 3, 4, 5, tzinfo=PlusTwo())
+        self.assertEqual(encode_value(aware), b'2017-01-02 01:04:05')
+        self.assertEqual(encode_value(datetime.timedelta(days=1, seconds=5)),
+                         b'24:00:05.000000')
+        self.assertEqual(encode_value(-datetime.timedelta(minutes=90)),
+                         b'-01:30:00.000000')
+
+    def test_other_values(self):
+        self.assertEqual(encode_value(decimal.Decimal('9.99')), b'9.99')
+        self.assertEqual(encode_value({'a': [1]}), b'{"a": [1]}')
+
+    def test_rows(self):
+        self.assertEqual(encode_row([1, None, 'x']), b'1\t\\N\tx\n')
+        stream = io.BytesIO()
+        rows = iter([[1], [2], [3]])
+        self.assertEqual(write_rows(stream, rows, 2), 2)
+        self.assertEqual(stream.getvalue(), b'1\n2\n')
+        self.assertEqual(list(rows), [[3]])
+
+
+class FakeCursor(object):
+
+    def __init__(self, rowcount, warnings=()):
+        self.rowcount = rowcount
+        self.warnings = list(warnings)
+        self.queries = []
+
+    def execute(self, sql):
+        self.queries.append(sql)
+
+    def fetchall(self):
+        return self.warnings
+
+
+class CheckLoadDataTests(unittest.TestCase):
+
+    def test_all_rows_loaded(self):
+        cursor = FakeCursor(3)
+        check_load_data(cursor, 0, 'book', 3)
+        self.assertEqual(cursor.queries, [])
+
+    def test_duplicate_keys(self):
+        cursor = FakeCursor(2, [
+            ('Warning', ER_DUP_ENTRY, "Duplicate entry '1' for key 'PRIMARY'"),
+        ])
+        with self.assertRaises(IntegrityError) as cm:
+            check_load_data(cursor, 1, 'book', 3)
+        self.assertEqual(
+            str(cm.exception), "LOAD DATA loaded 2 of 3 row(s) into 'book': "
+            "Duplicate entry '1' for key 'PRIMARY'")
+        self.assertEqual(cursor.queries, ['SHOW WARNINGS LIMIT 10'])
+
+    def test_altered_values(self):
+        # Truncated values are loaded, but raise warnings.
+        cursor = FakeCursor(3, [
+            ('Warning', 1265, "Data truncated for column 'title' at row 1"),
+        ])
+        with self.assertRaises(DataError):
+            check_load_data(cursor, 1, 'book', 3)
+
+    def test_missing_rows_without_warnings(self):
+        with self.assertRaises(DataError) as cm:
+            check_load_data(FakeCursor(1), 0, 'book', 3)
+        self.assertIn('no warnings', str(cm.exception))
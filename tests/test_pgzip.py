@@ -0,0 +1,104 @@
+"""Tests for parallel gzip compression."""
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from ibu.files import pgzip
+
+
+class PgzipTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'fixture.json.gz')
+        # Compressible, but not trivially, and spanning several blocks.
+        self.data = b''.join(b'%d row of fixture data\n' % i
+                             for i in range(20000))
+
+    def write(self, data, block_size=4096):
+        with io.BufferedWriter(pgzip.ParallelGzipWriter(
+                io.open(self.path, 'wb'), block_size=block_size,
+                workers=3)) as f:
+            f.write(data)
+
+
+class PgzipRoundTripTests(PgzipTestCase):
+
+    def test_round_trip(self):
+        self.write(self.data)
+        f = pgzip.open(self.path, 'rb', workers=3)
+        self.assertIsInstance(f.raw, pgzip.ParallelGzipReader)
+        with f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_open_for_writing(self):
+        with pgzip.open(self.path, 'wb', workers=2) as f:
+            f.write(self.data)
+        with pgzip.open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_readable_by_gzip(self):
+        self.write(self.data)
+        with gzip.open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_empty_file(self):
+        self.write(b'')
+        with gzip.open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'')
+        with pgzip.open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'')
+
+    def test_plain_gzip_files(self):
+        with gzip.open(self.path, 'wb') as f:
+            f.write(self.data)
+        with pgzip.open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_appended_plain_members(self):
+        self.write(self.data)
+        with open(self.path, 'ab') as f:
+            f.write(gzip.compress(b'appended\n'))
+            f.write(gzip.compress(b'twice\n'))
+        with pgzip.open(self.path, 'rb', workers=2) as f:
+            self.assertEqual(f.read(), self.data + b'appended\ntwice\n')
+
+    def test_indexed_members_after_plain_ones(self):
+        self.write(self.data[:1000])
+        with open(self.path, 'ab') as f:
+            f.write(gzip.compress(b'plain\n'))
+        with open(self.path, 'rb') as f:
+            indexed = f.read()
+        with open(self.path, 'ab') as f:
+            f.write(indexed)
+        with pgzip.open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), (self.data[:1000] + b'plain\n') * 2)
+
+    def test_truncated_plain_member(self):
+        self.write(self.data)
+        with open(self.path, 'ab') as f:
+            f.write(gzip.compress(self.data)[:-10])
+        with self.assertRaises(EOFError):
+            with pgzip.open(self.path, 'rb') as f:
+                f.read()
+
+    def test_corrupt_member(self):
+        self.write(self.data)
+        with open(self.path, 'r+b') as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b'\x00\x00\x00\x00')
+        with self.assertRaises(IOError):
+            with pgzip.open(self.path, 'rb') as f:
+                f.read()
+
+    def test_truncated_file(self):
+        self.write(self.data)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+        with self.assertRaises(EOFError):
+            with pgzip.open(self.path, 'rb') as f:
+                f.read()
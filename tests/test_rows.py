@@ -0,0 +1,127 @@
+"""Tests for the rows fixture format."""
+import datetime
+import decimal
+import io
+import unittest
+import uuid
+
+from ibu.serializers.rows import (
+    RowWriter, duration_iso_string, parse_duration, read_tables,
+)
+
+
+class PlusTwo(datetime.tzinfo):
+
+    def utcoffset(self, dt):
+        return datetime.timedelta(hours=2)
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+
+def round_trip(tables):
+    stream = io.StringIO()
+    writer = RowWriter(stream)
+    for table, columns, rows in tables:
+        writer.write_rows(table, columns, rows)
+    stream = io.BytesIO(stream.getvalue().encode('utf-8'))
+    return [(table, columns, list(rows))
+            for table, columns, rows in read_tables(stream)]
+
+
+class RowsRoundTripTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        rows = [(1, 'Dune', None, True, 4.5, [1, {'a': 'b'}])]
+        self.assertEqual(round_trip([('book', ['id', 'title', 'isbn',
+                                               'available', 'rating',
+                                               'meta'], rows)]),
+                         [('book', ['id', 'title', 'isbn', 'available',
+                                    'rating', 'meta'], rows)])
+
+    def test_binary_values(self):
+        values = [b'\x00\xff\x10', bytearray(b'abc'), memoryview(b'\x01'), b'']
+        [(_, _, rows)] = round_trip([('blob', ['data'],
+                                      [(value,) for value in values])])
+        self.assertEqual(rows, [(bytes(value),) for value in values])
+        self.assertIsInstance(rows[0][0], bytes)
+
+    def test_temporal_values(self):
+        row = (datetime.datetime(2017, 1, 2, 3, 4, 5, 123456),
+               datetime.time(23, 59, 59, 999999),
+               datetime.date(2017, 1, 2),
+               datetime.timedelta(days=-1, seconds=3, microseconds=7))
+        rows = [row, (datetime.datetime(1815, 12, 23), datetime.time(0, 0),
+                      datetime.date(1, 1, 1), datetime.timedelta(days=400))]
+        [(_, _, read)] = round_trip([('event', ['at', 'time', 'day',
+                                                'duration'], rows)])
+        self.assertEqual(read, rows)
+        self.assertIsInstance(read[0][0], datetime.datetime)
+
+    def test_temporal_values_keep_microseconds(self):
+        stream = io.StringIO()
+        RowWriter(stream).write_rows('event', ['at', 'duration'], [(
+            datetime.datetime(2017, 1, 2, 3, 4, 5, 123456),
+            datetime.timedelta(days=-1, seconds=3, microseconds=7))])
+        self.assertEqual(stream.getvalue().splitlines()[1],
+                         '[{"$datetime":"2017-01-02T03:04:05.123456"},'
+                         '{"$duration":"-P0DT23H59M56.999993S"}]')
+
+    def test_aware_values(self):
+        aware = datetime.datetime(2017, 1, 2, 3, 4, 5, tzinfo=PlusTwo())
+        time = datetime.time(3, 4, 5, tzinfo=PlusTwo())
+        [(_, _, [(at, at_time)])] = round_trip([('event', ['at', 'time'],
+                                                 [(aware, time)])])
+        # Aware datetimes are read back in UTC, aware times as strings.
+        self.assertEqual(at, aware)
+        self.assertEqual(at.utcoffset(), datetime.timedelta(0))
+        self.assertEqual(at.replace(tzinfo=None),
+                         datetime.datetime(2017, 1, 2, 1, 4, 5))
+        self.assertEqual(at_time, '03:04:05+02:00')
+
+    def test_untagged_strings(self):
+        stream = io.BytesIO(b'{"table": "event", "columns": ["day", "data"]}\n'
+                            b'["2017-01-02", {"$date": "x", "y": 1}]\n')
+        self.assertEqual([list(rows) for _, _, rows in read_tables(stream)],
+                         [[('2017-01-02', {'$date': 'x', 'y': 1})]])
+
+    def test_values_fit_the_bulk_writers(self):
+        from ibu.backends.mysql.bulk import encode_row
+        from ibu.backends.postgresql.bulk import binary_row_encoder
+        row = (datetime.date(2017, 1, 2), datetime.time(3, 4, 5),
+               datetime.datetime(2017, 1, 2, 3, 4, 5),
+               datetime.timedelta(days=1, seconds=5))
+        [(_, _, [read])] = round_trip([('event', ['a', 'b', 'c', 'd'], [row])])
+        encode = binary_row_encoder([1082, 1083, 1114, 1186])
+        self.assertEqual(encode(read), encode(row))
+        self.assertEqual(encode_row(read),
+                         b'2017-01-02\t03:04:05\t2017-01-02 03:04:05\t'
+                         b'24:00:05.000000\n')
+
+    def test_decimals_and_uuids(self):
+        value = uuid.uuid4()
+        [(_, _, rows)] = round_trip([('price', ['amount', 'ref'],
+                                      [(decimal.Decimal('0.10'), value)])])
+        self.assertEqual(rows, [('0.10', str(value))])
+
+    def test_empty_tables(self):
+        self.assertEqual(
+            round_trip([('a', ['id'], []), ('b', ['id'], [(1,)])]),
+            [('b', ['id'], [(1,)])])
+
+
+class DurationTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        for duration in (datetime.timedelta(0),
+                         datetime.timedelta(days=1, hours=2, minutes=3,
+                                            seconds=4, microseconds=5),
+                         -datetime.timedelta(days=1, microseconds=1)):
+            self.assertEqual(parse_duration(duration_iso_string(duration)),
+                             duration)
+        self.assertEqual(duration_iso_string(datetime.timedelta(days=1, hours=2)),
+                         'P1DT02H00M00.000000S')
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_duration('1 day')
@@ -0,0 +1,28 @@
+"""Tests for the foreign key ordering of tables."""
+import unittest
+
+from ibu.scheduler import topological_levels
+
+
+class TopologicalLevelsTests(unittest.TestCase):
+
+    def test_levels(self):
+        self.assertEqual(topological_levels({
+            'book': {'author', 'publisher'},
+            'author': set(),
+            'publisher': {'country'},
+            'country': set(),
+            'review': {'book'},
+        }), [['author', 'country'], ['publisher'], ['book'], ['review']])
+
+    def test_unknown_and_self_references(self):
+        # References to tables that aren't copied are ignored.
+        self.assertEqual(topological_levels({'book': {'author'}}), [['book']])
+
+    def test_cycles_come_last(self):
+        self.assertEqual(topological_levels({
+            'a': {'b'}, 'b': {'a'}, 'c': set(), 'd': {'c', 'a'},
+        }), [['c'], ['a', 'b', 'd']])
+
+    def test_empty(self):
+        self.assertEqual(topological_levels({}), [])
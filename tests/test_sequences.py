@@ -0,0 +1,153 @@
+"""Tests for resetting sequences after rows were loaded with their keys."""
+import unittest
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+try:
+    import MySQLdb
+except ImportError:
+    MySQLdb = None
+
+from . import djangoapp
+from .djangoapp import skip_unless_django
+
+
+def setUpModule():
+    if djangoapp.django is not None:
+        djangoapp.setup()
+
+
+def define_models():
+    """
+    Returns models with many-to-many fields, registered apart from the
+    app's, which the other tests dump and load.
+    """
+    from django.apps.registry import Apps
+    from django.db import models
+
+    isolated_apps = Apps()
+
+    class Reader(models.Model):
+
+        class Meta:
+            app_label = 'djangoapp'
+            apps = isolated_apps
+
+    class Shelf(models.Model):
+        books = models.ManyToManyField(Reader, related_name='+')
+        readers = models.ManyToManyField(Reader, through='Reading')
+
+        class Meta:
+            app_label = 'djangoapp'
+            apps = isolated_apps
+
+    class Reading(models.Model):
+        shelf = models.ForeignKey(Shelf, models.CASCADE)
+        reader = models.ForeignKey(Reader, models.CASCADE)
+
+        class Meta:
+            app_label = 'djangoapp'
+            apps = isolated_apps
+
+    return Reader, Shelf, Reading
+
+
+@skip_unless_django
+class SequenceResetColumnsTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.models = define_models()
+
+    def test_columns(self):
+        from ibu.backends.base.operations import BaseDatabaseOperations
+        columns = BaseDatabaseOperations(None).sequence_reset_columns(
+            self.models)
+        # Shelf.readers goes through Reading, which has its own key.
+        self.assertEqual(columns, [
+            ('djangoapp_reader', 'id'),
+            ('djangoapp_shelf', 'id'),
+            ('djangoapp_shelf_books', 'id'),
+            ('djangoapp_reading', 'id'),
+        ])
+
+    @unittest.skipIf(psycopg2 is None, "psycopg2 isn't installed.")
+    def test_postgresql(self):
+        from django.core.management.color import no_style
+        from ibu.backends.postgresql.operations import DatabaseOperations
+        shelf = self.models[1]
+        self.assertEqual(
+            DatabaseOperations(None).sequence_reset_sql(no_style(), [shelf]), [
+                "SELECT setval(pg_get_serial_sequence('\"djangoapp_shelf\"',"
+                "'id'), coalesce(max(\"id\"), 1), max(\"id\") IS NOT null) "
+                "FROM \"djangoapp_shelf\";",
+                "SELECT setval(pg_get_serial_sequence('\"djangoapp_shelf_books\"',"
+                "'id'), coalesce(max(\"id\"), 1), max(\"id\") IS NOT null) "
+                "FROM \"djangoapp_shelf_books\";",
+            ])
+
+
+class FakeCursor(object):
+    description = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        self.connection.queries.append((sql, params))
+
+    def fetchall(self):
+        return self.connection.rows
+
+    def close(self):
+        pass
+
+
+class FakeMySQLConnection(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@skip_unless_django
+@unittest.skipIf(MySQLdb is None, "MySQLdb isn't installed.")
+class MySQLResetSequencesTests(unittest.TestCase):
+
+    def reset_sequences(self, rows):
+        from django.core.management.color import no_style
+        from ibu.backends.mysql.base import DatabaseWrapper
+        from .djangoapp.models import Author, Book
+        wrapper = DatabaseWrapper({}, allow_thread_sharing=True)
+        wrapper.connection = FakeMySQLConnection(rows)
+        wrapper.autocommit = True
+        wrapper.reset_sequences(no_style(), [Author, Book])
+        return wrapper.connection.queries
+
+    def test_one_query(self):
+        queries = self.reset_sequences([
+            ('djangoapp_author', 2, 3), ('djangoapp_book', None, 1)])
+        self.assertEqual(queries, [(
+            'SELECT %s, (SELECT MAX(`id`) FROM `djangoapp_author`), ('
+            'SELECT auto_increment FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s) UNION ALL '
+            'SELECT %s, (SELECT MAX(`id`) FROM `djangoapp_book`), ('
+            'SELECT auto_increment FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s)',
+            ['djangoapp_author', 'djangoapp_author',
+             'djangoapp_book', 'djangoapp_book'],
+        )])
+
+    def test_counters_behind(self):
+        queries = self.reset_sequences([
+            ('djangoapp_author', 5, 3), ('djangoapp_book', 7, None)])
+        self.assertEqual(queries[1:], [
+            ('ALTER TABLE `djangoapp_author` AUTO_INCREMENT = 6', None),
+            ('ALTER TABLE `djangoapp_book` AUTO_INCREMENT = 8', None),
+        ])
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Tests for sharded fixture directories."""
+from __future__ import unicode_literals
+
+import io
+import unittest
+
+from ibu.shards import CountingStream
+
+
+class CountingStreamTests(unittest.TestCase):
+
+    def test_text_is_counted_in_encoded_bytes(self):
+        buffer = io.BytesIO()
+        stream = CountingStream(io.TextIOWrapper(buffer, encoding='utf-8'))
+        stream.write('été')
+        stream.write('☃')
+        stream.flush()
+        self.assertEqual(stream.count, 8)
+        self.assertEqual(stream.count, len(buffer.getvalue()))
+
+    def test_stream_encoding(self):
+        stream = CountingStream(io.TextIOWrapper(io.BytesIO(), encoding='utf-16-le'))
+        stream.write('ab')
+        self.assertEqual(stream.count, 4)
+
+    def test_bytes(self):
+        buffer = io.BytesIO()
+        stream = CountingStream(buffer)
+        stream.write(b'\xc3\xa9t\xc3\xa9')
+        self.assertEqual(stream.count, 5)
+        self.assertEqual(stream.getvalue(), b'\xc3\xa9t\xc3\xa9')
@@ -0,0 +1,246 @@
+"""Tests for streaming cursors and the read transactions they run in."""
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+try:
+    import MySQLdb
+except ImportError:
+    MySQLdb = None
+
+from ibu import connection as Database
+from ibu.backends.base.base import BaseDatabaseWrapper
+
+
+class FakeCursor(object):
+
+    def __init__(self, connection, name=None, **options):
+        self.connection = connection
+        self.name = name
+        self.options = options
+        self.rows = []
+
+    description = None
+    arraysize = 1
+
+    def execute(self, sql, params=None):
+        self.connection.log.append(
+            ('execute', self.name, sql, self.connection.autocommit))
+        if sql.startswith('FAIL'):
+            raise ValueError(sql)
+        self.rows = [(1,), (2,), (3,)]
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def close(self):
+        self.connection.log.append(('close', self.name))
+
+
+class FakeConnection(object):
+    """A DB-API connection logging what's done with it."""
+
+    def __init__(self):
+        self.autocommit = True
+        self.log = []
+        self.cursors = []
+
+    def cursor(self, name=None, **options):
+        cursor = FakeCursor(self, name, **options)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.log.append(('commit',))
+
+    def rollback(self):
+        self.log.append(('rollback',))
+
+
+class DatabaseWrapper(BaseDatabaseWrapper):
+    Database = Database
+
+    def __init__(self):
+        super(DatabaseWrapper, self).__init__({}, allow_thread_sharing=True)
+        self.connection = FakeConnection()
+        self.autocommit = True
+
+    def create_cursor(self):
+        return self.connection.cursor()
+
+    def create_streaming_cursor(self):
+        return self.connection.cursor('stream')
+
+    def _set_autocommit(self, autocommit):
+        self.connection.autocommit = autocommit
+
+
+class ReadTransactionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = DatabaseWrapper()
+        self.log = self.wrapper.connection.log
+
+    def read(self):
+        rows = []
+        with self.wrapper.read_transaction():
+            with self.wrapper.cursor(streaming=True) as cursor:
+                cursor.execute('SELECT id FROM book')
+                for batch in iter(lambda: cursor.fetchmany(2), []):
+                    rows.extend(batch)
+        return rows
+
+    def test_streaming_cursor_in_read_transaction(self):
+        self.assertEqual(self.read(), [(1,), (2,), (3,)])
+        # The named cursor runs with autocommit off, and is closed before
+        # the transaction is rolled back.
+        self.assertEqual(self.log, [
+            ('execute', 'stream', 'SELECT id FROM book', False),
+            ('close', 'stream'),
+            ('rollback',),
+        ])
+        self.assertTrue(self.wrapper.get_autocommit())
+        self.assertTrue(self.wrapper.connection.autocommit)
+
+    def test_in_current_transaction(self):
+        self.wrapper.set_autocommit(False)
+        self.read()
+        self.assertEqual(self.log, [
+            ('execute', 'stream', 'SELECT id FROM book', False),
+            ('close', 'stream'),
+        ])
+        self.assertFalse(self.wrapper.get_autocommit())
+
+    def test_rolled_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.wrapper.read_transaction():
+                raise ValueError
+        self.assertEqual(self.log, [('rollback',)])
+        self.assertTrue(self.wrapper.get_autocommit())
+
+    def test_regular_cursor(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertEqual(self.log, [('execute', None, 'SELECT 1', True),
+                                    ('close', None)])
+
+
+@unittest.skipIf(psycopg2 is None, "psycopg2 isn't installed.")
+class PostgreSQLStreamingCursorTests(unittest.TestCase):
+
+    def setUp(self):
+        from ibu.backends.postgresql import base
+        patcher = mock.patch.object(base.settings, 'USE_TZ', False, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.wrapper = base.DatabaseWrapper(
+            {'OPTIONS': {'itersize': 500}}, allow_thread_sharing=True)
+        self.wrapper.connection = FakeConnection()
+        self.wrapper.autocommit = True
+
+    def test_named_cursor_in_read_transaction(self):
+        with self.wrapper.read_transaction():
+            for _ in range(2):
+                with self.wrapper.cursor(streaming=True) as cursor:
+                    cursor.execute('SELECT id FROM book')
+        connection = self.wrapper.connection
+        first, second = connection.cursors
+        # Server-side cursors, not declared WITH HOLD: they only live as
+        # long as the read transaction.
+        self.assertTrue(first.name.startswith('_ibu_curs_'))
+        self.assertNotEqual(first.name, second.name)
+        self.assertEqual(first.options, {'scrollable': False, 'withhold': False})
+        self.assertEqual(first.itersize, 500)
+        self.assertEqual(connection.log, [
+            ('execute', first.name, 'SELECT id FROM book', False),
+            ('close', first.name),
+            ('execute', second.name, 'SELECT id FROM book', False),
+            ('close', second.name),
+            ('rollback',),
+        ])
+        self.assertTrue(connection.autocommit)
+
+    def test_regular_cursor(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertEqual(self.wrapper.connection.cursors[0].name, None)
+
+
+class FakeMySQLConnection(FakeConnection):
+
+    def cursor(self, cursorclass=None):
+        return super(FakeMySQLConnection, self).cursor(
+            cursorclass and cursorclass.__name__)
+
+    def autocommit(self, autocommit):
+        pass
+
+
+@unittest.skipIf(MySQLdb is None, "MySQLdb isn't installed.")
+class MySQLStreamingCursorTests(unittest.TestCase):
+
+    def setUp(self):
+        from ibu.backends.mysql import base
+        self.wrapper = base.DatabaseWrapper({}, 'src', allow_thread_sharing=True)
+        self.wrapper.connection = FakeMySQLConnection()
+
+    def test_pending_result(self):
+        cursor = self.wrapper.cursor(streaming=True)
+        self.assertEqual(self.wrapper.connection.cursors[0].name, 'SSCursor')
+        self.assertIsNone(self.wrapper.pending_result)
+        cursor.execute('SELECT id FROM book')
+        self.assertIsNotNone(self.wrapper.pending_result)
+        # No other statement can be sent until the result is read.
+        msg = ("The result of a streaming cursor on the 'src' connection "
+               "hasn't been read to the end.")
+        for streaming in (False, True):
+            with self.assertRaises(Database.ProgrammingError) as cm:
+                self.wrapper.cursor(streaming=streaming)
+            self.assertIn(msg, str(cm.exception))
+        self.assertEqual(cursor.fetchmany(2), [(1,), (2,)])
+        self.assertEqual(cursor.fetchone(), (3,))
+        self.assertIsNotNone(self.wrapper.pending_result)
+        self.assertEqual(cursor.fetchmany(2), [])
+        self.assertIsNone(self.wrapper.pending_result)
+        self.wrapper.cursor().close()
+
+    def test_fetchall(self):
+        cursor = self.wrapper.cursor(streaming=True)
+        cursor.execute('SELECT id FROM book')
+        self.assertEqual(len(cursor.fetchall()), 3)
+        self.assertIsNone(self.wrapper.pending_result)
+
+    def test_closed_before_the_end(self):
+        with self.wrapper.cursor(streaming=True) as cursor:
+            cursor.execute('SELECT id FROM book')
+            cursor.fetchone()
+        self.assertIsNone(self.wrapper.pending_result)
+
+    def test_failed_execute(self):
+        cursor = self.wrapper.cursor(streaming=True)
+        with self.assertRaises(ValueError):
+            cursor.execute('FAIL')
+        self.assertIsNone(self.wrapper.pending_result)
+
+    def test_connection_closed(self):
+        cursor = self.wrapper.cursor(streaming=True)
+        cursor.execute('SELECT id FROM book')
+        self.wrapper.connection.close = lambda: None
+        self.wrapper.close()
+        self.assertIsNone(self.wrapper.pending_result)
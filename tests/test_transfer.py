@@ -0,0 +1,247 @@
+"""Tests for the table copy engine."""
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+from ibu.backends.base.base import ImproperlyConfigured
+from ibu.checkpoint import (
+    ForeignKeyDefinitions, IndexDefinitions, Journal, Watermarks,
+)
+from ibu.transfer import Transfer
+
+from .sqlite_connection import SQLiteConnection
+
+SCHEMA = """
+CREATE TABLE author (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE book (
+    id INTEGER PRIMARY KEY, title TEXT, updated TEXT,
+    author_id INTEGER REFERENCES author (id)
+);
+"""
+
+
+class TransferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.source = SQLiteConnection(self.path('src.db'))
+        self.dest = SQLiteConnection(self.path('dest.db'))
+        for connection in (self.source, self.dest):
+            connection.executescript(SCHEMA)
+        self.source.executescript("""
+            INSERT INTO author VALUES (1, 'Herbert'), (2, 'Le Guin');
+            INSERT INTO book VALUES (1, 'Dune', '2017-01-01', 1),
+                                    (2, 'Earthsea', '2017-01-02', 2);
+        """)
+        connections = {'src': self.source, 'dest': self.dest}
+        patcher = mock.patch('ibu.transfer.open_connection',
+                             lambda config, alias: connections[alias])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def transfer(self, **kwargs):
+        config = {'copy': kwargs.pop('options', {})}
+        return Transfer(config, **kwargs)
+
+
+class IncrementalCopyTests(TransferTestCase):
+
+    def copy(self, watermark_columns=None):
+        journal = Journal(self.path('journal'))
+        self.addCleanup(journal.close)
+        return self.transfer(
+            options={'watermarks': watermark_columns or {}}, journal=journal,
+            watermarks=Watermarks(self.path('watermarks'))).run()
+
+    def test_copy_resumes_from_the_watermarks(self):
+        self.assertEqual(self.copy({'book': 'updated'}),
+                         {'author': 2, 'book': 2})
+        watermarks = Watermarks(self.path('watermarks'))
+        self.assertEqual(watermarks.get('author', 'id'), 2)
+        self.assertEqual(watermarks.get('book', 'updated'), '2017-01-02')
+
+        self.source.executescript("""
+            INSERT INTO author VALUES (3, 'Banks');
+            UPDATE book SET title = 'A Wizard of Earthsea' WHERE id = 2;
+            INSERT INTO book VALUES (3, 'Excession', '2017-01-03', 3);
+        """)
+        # Primary keys are compared with >, configured columns with >=: the
+        # rows sharing the last synced value may have changed since.
+        self.assertEqual(self.copy({'book': 'updated'}),
+                         {'author': 1, 'book': 2})
+        self.assertEqual(
+            self.dest.rows('SELECT id, title FROM book ORDER BY id'),
+            [(1, 'Dune'), (2, 'A Wizard of Earthsea'), (3, 'Excession')])
+        watermarks = Watermarks(self.path('watermarks'))
+        self.assertEqual(watermarks.get('author', 'id'), 3)
+        self.assertEqual(watermarks.get('book', 'updated'), '2017-01-03')
+
+    def test_unknown_watermark_column(self):
+        with self.assertRaises(ImproperlyConfigured) as cm:
+            self.copy({'book': 'modified'})
+        self.assertEqual(
+            str(cm.exception), "The watermark column 'modified' of table "
+            "'book' must exist in both the source and the destination.")
+        # Nothing was copied.
+        self.assertEqual(self.dest.rows('SELECT * FROM author'), [])
+
+    def test_watermark_column_missing_from_dest(self):
+        self.source.executescript('ALTER TABLE author ADD COLUMN born TEXT')
+        with self.assertRaises(ImproperlyConfigured):
+            self.copy({'author': 'born'})
+
+
+class StreamingTests(TransferTestCase):
+
+    def test_source_is_streamed_in_a_transaction(self):
+        self.assertEqual(self.transfer(options={'batch_size': 1}).run(),
+                         {'author': 2, 'book': 2})
+        reads = self.source.statements(r'^SELECT .* FROM "(author|book)"')
+        self.assertEqual(len(reads), 2)
+        for query in reads:
+            self.assertTrue(query['streaming'])
+            self.assertTrue(query['in_transaction'])
+        # The read transactions are over.
+        self.assertTrue(self.source.get_autocommit())
+        self.assertEqual(self.dest.rows('SELECT id FROM book ORDER BY id'),
+                         [(1,), (2,)])
+
+
+class RebuildIndexesTests(TransferTestCase):
+
+    def setUp(self):
+        super(RebuildIndexesTests, self).setUp()
+        self.dest.executescript("""
+            CREATE INDEX book_title ON book (title);
+            CREATE INDEX book_author ON book (author_id);
+        """)
+
+    def index_names(self):
+        return [name for name, in self.dest.rows(
+            "SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name")]
+
+    def copy(self):
+        indexes = IndexDefinitions(self.path('indexes'))
+        return self.transfer(indexes=indexes).run()
+
+    def test_indexes_are_dropped_during_the_copy(self):
+        self.assertEqual(self.copy(), {'author': 2, 'book': 2})
+        statements = [query['sql'] for query in
+                      self.dest.statements(r'^(DROP|CREATE) INDEX|^INSERT')]
+        self.assertEqual(statements, [
+            'DROP INDEX "book_author"',
+            'DROP INDEX "book_title"',
+            'INSERT INTO "author" ("id", "name") VALUES (%s, %s)',
+            'INSERT INTO "book" ("id", "title", "updated", "author_id") '
+            'VALUES (%s, %s, %s, %s)',
+            'CREATE INDEX book_author ON book (author_id)',
+            'CREATE INDEX book_title ON book (title)',
+        ])
+        self.assertEqual(self.index_names(), ['book_author', 'book_title'])
+        # The rebuilt definitions are forgotten.
+        self.assertEqual(IndexDefinitions(self.path('indexes')).tables(), [])
+
+    def test_definitions_saved_by_an_interrupted_copy(self):
+        # The copy stopped after dropping book_title.
+        IndexDefinitions(self.path('indexes')).add(
+            'book', {'book_title': 'CREATE INDEX book_title ON book (title)'})
+        self.dest.executescript('DROP INDEX book_title')
+        self.copy()
+        self.assertEqual(self.index_names(), ['book_author', 'book_title'])
+        self.assertEqual(
+            len(self.dest.statements(r'^CREATE INDEX book_title')), 1)
+
+    def test_backend_without_index_introspection(self):
+        with mock.patch.object(self.dest.introspection,
+                               'get_index_definitions',
+                               side_effect=NotImplementedError):
+            self.copy()
+        self.assertEqual(self.dest.statements(r'^DROP INDEX'), [])
+        self.assertEqual(IndexDefinitions(self.path('indexes')).tables(), [])
+
+
+AUTHOR_FK = 'FOREIGN KEY (author_id) REFERENCES author(id)'
+
+
+class RestoreForeignKeysTests(TransferTestCase):
+
+    def setUp(self):
+        super(RestoreForeignKeysTests, self).setUp()
+        # The foreign keys in the destination, by table.
+        self.existing = {}
+        patcher = mock.patch.object(
+            self.dest.introspection, 'get_foreign_key_definitions',
+            lambda cursor, table: dict(self.existing.get(table, {})),
+            create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('ibu.transfer.validate_constraints',
+                             return_value=[])
+        self.validate_constraints = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.foreign_keys = ForeignKeyDefinitions(self.path('foreign_keys'))
+
+    def restore(self):
+        transfer = self.transfer(options={'workers': 3},
+                                 foreign_keys=self.foreign_keys)
+        transfer.restore_foreign_keys()
+        return transfer
+
+    def test_foreign_keys_are_added_not_valid(self):
+        self.foreign_keys.add('book', {
+            'book_author_fk': AUTHOR_FK,
+            'book_editor_fk': 'FOREIGN KEY (editor_id) REFERENCES author(id)',
+        })
+        # book_editor_fk was added back before the previous run stopped.
+        self.existing['book'] = {
+            'book_editor_fk': 'FOREIGN KEY (editor_id) REFERENCES author(id)'}
+        self.restore()
+        self.assertEqual(
+            [query['sql'] for query in self.dest.statements('ADD CONSTRAINT')],
+            ['ALTER TABLE "book" ADD CONSTRAINT "book_author_fk" '
+             'FOREIGN KEY (author_id) REFERENCES author(id) NOT VALID'])
+        self.validate_constraints.assert_called_once_with(self.dest, ['book'], 3)
+        self.assertEqual(
+            ForeignKeyDefinitions(self.path('foreign_keys')).tables(), [])
+
+    def test_nothing_to_restore(self):
+        self.restore()
+        self.assertEqual(self.dest.statements('ADD CONSTRAINT'), [])
+        self.assertFalse(self.validate_constraints.called)
+
+
+@unittest.skipIf(psycopg2 is None, "psycopg2 isn't installed.")
+class PostgreSQLForeignKeyDefinitionTests(unittest.TestCase):
+
+    def add_foreign_key(self, **kwargs):
+        from ibu.backends.postgresql.base import DatabaseWrapper
+        editor = DatabaseWrapper({}).schema_editor(collect_sql=True, **kwargs)
+        editor.add_foreign_key_definition('book', 'book_author_fk', AUTHOR_FK)
+        return editor.collected_sql
+
+    def test_not_valid(self):
+        self.assertEqual(
+            self.add_foreign_key(validate_foreign_keys=False),
+            ['ALTER TABLE "book" ADD CONSTRAINT "book_author_fk" '
+             'FOREIGN KEY (author_id) REFERENCES author(id) NOT VALID;'])
+
+    def test_validated(self):
+        self.assertEqual(
+            self.add_foreign_key(),
+            ['ALTER TABLE "book" ADD CONSTRAINT "book_author_fk" '
+             'FOREIGN KEY (author_id) REFERENCES author(id);'])
@@ -0,0 +1,128 @@
+"""Tests for the conversion of fetched columns."""
+import datetime
+import decimal
+import unittest
+
+try:
+    import MySQLdb
+except ImportError:
+    MySQLdb = None
+
+from ibu.backends import utils
+from ibu.backends.utils import RowConverter, batch_typecast
+
+DATE, TIME, TIMESTAMP, DECIMAL, TEXT = range(5)
+
+TYPECASTS = {
+    DATE: utils.typecast_date,
+    TIME: utils.typecast_time,
+    TIMESTAMP: utils.typecast_timestamp,
+    DECIMAL: utils.typecast_decimal,
+}
+
+
+def description(*type_codes):
+    return [('column%d' % position, type_code, None, None, None, None, True)
+            for position, type_code in enumerate(type_codes)]
+
+
+class BatchTypecastTests(unittest.TestCase):
+
+    def test_batch_equivalents(self):
+        self.assertIs(batch_typecast(utils.typecast_date), utils.typecast_dates)
+        self.assertIs(batch_typecast(utils.typecast_timestamp),
+                      utils.typecast_timestamps)
+        convert = batch_typecast(int)
+        self.assertEqual(convert(['1', '2']), [1, 2])
+
+    def test_nulls(self):
+        for typecast in TYPECASTS.values():
+            self.assertEqual(batch_typecast(typecast)([None, None]), [None, None])
+
+    def test_dates(self):
+        self.assertEqual(
+            utils.typecast_dates(['2017-01-02', None, '0001-12-31']),
+            [datetime.date(2017, 1, 2), None, datetime.date(1, 12, 31)])
+        # Columns without a driver converter are fetched as bytes.
+        self.assertEqual(utils.typecast_dates([None, b'2017-01-02']),
+                         [None, datetime.date(2017, 1, 2)])
+
+    def test_zero_dates(self):
+        # MySQL's zero dates are read as NULL, as MySQLdb does.
+        self.assertEqual(utils.typecast_dates(['0000-00-00', '2017-01-02']),
+                         [None, datetime.date(2017, 1, 2)])
+        self.assertEqual(utils.typecast_timestamps([b'0000-00-00 00:00:00']),
+                         [None])
+
+    def test_times(self):
+        self.assertEqual(utils.typecast_times(['23:59:59.999999', None, '00:00:00']),
+                         [datetime.time(23, 59, 59, 999999), None, datetime.time()])
+
+    def test_timestamps(self):
+        self.assertEqual(
+            utils.typecast_timestamps(['2017-01-02 03:04:05.123456', None,
+                                       '2017-01-02 03:04:05', '2017-01-02']),
+            [datetime.datetime(2017, 1, 2, 3, 4, 5, 123456), None,
+             datetime.datetime(2017, 1, 2, 3, 4, 5), datetime.date(2017, 1, 2)])
+
+    def test_timestamps_time_zones(self):
+        # Offsets are dropped, keeping the wall clock time, whether the
+        # batch is parsed by fromisoformat() or by typecast_timestamp().
+        expected = [datetime.datetime(2005, 7, 29, 15, 48, 0, 590358),
+                    datetime.datetime(2005, 7, 29, 9, 56)]
+        self.assertEqual(
+            utils.typecast_timestamps(['2005-07-29 15:48:00.590358-05:00',
+                                       '2005-07-29 09:56:00+02:00']),
+            expected)
+        self.assertEqual(
+            utils.typecast_timestamps(['2005-07-29 15:48:00.590358-05',
+                                       '2005-07-29 09:56:00+02']),
+            expected)
+        for value in utils.typecast_timestamps(['2005-07-29 09:56:00+02:00']):
+            self.assertIsNone(value.tzinfo)
+
+    def test_decimals(self):
+        self.assertEqual(utils.typecast_decimals(['9.99', None, '-0.5', '']),
+                         [decimal.Decimal('9.99'), None, decimal.Decimal('-0.5'), None])
+        self.assertEqual(utils.typecast_decimals([b'1.50']), [decimal.Decimal('1.50')])
+
+
+class RowConverterTests(unittest.TestCase):
+
+    def test_converts_mapped_columns(self):
+        convert = RowConverter(description(TEXT, DATE, DECIMAL, TIMESTAMP), TYPECASTS)
+        rows = convert([
+            ('a', '2017-01-02', '1.50', '2017-01-02 03:04:05'),
+            ('b', None, None, None),
+        ])
+        self.assertEqual(rows, [
+            ('a', datetime.date(2017, 1, 2), decimal.Decimal('1.50'),
+             datetime.datetime(2017, 1, 2, 3, 4, 5)),
+            ('b', None, None, None),
+        ])
+        self.assertIsInstance(rows[0], tuple)
+
+    def test_nothing_to_convert(self):
+        rows = [('a', 1)]
+        self.assertIs(RowConverter(description(TEXT, TEXT), TYPECASTS)(rows), rows)
+        self.assertIs(RowConverter(None, TYPECASTS)(rows), rows)
+        convert = RowConverter(description(DATE), TYPECASTS)
+        self.assertEqual(convert([]), [])
+
+
+@unittest.skipIf(MySQLdb is None, "MySQLdb isn't installed.")
+class MySQLConversionsTests(unittest.TestCase):
+
+    def test_temporal_columns(self):
+        from MySQLdb.constants import FIELD_TYPE
+        from ibu.backends.mysql.base import batch_conversions, django_conversions
+        convert = RowConverter(
+            description(FIELD_TYPE.DATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP),
+            batch_conversions)
+        self.assertEqual(
+            convert([(b'2017-01-02', b'2017-01-02 03:04:05.000006', None)]),
+            [(datetime.date(2017, 1, 2),
+              datetime.datetime(2017, 1, 2, 3, 4, 5, 6), None)])
+        # MySQLdb leaves these columns to the batch conversions.
+        for field_type in (FIELD_TYPE.DATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+            self.assertNotIn(field_type, django_conversions)